@@ -0,0 +1,122 @@
+"""
+The assistant state machine end to end, headless with stand-ins.
+
+    python -m benchmarks.assistant
+
+Runs a short scripted session through NeroAI (dummy video driver, StubBrain/StubVoice),
+throws a burst of duplicate utterances at it while it's busy, and reports how fast the
+ear re-arms after speech ends, how many threads got started and what the command
+queue did with the burst.
+"""
+import os
+import time
+import threading
+import argparse
+import webbrowser
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from config.settings import Config
+from core.app import NeroAI
+from core.assistant import IDLE, LISTENING
+from utils.tracing import percentiles
+from benchmarks.stubs import StubBrain, StubVoice
+
+
+class PoliteEars:
+    """Only 'hears' a phrase when Nero is done talking, like a person waiting for the reply"""
+    
+    def __init__(self, phrases, delay=0.2):
+        self.phrases = list(phrases)
+        self.delay = delay
+        self.nero = None
+    
+    def idle(self):
+        return self.nero.machine.state('worker') == IDLE and not len(self.nero.inbox)
+    
+    def listen(self, visualizer=None, on_captured=None, on_partial=None, mic_open=None, on_barge_in=None,
+               on_speech=None):
+        waited = self.idle()
+        spoke = self.nero.machine.speech_count
+        time.sleep(self.delay)
+        if not (waited and self.idle() and spoke == self.nero.machine.speech_count and self.phrases):
+            return None
+        if on_speech:
+            on_speech()
+        if on_captured:
+            on_captured()
+        return self.phrases.pop(0)
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.strip().splitlines()[0]).parse_args()
+    Config.CHAT_DB = ':memory:'
+    Config.TRACING = False
+    Config.BARGE_IN = None  # re-arm is measured from the mic gate opening
+    StubVoice.seconds_per_char = 0.002
+    ears = PoliteEars(["what time is it", "tell me about the weather", "open youtube please", "goodbye"])
+    nero = NeroAI(brain=StubBrain(tokens_per_second=200, first_token_delay=0.1), ears=ears, voice=StubVoice)
+    ears.nero = nero
+    
+    # timestamp every snapshot as it's posted
+    snapshots = []
+    post = nero.events.post
+    def recording_post(kind, *args):
+        if kind == 'state':
+            snapshots.append(args[0])
+        post(kind, *args)
+    nero.events.post = recording_post
+    
+    # "open youtube please" goes down the router's browser path, just note the url instead
+    opened = []
+    original_open = webbrowser.open
+    webbrowser.open = lambda url, *args, **kwargs: opened.append(url)
+    
+    # count threads started during the run
+    started = [0]
+    original_start = threading.Thread.start
+    def counting_start(thread):
+        started[0] += 1
+        original_start(thread)
+    threading.Thread.start = counting_start
+    
+    # a burst of the same thing (plus one new thing) while the second command is busy
+    def burst():
+        while 'tell me' not in nero.user_text:
+            time.sleep(0.01)
+        for text in ["repeat that", "Repeat that!", "repeat that", "and what's the date"]:
+            nero.inbox.put(text)
+    threading.Thread(target=burst, daemon=True).start()
+    
+    start = time.perf_counter()
+    nero.run()
+    threading.Thread.start = original_start
+    webbrowser.open = original_open
+    elapsed = time.perf_counter() - start
+    
+    # speech ends (worker goes idle) -> ear listening again
+    rearm = []
+    idle_at = None
+    for snap in snapshots:
+        if snap['worker'] == IDLE and idle_at is None:
+            idle_at = snap['time']
+        elif snap['worker'] != IDLE:
+            idle_at = None
+        if idle_at is not None and snap['ear'] == LISTENING:
+            rearm.append((snap['time'] - idle_at) * 1000)
+            idle_at = None
+    
+    print(f"session {elapsed:.1f}s, {len(nero.conversation)} messages, {len(snapshots)} state changes")
+    if rearm:
+        row = percentiles(rearm)
+        print(f"re-arm after speech: n={row['count']} p50 {row['p50']:.2f}ms p95 {row['p95']:.2f}ms")
+    print(f"threads started: {started[0] - 1} (besides the burst helper)")
+    print(f"browser opens (not actually opened): {opened}")
+    print(f"command queue: {nero.inbox.stats}, state machine: {nero.machine.stats}")
+    for message in nero.conversation:
+        print(f"  {message['role']:>4}: {message['text'][:70]}")
+
+
+if __name__ == "__main__":
+    main()
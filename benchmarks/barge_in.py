@@ -0,0 +1,202 @@
+"""
+Barge-in: how fast Nero shuts up when you talk over it, and what waiting for the mixer's
+end event saves over polling get_busy().
+
+    python -m benchmarks.barge_in
+
+Runs headless (dummy audio/video drivers). First it plays clips of a few lengths and
+measures how late each way of waiting notices the end (old 50ms/100ms polling vs
+Playback.wait). Then it feeds a synthetic mic recording through Ears while a long reply
+"plays": Nero's own voice leaking into the mic at normal speech level (should be ignored),
+then the user talking over it (should cut it off). Latency is from the user's first
+syllable in the recording to the channel going quiet.
+"""
+import os
+import time
+import random
+import tempfile
+import threading
+import argparse
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from config.settings import Config
+from modules.mic import WavSource
+from modules.ears import Ears
+from modules.stt import FakeSTT
+from modules.voice import Voice, Playback
+from utils.tracing import percentiles
+from benchmarks.wake import RATE, other_word, write_wav
+
+CLIPS = [0.35, 0.6, 0.9, 1.3, 1.7, 2.2]  # seconds
+TRIALS = 6
+# one trial, seconds from its start
+NERO_STARTS = 1.5  # mic closes, the reply starts playing
+LEAK = (1.7, 3.5)  # nero's voice coming back in through the mic
+USER_ONSET = 3.8
+REPLY_LENGTH = 4.0
+TRIAL_LENGTH = 7.0
+
+
+def silent_sound(seconds):
+    rate, size, channels = pygame.mixer.get_init()
+    return pygame.mixer.Sound(buffer=bytes(int(seconds * rate) * channels * abs(size) // 8))
+
+
+def pump(done):
+    """The main loop's job: hand the mixer's end events to Voice"""
+    while not done.is_set():
+        event = pygame.event.wait(10)
+        if event.type == Voice.END_EVENT:
+            Voice.on_mixer_event()
+
+
+def on_main_thread(work):
+    done = threading.Event()
+    result = []
+    
+    def run():
+        try:
+            result.append(work())
+        finally:
+            done.set()
+    
+    threading.Thread(target=run, daemon=True).start()
+    pump(done)
+    return result[0] if result else None
+
+
+def end_slack():
+    """How long after each clip really ended its waiter got back, ms"""
+    def poll(interval):
+        def wait(channel):
+            while channel.get_busy():
+                time.sleep(interval)
+        return wait
+    
+    def watch(channel, ended):
+        # the reference: a tight poll nobody would ship, to see when the channel really went quiet
+        while channel.get_busy():
+            time.sleep(0.0005)
+        ended.append(time.perf_counter())
+    
+    slack = {'poll 50ms (old stream)': [], 'poll 100ms (old file)': [], 'end event': []}
+    
+    def work():
+        for seconds in CLIPS:
+            for name in slack:
+                sound = silent_sound(seconds)
+                playback = Playback()
+                playback.add(sound)
+                ended = []
+                watcher = threading.Thread(target=watch, args=(playback.channel, ended))
+                watcher.start()
+                if name == 'end event':
+                    playback.wait()
+                else:
+                    poll(0.05 if '50' in name else 0.1)(playback.channel)
+                returned = time.perf_counter()
+                watcher.join()
+                slack[name].append((returned - ended[0]) * 1000)
+                playback.release()
+    
+    on_main_thread(work)
+    return slack
+
+
+def make_fixture(directory):
+    rng = random.Random(5)
+    samples = []
+    silence = lambda seconds: [rng.gauss(0, 80) for _ in range(int(seconds * RATE))]
+    for _ in range(TRIALS):
+        trial = silence(LEAK[0])
+        while len(trial) < LEAK[1] * RATE:
+            # the reply, quieter than someone at the mic but well past the normal threshold
+            trial += [s * 0.15 for s in other_word(rng)] + silence(0.08)
+        trial += silence(USER_ONSET - len(trial) / RATE)
+        for _ in range(3):
+            trial += other_word(rng) + silence(0.05)
+        trial += silence(TRIAL_LENGTH - len(trial) / RATE)
+        samples += trial
+    samples += silence(1.0)
+    path = os.path.join(directory, "barge_in.wav")
+    write_wav(path, samples)
+    return path
+
+
+def barge_in(wav):
+    source = WavSource(wav)
+    ears = Ears(source=source, backend=FakeSTT(["stop"] * TRIALS, latency=0.2))
+    mic_open = threading.Event()
+    mic_open.set()
+    barged, stopped, heard = [], [], []
+    
+    def on_barge_in():
+        barged.append(time.perf_counter())
+        Voice.interrupt()
+    
+    def ear():
+        while ears.stream is None or ears.stream.running:
+            text = ears.listen(mic_open=mic_open, on_barge_in=on_barge_in)
+            if text:
+                heard.append(text)
+    
+    def at(seconds):
+        while source.started is None:
+            time.sleep(0.001)
+        time.sleep(max(0.0, source.started + seconds - time.perf_counter()))
+    
+    def work():
+        ears.start()
+        threading.Thread(target=ear, daemon=True).start()
+        for trial in range(TRIALS):
+            origin = trial * TRIAL_LENGTH
+            at(origin + NERO_STARTS)
+            mic_open.clear()
+            playback = Playback()
+            playback.add(silent_sound(REPLY_LENGTH))
+            playback.wait()
+            stopped.append((playback.stopped, time.perf_counter() - (source.started + origin + USER_ONSET)))
+            playback.release()
+            mic_open.set()
+        # let the last "stop" finish being recognized
+        at(TRIALS * TRIAL_LENGTH)
+        time.sleep(0.5)
+        ears.close()
+    
+    on_main_thread(work)
+    return barged, stopped, heard
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.strip().splitlines()[0]).parse_args()
+    pygame.mixer.init()
+    pygame.display.init()
+    
+    print("end of playback noticed after (ms past the real end):")
+    for name, values in end_slack().items():
+        row = percentiles(values)
+        print(f"  {name:<24} p50 {row['p50']:6.1f}  p95 {row['p95']:6.1f}  max {max(values):6.1f}")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        wav = make_fixture(directory)
+        print(f"\nbarge-in over {TRIALS} replies (threshold x{Config.BARGE_IN_RATIO}, "
+              f"{Config.BARGE_IN_MIN_SPEECH * 1000:.0f}ms of speech):")
+        barged, stopped, heard = barge_in(wav)
+    
+    cut = [late * 1000 for interrupted, late in stopped if interrupted]
+    early = [late for interrupted, late in stopped if interrupted and late < 0]
+    print(f"  interrupted {len(cut)}/{TRIALS}, {len(early)} by the leaked reply, "
+          f"{len(barged)} barge-in events, heard {heard}")
+    if cut:
+        row = percentiles(cut)
+        print(f"  onset -> quiet: p50 {row['p50']:.0f}ms  p95 {row['p95']:.0f}ms  max {max(cut):.0f}ms")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
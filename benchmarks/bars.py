@@ -0,0 +1,77 @@
+"""
+Compares the old line + two circles bar drawing against the cached-geometry,
+sprite-batched version in CircularSpectrum._draw_bars().
+
+    python -m benchmarks.bars [frames]
+
+Runs headless on SDL's dummy driver so it works over ssh / in CI.
+"""
+import os
+import argparse
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from config.settings import Config
+from ui.visualizer import CircularSpectrum
+
+
+MODES = ("speaking", "listening", "thinking", "idle")
+
+
+def time_draw(visualizer, frames, batched, fade_every=None):
+    """Average ms per draw() for one path, physics runs outside the timed bit"""
+    visualizer.batched_draw = batched
+    # warm up so the geometry cache / cap sprites aren't in the numbers
+    for _ in range(30):
+        visualizer.update(1 / Config.FPS)
+        visualizer.draw()
+    
+    total = 0.0
+    for frame in range(frames):
+        if fade_every and frame % fade_every == 0:
+            # switching modes fades every bar's color, the worst case for the cap sprite cache
+            visualizer.set_mode(MODES[frame // fade_every % len(MODES)])
+        visualizer.update(1 / Config.FPS)
+        visualizer.screen.fill(Config.BG_COLOR)
+        start = time.perf_counter()
+        visualizer.draw()
+        total += time.perf_counter() - start
+    
+    return total / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('frames', type=int, default=600, nargs='?', help="frames to time per case")
+    args = parser.parse_args()
+    frames = args.frames
+    pygame.init()
+    screen = pygame.display.set_mode((Config.VISUALIZER_WIDTH, Config.HEIGHT))
+    
+    print(f"{'bars':>6} {'numpy':>6} {'legacy ms':>10} {'batched ms':>11} {'speedup':>8}")
+    for num_bars in (90, 256, 512):
+        for use_numpy in (True, False):
+            vis = CircularSpectrum(screen, Config.VISUALIZER_WIDTH // 2, Config.HEIGHT // 2,
+                                   num_bars=num_bars, use_numpy=use_numpy)
+            vis.set_mode("speaking")
+            legacy = time_draw(vis, frames, batched=False)
+            batched = time_draw(vis, frames, batched=True)
+            speedup = legacy / batched if batched else float('inf')
+            print(f"{num_bars:>6} {str(vis.use_numpy):>6} {legacy:>10.3f} {batched:>11.3f} {speedup:>7.2f}x")
+    
+    print(f"\nchanging mode every second ({frames} frames, 256 bars):")
+    vis = CircularSpectrum(screen, Config.VISUALIZER_WIDTH // 2, Config.HEIGHT // 2, num_bars=256)
+    legacy = time_draw(vis, frames, batched=False, fade_every=Config.FPS)
+    batched = time_draw(vis, frames, batched=True, fade_every=Config.FPS)
+    print(f"  legacy {legacy:.3f}ms  batched {batched:.3f}ms  {legacy / batched:.2f}x, "
+          f"{len(vis._cap_sprites)} cap sprites")
+    
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
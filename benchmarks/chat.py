@@ -0,0 +1,75 @@
+"""
+Chat panel cost with lots of long, word-wrapped messages.
+
+    python -m benchmarks.chat [frames]
+
+Draws the panel at the bottom and scrolled halfway back for a few history sizes, once
+with a cold layout cache and then warm. Only the visible bubbles get laid out, so the
+numbers should stay flat as the history grows.
+"""
+import os
+import argparse
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from config.settings import Config
+from ui.components import UIComponents
+from ui.chat_view import ChatView
+from benchmarks.frame import make_fonts
+
+LONG = ("Certainly, Sir. Here is a longer answer of the kind Gemini likes to give, with a few "
+        "sentences that need wrapping across several lines of the chat bubble, plus an "
+        "occasional unbreakablewordthatismuchtoolongtofitonasinglelineofthebubble. ")
+
+
+def make_long_conversation(count):
+    return [{'role': 'user' if i % 2 == 0 else 'nero',
+             'text': f"#{i} " + (LONG * (1 + i % 3) if i % 2 else "A short question?"),
+             'time': '12:00'} for i in range(count)]
+
+
+def time_draw(ui, conversation, view, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        ui.draw_chat_panel(conversation, view, "Ready")
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('frames', type=int, default=200, nargs='?', help="frames to time per case")
+    args = parser.parse_args()
+    frames = args.frames
+    
+    pygame.init()
+    screen = pygame.display.set_mode((Config.WIDTH, Config.HEIGHT))
+    fonts = make_fonts()
+    ui = UIComponents(screen, fonts)
+    
+    print(f"{'messages':>9} {'cold ms':>8} {'bottom ms':>10} {'scrolled ms':>12} {'scroll step us':>15}")
+    for count in (10, 100, 1000, 10000):
+        conversation = make_long_conversation(count)
+        view = ChatView(fonts)
+        cold = time_draw(ui, conversation, view, 1)
+        bottom = time_draw(ui, conversation, view, frames)
+        
+        # wheel halfway back through the history (a real user takes many notches)
+        start = time.perf_counter()
+        steps = 0
+        while view.anchor is None or view.anchor > count // 2:
+            view.scroll_by(conversation, 400)
+            steps += 1
+        step_us = (time.perf_counter() - start) / steps * 1e6
+        scrolled = time_draw(ui, conversation, view, frames)
+        print(f"{count:>9} {cold:>8.2f} {bottom:>10.3f} {scrolled:>12.3f} {step_us:>15.1f}")
+    
+    print(f"layout cache: {view.stats}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Local fast path for system commands: how many turns skip Gemini, and what it costs.
+
+    python -m benchmarks.commands
+
+Runs a labelled corpus through LocalCommands with fake tools, prints every miss,
+the share of turns handled locally, how spoken numbers come out and the parse time
+next to a stub model round trip.
+"""
+import time
+import argparse
+
+from core.commands import LocalCommands
+from benchmarks.stubs import StubBrain
+
+# (utterance, tool we expect to run locally or None for "gemini's job"[, the args it should get])
+CORPUS = [
+    ("set volume to 50", 'set_volume'),
+    ("set the volume to fifty five percent", 'set_volume'),
+    ("set volume to one hundred", 'set_volume'),
+    ("volume 30", 'set_volume'),
+    ("turn the volume up", 'adjust_volume'),
+    ("turn it down by 20 please", 'adjust_volume'),
+    ("a bit louder", 'adjust_volume'),
+    ("mute", 'mute_volume'),
+    ("nero unmute the sound", 'unmute_volume'),
+    ("next track", 'media_next'),
+    ("skip this song", 'media_next'),
+    ("next please", 'media_next'),
+    ("go back to the last song", 'media_prev'),
+    ("previous track please", 'media_prev'),
+    ("pause the music", 'media_play_pause'),
+    ("resume", 'media_play_pause'),
+    ("brightness 80", 'set_brightness'),
+    ("make the screen brighter", 'adjust_brightness'),
+    ("lower brightness by 30", 'adjust_brightness'),
+    ("turn it up by 20 percent", 'adjust_volume', {'change': 20}),
+    ("turn the volume up to 80", 'set_volume', {'level': 80}),
+    ("lower the volume to 20", 'set_volume', {'level': 20}),
+    ("reduce volume to thirty percent", 'set_volume', {'level': 30}),
+    ("turn up the brightness to 100", 'set_brightness', {'level': 100}),
+    ("turn the volume down to the minimum", 'set_volume', {'level': 0}),
+    ("check cpu usage", 'get_system_health'),
+    ("how's my ram", 'get_system_health'),
+    ("what's the volume of the pacific ocean", None),
+    ("why is my cpu so hot when i play games all night", None),
+    ("write me a poem about the sound of the sea and the next morning", None),
+    ("what's the volume", None),
+    ("what's next", None),
+    ("what is next", None),
+    ("what's the next song", None),
+    ("tell me more about the cpu", None),
+    ("tell me a joke", None),
+    ("who was the lead singer of the band that made the song back in black", None),
+    ("open spotify", None),
+]
+
+# spoken numbers the parser has to get right once the router passes on them
+NUMBERS = [
+    ("set volume to one hundred", 100), ("volume a hundred", 100), ("set the volume to fifty five", 55),
+    ("brightness two hundred", 100), ("set volume to one", 1), ("turn it up by twenty", 20),
+]
+
+
+class _Tools(dict):
+    """Every tool name resolves to something that just says what it did"""
+    def __missing__(self, name):
+        return lambda **args: f"Ran {name}"
+    
+    def __contains__(self, name):
+        return True
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.strip().splitlines()[0]).parse_args()
+    commands = LocalCommands(_Tools())
+    misses = 0
+    for text, expected, *args in CORPUS:
+        command = commands.parse(text)
+        reply = commands.handle(text)
+        got = command.tool if command and reply else None
+        if got != expected or (args and command.args != args[0]):
+            misses += 1
+            print(f"  miss: {text!r} -> {command} (wanted {expected})")
+    
+    summary = commands.summary()
+    print(f"{len(CORPUS) - misses}/{len(CORPUS)} routed as labelled")
+    print(f"local {summary['local']}/{summary['turns']} ({summary['local_fraction']:.0%}), "
+          f"low confidence {summary['low_confidence']}, no match {summary['no_match']}")
+    
+    print("\nspoken numbers:")
+    for text, expected in NUMBERS:
+        command = commands.parse(text)
+        got = next(iter(command.args.values())) if command else None
+        print(f"  {text!r:40} -> {got} {'ok' if got == expected else f'(wanted {expected})'}")
+    print()
+    
+    repeat = 2000
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text, *_ in CORPUS:
+            commands.parse(text)
+    parse_us = (time.perf_counter() - start) / (repeat * len(CORPUS)) * 1e6
+    
+    brain = StubBrain(reply="Volume set to 50%, Sir.")
+    start = time.perf_counter()
+    brain.think("set volume to 50")
+    model_s = time.perf_counter() - start
+    print(f"parse {parse_us:.1f}us per utterance vs {model_s:.2f}s for one stub model turn "
+          f"(a real Gemini turn with a tool call is two round trips)")
+
+
+if __name__ == "__main__":
+    main()
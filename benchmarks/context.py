@@ -0,0 +1,53 @@
+"""
+Request payload size over a long session, with and without the bounded context.
+
+    python -m benchmarks.context [turns]
+
+A StubChatSession records the estimated tokens of history each request would send.
+The stub summarizer takes a moment (like a real model call) and runs on ContextWindow's
+background thread, so the time trim() adds to a turn is measured too.
+"""
+import argparse
+import time
+
+from modules.context import ContextWindow
+from benchmarks.stubs import StubChatSession, StubContent
+
+
+def stub_summarize(prompt):
+    time.sleep(0.02)
+    words = prompt.split()
+    return " ".join(words[-120:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('turns', type=int, default=1000, nargs='?', help="length of the session")
+    args = parser.parse_args()
+    turns = args.turns
+    
+    unbounded = StubChatSession()
+    bounded = StubChatSession()
+    window = ContextWindow(stub_summarize, StubContent.of)
+    trim_times = []
+    for i in range(turns):
+        text = f"question number {i}, what do you think about that?"
+        unbounded.send_message(text)
+        bounded.send_message(text)
+        start = time.perf_counter()
+        window.trim(bounded)
+        trim_times.append(time.perf_counter() - start)
+    
+    print(f"{'turn':>6} {'unbounded tokens':>17} {'bounded tokens':>15}")
+    for turn in (1, 10, 50, 100, 250, 500, turns):
+        if turn <= turns:
+            print(f"{turn:>6} {unbounded.payloads[turn - 1]:>17} {bounded.payloads[turn - 1]:>15}")
+    tail = bounded.payloads[turns // 2:]
+    print(f"bounded, second half: min {min(tail)}, max {max(tail)} tokens")
+    trim_times.sort()
+    print(f"trim() p50 {trim_times[len(trim_times) // 2] * 1e6:.0f}us, max {trim_times[-1] * 1e3:.2f}ms, "
+          f"stats {window.stats}")
+
+
+if __name__ == "__main__":
+    main()
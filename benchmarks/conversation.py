@@ -0,0 +1,78 @@
+"""
+Conversation store at scale: memory and slice cost as the history grows to 1M messages.
+
+    python -m benchmarks.conversation [messages]
+
+Fills a throwaway SQLite file, then times the slice the chat panel asks for at the
+bottom (ring buffer) and deep in the history (paged from disk), next to a plain list.
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+from core.conversation import ConversationStore
+
+VISIBLE = 12
+
+
+def store_kb(store):
+    """What the store itself holds in memory: the ring buffer plus cached pages"""
+    messages = list(store.recent) + [m for page in store.pages.values() for m in page]
+    size = sys.getsizeof(store.recent) + sys.getsizeof(store.pages)
+    size += sum(sys.getsizeof(m) + sys.getsizeof(m['text']) for m in messages)
+    return size / 1024
+
+
+def time_slices(conversation, starts, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for first in starts:
+            conversation[first:first + VISIBLE]
+    return (time.perf_counter() - start) / (repeat * len(starts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('messages', type=int, default=1_000_000, nargs='?', help="how big the history gets")
+    args = parser.parse_args()
+    total = args.messages
+    checkpoints = sorted({n for n in (1_000, 10_000, 100_000, total) if n <= total})
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ConversationStore(os.path.join(tmp, 'chat.db'))
+        text = "Certainly, Sir. Here is a reasonably long reply so the rows aren't trivially small. " * 2
+        
+        print(f"{'messages':>9} {'insert/s':>9} {'store KB':>9} {'bottom us':>10} {'deep us':>8} "
+              f"{'scrollback us':>14} {'list bottom us':>15}")
+        done = 0
+        for checkpoint in checkpoints:
+            start = time.perf_counter()
+            before = done
+            while done < checkpoint:
+                store.append('user' if done % 2 else 'nero', text, commit=False)
+                done += 1
+                if done % 10_000 == 0:
+                    store.commit()
+            store.commit()
+            rate = (done - before) / (time.perf_counter() - start)
+            bottom = time_slices(store, [checkpoint - VISIBLE])
+            # the same few screens deep in the history (page cache hits after the first)
+            deep = time_slices(store, [checkpoint // 2 + i * VISIBLE for i in range(4)])
+            # scrolling back a screen at a time through fresh pages
+            scrollback = time_slices(store, [checkpoint // 3 - i * VISIBLE for i in range(200)], repeat=1)
+            
+            plain = [{'role': 'nero', 'text': text, 'time': '12:00'}] * checkpoint
+            list_bottom = time_slices(plain, [checkpoint - VISIBLE])
+            del plain
+            memory = store_kb(store)
+            print(f"{checkpoint:>9} {rate:>9.0f} {memory:>9.0f} {bottom:>10.2f} {deep:>8.2f} "
+                  f"{scrollback:>14.2f} {list_bottom:>15.2f}")
+        
+        print(f"stats: {store.stats}, db {os.path.getsize(os.path.join(tmp, 'chat.db')) / 1e6:.0f} MB")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
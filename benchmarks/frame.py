@@ -0,0 +1,96 @@
+"""
+Frame time of the old "redraw everything + flip" loop vs the layered compositor.
+
+    python -m benchmarks.frame [frames] [messages]
+
+Headless on SDL's dummy driver. The mouse sits still and the chat doesn't change,
+which is what the app is doing most of the time.
+"""
+import os
+import argparse
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from config.settings import Config
+from ui.visualizer import CircularSpectrum
+from ui.components import UIComponents
+from ui.compositor import Compositor
+from ui.chat_view import ChatView
+from ui.text_cache import shared_text_cache
+
+
+def make_fonts():
+    # same set NeroAI loads
+    return {
+        'title_bar': pygame.font.Font(None, 18),
+        'btn': pygame.font.Font(None, 22),
+        'chat': pygame.font.Font(None, 22),
+        'chat_small': pygame.font.Font(None, 18),
+        'chat_header': pygame.font.Font(None, 26)
+    }
+
+
+def make_conversation(count):
+    return [{'role': 'user' if i % 2 == 0 else 'nero',
+             'text': f"Message number {i} with a bit of text so it gets cut off at some point",
+             'time': '12:00'} for i in range(count)]
+
+
+def run_frames(frames, draw):
+    total = 0.0
+    for _ in range(frames):
+        start = time.perf_counter()
+        draw()
+        total += time.perf_counter() - start
+    return total / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('frames', type=int, default=600, nargs='?', help="frames to time per loop")
+    parser.add_argument('messages', type=int, default=12, nargs='?', help="chat messages on screen")
+    args = parser.parse_args()
+    frames, count = args.frames, args.messages
+    
+    pygame.init()
+    screen = pygame.display.set_mode((Config.WIDTH, Config.HEIGHT))
+    fonts = make_fonts()
+    center_y = Config.TITLE_BAR_HEIGHT + (Config.HEIGHT - Config.TITLE_BAR_HEIGHT) // 2
+    visualizer = CircularSpectrum(screen, Config.VISUALIZER_WIDTH // 2, center_y)
+    visualizer.set_mode("speaking")
+    ui = UIComponents(screen, fonts)
+    compositor = Compositor(ui)
+    conversation = make_conversation(count)
+    view = ChatView(fonts)
+    mouse = (10, 300)
+    
+    def legacy():
+        visualizer.update(1 / Config.FPS)
+        screen.fill(Config.BG_COLOR)
+        visualizer.draw()
+        ui.draw_title_bar(mouse)
+        ui.draw_chat_panel(conversation, view, "Speaking...")
+        pygame.display.flip()
+    
+    def layered():
+        visualizer.update(1 / Config.FPS)
+        compositor.render(screen, visualizer, mouse, conversation, view, "Speaking...", True)
+    
+    old = run_frames(frames, legacy)
+    new = run_frames(frames, layered)
+    print(f"{'path':>10} {'ms/frame':>9}")
+    print(f"{'full':>10} {old:>9.3f}")
+    print(f"{'layered':>10} {new:>9.3f}")
+    print(f"speedup {old / new:.2f}x")
+    stats = shared_text_cache.stats()
+    print(f"text cache: {stats['hit_rate']:.1%} hits, {stats['items']} surfaces, {stats['bytes'] / 1024:.0f} KB")
+    
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+CPU use of the main loop per app state with the frame-rate governor on.
+
+    python -m benchmarks.governor [seconds per state]
+
+Headless on SDL's dummy driver, runs the same wait/update/render steps as NeroAI.run().
+"""
+import os
+import argparse
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from config.settings import Config
+from core.governor import FrameGovernor
+from ui.visualizer import CircularSpectrum
+from ui.components import UIComponents
+from ui.compositor import Compositor
+from ui.chat_view import ChatView
+from benchmarks.frame import make_fonts, make_conversation
+
+# (label, visualizer mode, focused, minimized)
+STATES = [
+    ("speaking", "speaking", True, False),
+    ("thinking", "thinking", True, False),
+    ("listening", "listening", True, False),
+    ("idle", "idle", True, False),
+    ("background", "idle", False, False),
+    ("minimized", "idle", True, True),
+]
+
+
+def measure(seconds, governor, visualizer, compositor, screen, conversation, view):
+    frames = 0
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    while time.perf_counter() - wall_start < seconds:
+        fps = governor.target_fps(visualizer.mode)
+        _, dt = governor.wait(fps)
+        visualizer.update(dt)
+        if not governor.minimized:
+            compositor.render(screen, visualizer, (0, 0), conversation, view, "Ready", True)
+        frames += 1
+    wall = time.perf_counter() - wall_start
+    return frames / wall, (time.process_time() - cpu_start) / wall * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('seconds', type=float, default=3, nargs='?', help="seconds per state")
+    args = parser.parse_args()
+    seconds = args.seconds
+    
+    pygame.init()
+    screen = pygame.display.set_mode((Config.WIDTH, Config.HEIGHT))
+    center_y = Config.TITLE_BAR_HEIGHT + (Config.HEIGHT - Config.TITLE_BAR_HEIGHT) // 2
+    visualizer = CircularSpectrum(screen, Config.VISUALIZER_WIDTH // 2, center_y)
+    fonts = make_fonts()
+    compositor = Compositor(UIComponents(screen, fonts))
+    conversation = make_conversation(12)
+    view = ChatView(fonts)
+    
+    print(f"{'state':>11} {'fps':>6} {'cpu %':>6}")
+    for adaptive in (False, True):
+        Config.ADAPTIVE_FPS = adaptive
+        print("adaptive" if adaptive else "fixed 60")
+        for label, mode, focused, minimized in STATES:
+            governor = FrameGovernor()
+            governor.focused = focused
+            governor.minimized = minimized
+            visualizer.set_mode(mode)
+            fps, cpu = measure(seconds, governor, visualizer, compositor, screen, conversation, view)
+            print(f"{label:>11} {fps:>6.1f} {cpu:>6.1f}")
+    
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
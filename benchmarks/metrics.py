@@ -0,0 +1,69 @@
+"""
+Background metrics sampler: what it costs to run, and what the health tool says from it.
+
+    python -m benchmarks.metrics [seconds]
+
+Runs the sampler at a fast interval for a while (default 10s) next to a child process that
+pegs a core and holds ~300 MB, then prints its CPU cost per sample and per process walk,
+what that comes to at the configured interval, how long a health answer takes from the
+buffers against the old cpu_percent() call, and the answer itself.
+"""
+import sys
+import time
+import subprocess
+import argparse
+
+import psutil
+
+from config.settings import Config
+from modules.metrics import MetricsSampler
+from utils.tracing import percentiles
+
+HOG = "import time\nblock = bytearray(300 * 1024 * 1024)\nend = time.time() + {seconds}\nwhile time.time() < end: pass\n"
+INTERVAL = 0.1
+
+
+def timed(call, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('seconds', type=float, default=10.0, nargs='?', help="how long to sample for")
+    args = parser.parse_args()
+    seconds = args.seconds
+    # short enough to show up in a short run
+    Config.METRICS_MIN_TREND = min(Config.METRICS_MIN_TREND, seconds / 2)
+    hog = subprocess.Popen([sys.executable, "-c", HOG.format(seconds=seconds + 2)])
+    sampler = MetricsSampler(interval=INTERVAL).start()
+    time.sleep(seconds)
+    sampler.stop()
+    hog.kill()
+    
+    stats = sampler.overhead()
+    walk_every = Config.METRICS_PROCESS_EVERY
+    plain = (stats['ms_per_sample'] * walk_every - stats['ms_per_walk']) / walk_every
+    print(f"{stats['samples']} samples at {INTERVAL * 1000:.0f}ms, {stats['walks']} process walks "
+          f"({len(psutil.pids())} processes, {psutil.cpu_count()} cores)")
+    print(f"  cpu per sample: {plain:.3f}ms without the walk, {stats['ms_per_walk']:.2f}ms per walk, "
+          f"{stats['ms_per_sample']:.3f}ms averaged")
+    print(f"  at the configured {Config.METRICS_INTERVAL}s interval: "
+          f"{stats['ms_per_sample'] / Config.METRICS_INTERVAL / 10:.4f}% of one core")
+    buffers = len(sampler.series) + len(sampler.cores) + 1
+    print(f"  {buffers} ring buffers x {Config.METRICS_HISTORY} samples = "
+          f"{buffers * Config.METRICS_HISTORY * 8 / 1024:.0f} KB at the configured history")
+    
+    health, report = timed(sampler.health, 200)
+    old, _ = timed(lambda: psutil.cpu_percent(interval=None), 200)
+    print(f"\nhealth answer from the buffers: p50 {health['p50']:.3f}ms  p95 {health['p95']:.3f}ms")
+    print(f"old cpu_percent(interval=None): p50 {old['p50']:.3f}ms (and only covers the gap since the last call)")
+    print(f"\n{report}")
+
+
+if __name__ == "__main__":
+    main()
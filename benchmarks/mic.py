@@ -0,0 +1,95 @@
+"""
+Start-of-speech detection on the persistent capture stream, fed from a wav file.
+
+    python -m benchmarks.mic [wav file]
+
+Without a file it writes a synthetic one: room noise that gets louder halfway through,
+with bursts of "speech" at known times. Prints when each utterance was detected vs when
+it really started (stream time and wall clock at real-time pace), and whether the
+pre-roll reached back far enough to keep the first syllable.
+"""
+import os
+import argparse
+import math
+import time
+import wave
+import random
+import struct
+import tempfile
+
+from modules.mic import WavSource, CaptureStream
+from utils.tracing import percentiles
+
+ONSETS = [1.0, 3.2, 5.5, 8.0, 10.4, 12.9]  # seconds, each burst lasts 1.2s
+NOISE_STEP = 7.0  # room noise quadruples from here on
+
+
+def write_wav(path, seconds=15.0, rate=16000):
+    rng = random.Random(7)
+    samples = []
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        value = rng.gauss(0, 60 if t < NOISE_STEP else 240)
+        for onset in ONSETS:
+            if onset <= t < onset + 1.2:
+                # a couple of "syllables" of voiced sound
+                envelope = abs(math.sin(math.pi * (t - onset) / 0.4))
+                value += 4000 * envelope * math.sin(2 * math.pi * 180 * t) + 1500 * math.sin(2 * math.pi * 410 * t)
+        samples.append(max(-32768, min(32767, int(value))))
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+
+
+def run(path, realtime):
+    source = WavSource(path, realtime=realtime)
+    stream = CaptureStream(source).start()
+    heard = []
+    while True:
+        kind, value = stream.events.get()
+        if kind == 'speech' and realtime:
+            # wall clock from the onset being handed over to us knowing about it
+            heard.append((value, time.perf_counter() - (source.started + value)))
+        elif kind == 'utterance':
+            heard.append(value)
+        elif kind == 'closed':
+            break
+    return stream, heard
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('wav', nargs='?', help="a recording to run instead of the synthetic one")
+    args = parser.parse_args()
+    if args.wav:
+        path, known = args.wav, None
+    else:
+        path, known = os.path.join(tempfile.gettempdir(), "nero_mic_bench.wav"), ONSETS
+        write_wav(path)
+    
+    stream, heard = run(path, realtime=False)
+    utterances = [item for item in heard if not isinstance(item, tuple)]
+    print(f"{len(utterances)} utterances, noise floor ended at {stream.noise_floor:.0f} "
+          f"(threshold {stream.threshold():.0f}), chunk {stream.chunk_seconds * 1000:.0f}ms")
+    print(f"{'onset s':>8} {'start s':>8} {'detected s':>11} {'latency ms':>11} {'length s':>9}")
+    for i, utterance in enumerate(utterances):
+        onset = known[i] if known and i < len(known) else float('nan')
+        latency = (utterance.detected - onset) * 1000
+        print(f"{onset:>8.2f} {utterance.start:>8.2f} {utterance.detected:>11.2f} {latency:>11.0f} "
+              f"{utterance.duration:>9.2f}")
+    if known:
+        kept = sum(1 for u, onset in zip(utterances, known) if u.start <= onset)
+        print(f"pre-roll reaches back past the real onset: {kept}/{len(known)}")
+    
+    _, heard = run(path, realtime=True)
+    wall = [delay * 1000 for item in heard if isinstance(item, tuple) for _, delay in [item]]
+    if wall:
+        row = percentiles(wall)
+        print(f"real time, onset -> 'speech' event: p50 {row['p50']:.0f}ms p95 {row['p95']:.0f}ms "
+              f"(the old listen() spent {0.3 * 1000:.0f}ms calibrating before it heard anything)")
+
+
+if __name__ == "__main__":
+    main()
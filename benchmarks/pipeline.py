@@ -0,0 +1,59 @@
+"""
+Perceived latency of "think, then speak" vs the sentence-pipelined path.
+
+    python -m benchmarks.pipeline [tokens per second]
+
+StubBrain emits tokens at a fixed rate and StubCommunicate stands in for edge tts,
+so this measures the pipeline itself rather than the network.
+"""
+import os
+import argparse
+import time
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from config.settings import Config
+from modules.voice import Voice
+from modules.pipeline import sentences_from_stream
+from benchmarks.stubs import StubBrain, StubCommunicate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('rate', type=float, default=40, nargs='?', help="tokens per second from the stub model")
+    args = parser.parse_args()
+    rate = args.rate
+    
+    pygame.mixer.init()
+    Config.TTS_STREAMING = True
+    Voice.communicate_factory = StubCommunicate.factory(first_delay=0.3, chunk_delay=0.02)
+    brain = StubBrain(tokens_per_second=rate)
+    
+    # old way: whole reply first, then the whole thing through tts
+    start = time.perf_counter()
+    reply = brain.think("what's the weather like")
+    think_time = time.perf_counter() - start
+    Voice.speak(reply)
+    first_sequential = think_time + Voice.last_timing['time_to_first_audio']
+    
+    # pipelined: sentences go to tts as soon as they're complete
+    start = time.perf_counter()
+    arrivals = []
+    sentences = sentences_from_stream(brain.think_stream("what's the weather like"),
+                                      on_text=lambda chunk: arrivals.append(time.perf_counter() - start))
+    Voice.speak_sentences(sentences)
+    first_pipelined = Voice.last_timing['time_to_first_audio']
+    
+    print(f"tokens/s: {rate:g}, first text after {arrivals[0]:.3f}s, last after {arrivals[-1]:.3f}s")
+    print(f"{'path':>10} {'first audio s':>14}")
+    print(f"{'sequential':>10} {first_sequential:>14.3f}")
+    print(f"{'pipelined':>10} {first_pipelined:>14.3f}")
+    
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Headless render benchmark. Builds NeroAI with stand-in brain/ears/voice on SDL's dummy
+driver, then drives every visualizer mode against a few chat sizes and times each stage
+of a frame (update, draw bars, title bar, chat panel, flip) plus the layered compositor.
+
+    python -m benchmarks.render [--frames N] [--bars N] [--out results.json | --out -]
+
+--out writes machine readable JSON so runs can be diffed between releases.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from config.settings import Config
+from core.app import NeroAI
+from ui.visualizer import np
+from benchmarks.stubs import StubBrain, StubEars, StubVoice
+from benchmarks.frame import make_conversation
+
+MODES = ["idle", "listening", "speaking", "thinking"]
+CHAT_SIZES = [0, 12, 1000]
+STAGES = ["update", "draw_bars", "title_bar", "chat_panel", "flip", "frame", "composited"]
+
+
+def percentiles(samples):
+    """p50/p95/p99 (nearest rank) and mean, in milliseconds"""
+    ordered = sorted(samples)
+    
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+    
+    return {
+        'p50': pick(50),
+        'p95': pick(95),
+        'p99': pick(99),
+        'mean': sum(ordered) / len(ordered) * 1000,
+    }
+
+
+def bench_case(nero, mode, messages, frames):
+    """Times every stage of `frames` frames for one mode / chat size"""
+    nero.conversation = make_conversation(messages)
+    nero.chat_view.scroll_to_bottom()
+    nero.visualizer.set_mode(mode)
+    nero.status = {"idle": "Ready", "listening": "Listening...",
+                   "speaking": "Speaking...", "thinking": "Thinking..."}[mode]
+    dt = 1 / Config.FPS
+    screen = nero.screen
+    samples = {stage: [] for stage in STAGES}
+    
+    # the old way, one stage at a time
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        nero.visualizer.update(dt)
+        t1 = time.perf_counter()
+        screen.fill(Config.BG_COLOR)
+        nero.visualizer.draw()
+        t2 = time.perf_counter()
+        nero.ui.draw_title_bar(nero.mouse_pos)
+        t3 = time.perf_counter()
+        nero.ui.draw_chat_panel(nero.conversation, nero.chat_view, nero.status)
+        t4 = time.perf_counter()
+        pygame.display.flip()
+        t5 = time.perf_counter()
+        for stage, value in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4, t5 - t0)):
+            samples[stage].append(value)
+    
+    # what NeroAI.run() actually does now (cached layers + dirty rects)
+    nero.compositor.invalidate()
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        nero.visualizer.update(dt)
+        nero.compositor.render(screen, nero.visualizer, nero.mouse_pos, nero.conversation,
+                               nero.chat_view, nero.status, nero.chat_visible)
+        samples['composited'].append(time.perf_counter() - t0)
+    
+    return {stage: percentiles(values) for stage, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--bars', type=int, default=Config.VISUALIZER_BARS)
+    parser.add_argument('--out', help="write JSON here ('-' for stdout)")
+    args = parser.parse_args()
+    
+    Config.VISUALIZER_BARS = args.bars
+    Config.CHAT_DB = ':memory:'  # keep benchmark chatter out of the real history
+    nero = NeroAI(brain=StubBrain(), ears=StubEars(), voice=StubVoice)
+    
+    results = []
+    for mode in MODES:
+        for messages in CHAT_SIZES:
+            results.append({
+                'mode': mode,
+                'messages': messages,
+                'stages': bench_case(nero, mode, messages, args.frames),
+            })
+    
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'sdl': ".".join(map(str, pygame.get_sdl_version())),
+            'numpy': np.__version__ if np is not None else None,
+            'platform': platform.platform(),
+            'video_driver': pygame.display.get_driver(),
+            'frames': args.frames,
+            'bars': nero.visualizer.num_bars,
+            'numpy_physics': nero.visualizer.use_numpy,
+            'batched_draw': nero.visualizer.batched_draw,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    pygame.quit()
+    
+    if args.out == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    print(f"{'mode':>10} {'msgs':>5} " + " ".join(f"{stage:>12}" for stage in STAGES))
+    print(f"{'':>10} {'':>5} " + " ".join(f"{'p50/p99 ms':>12}" for _ in STAGES))
+    for row in results:
+        cells = [f"{row['stages'][s]['p50']:.2f}/{row['stages'][s]['p99']:.2f}" for s in STAGES]
+        print(f"{row['mode']:>10} {row['messages']:>5} " + " ".join(f"{c:>12}" for c in cells))
+
+
+if __name__ == "__main__":
+    main()
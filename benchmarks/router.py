@@ -0,0 +1,112 @@
+"""
+Intent routing: the old substring if-chain vs the compiled router.
+
+    python -m benchmarks.router [extra intents]
+
+Runs a corpus of utterances through both, shows where they disagree (substring
+false positives like "display" -> play), how routing cost grows as intents are added,
+and the conflict report for the real command table.
+"""
+import os
+import argparse
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from core.app import NeroAI
+from core.router import Intent, IntentRouter
+
+CORPUS = [
+    "goodbye nero", "bye", "ok that's all, exit", "quit", "play despacito", "can you play lo-fi beats",
+    "what time is it", "hey nero what time is it right now", "open youtube", "open up github for me",
+    "please open google", "what's the weather like in tokyo", "tell me a joke",
+    "how much battery do i have left", "set the volume to 40", "open spotify",
+    "display the cpu usage", "who wrote the byebye song", "is it timely to go",
+    "open the door to the playground", "google something for me", "screenshot please",
+    "what's on my screen", "mute", "lock the computer", "what is the meaning of life",
+    "search youtube for cats", "tell me about the exit strategy of the roman empire",
+    "play", "what time does the store open on sunday", "set volume to one hundred",
+]
+
+
+class _Handlers:
+    """Stand-in for the app, every handler is a no-op"""
+    def __getattr__(self, name):
+        return lambda text, slots: None
+
+
+def legacy_route(text):
+    """The if-chain process_command used to have"""
+    if any(w in text for w in ['goodbye', 'bye', 'exit', 'quit']):
+        return 'goodbye'
+    if 'play ' in text:
+        return 'play'
+    if any(w in text for w in ['what time', 'time is it']):
+        return 'time'
+    for site in NeroAI.SITES:
+        if site in text and 'open' in text:
+            return 'open_site'
+    return 'brain'
+
+
+def legacy_route_with(extra):
+    """The if-chain with `extra` more substring checks in front of the brain fallback"""
+    def route(text):
+        intent = legacy_route(text)
+        if intent != 'brain':
+            return intent
+        for name, phrase in extra:
+            if phrase in text:
+                return name
+        return 'brain'
+    return route
+
+
+def extra_intents(count):
+    return [(f"extra_{i}", f"zz{i} command {i}") for i in range(count)]
+
+
+def time_per_call(fn, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in CORPUS:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(CORPUS)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('extra', type=int, default=500, nargs='?', help="most made-up intents to add for the scaling run")
+    args = parser.parse_args()
+    extra_max = args.extra
+    router = NeroAI.build_router(_Handlers())
+    
+    def compiled(r):
+        return lambda text: (lambda m: m.intent.name if m else 'brain')(r.match(text))
+    
+    print("disagreements (old -> new):")
+    for text in CORPUS:
+        old, new = legacy_route(text), compiled(router)(text)
+        if old != new:
+            print(f"  {text!r:48} {old:>10} -> {new}")
+    
+    print(f"\n{'intents':>8} {'if-chain us':>12} {'router us':>10}")
+    for count in (0, 50, extra_max):
+        extra = extra_intents(count)
+        r = NeroAI.build_router(_Handlers())
+        for name, phrase in extra:
+            r.add(Intent(name, [phrase], None))
+        r.match("")  # compile outside the timing
+        print(f"{4 + count:>8} {time_per_call(legacy_route_with(extra)):>12.2f} {time_per_call(compiled(r)):>10.2f}")
+    
+    print("\nconflicts:")
+    for conflict in router.conflicts():
+        winner = conflict['winner'] or "tie (earliest in the sentence)"
+        print(f"  {conflict['a']} vs {conflict['b']} -> {winner}")
+    if not router.conflicts():
+        print("  none")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Speculating on partial transcripts: hit rate and how much sooner the reply starts.
+
+    python -m benchmarks.speculation
+
+Plays a scripted session through NeroAI headless: a wav fixture at real-time pace into
+Ears, FakeSTT streaming partials (one line where the final text differs from what the
+partials said), StubBrain/StubVoice for the rest. Runs it with speculation off and on and
+prints the time from the end of each utterance to the first words of the reply.
+"""
+import os
+import time
+import random
+import tempfile
+import argparse
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from config.settings import Config
+from core.app import NeroAI
+from modules.ears import Ears
+from modules.mic import WavSource
+from modules.stt import FakeSTT
+from utils.tracing import percentiles
+from benchmarks.stubs import StubBrain, StubVoice
+from benchmarks.wake import RATE, other_word, write_wav
+
+LINES = ["tell me a joke about robots", "what time is it", "who wrote the odyssey",
+         "what is the capital of australia -> what is the capital of austria",
+         "how far away is the moon", "recommend a good book", "goodbye"]
+GAP = 4.0  # seconds between utterances, enough for nero to answer in between
+
+
+def make_fixture(directory):
+    rng = random.Random(11)
+    os.makedirs(directory, exist_ok=True)
+    samples, ends = [], []
+    silence = lambda seconds: [rng.gauss(0, 80) for _ in range(int(seconds * RATE))]
+    for line in LINES:
+        samples += silence(GAP)
+        for _ in line.partition("->")[0].split():
+            samples += other_word(rng) + silence(0.05)
+        ends.append(len(samples) / RATE)
+    samples += silence(GAP)
+    wav = os.path.join(directory, "fixture.wav")
+    write_wav(wav, samples)
+    return wav, ends
+
+
+def run(wav, ends, speculation):
+    Config.SPECULATION = speculation
+    source = WavSource(wav)
+    ears = Ears(source=source, backend=FakeSTT(LINES, latency=0.3))
+    nero = NeroAI(brain=StubBrain(tokens_per_second=100, first_token_delay=0.8), ears=ears, voice=StubVoice)
+    
+    # first words of each reply, as the main loop sees them
+    replies = []
+    post = nero.events.post
+    def recording_post(kind, *args):
+        if kind == 'reply_text' and (not replies or replies[-1][0] != nero.user_text):
+            replies.append((nero.user_text, time.perf_counter()))
+        elif kind == 'message' and args[0] == 'nero' and args[1] and nero.user_text:
+            replies.append((nero.user_text, time.perf_counter()))
+        post(kind, *args)
+    nero.events.post = recording_post
+    ears.start()
+    nero.run()
+    
+    finals = [line.partition("->")[2].strip() or line for line in LINES]
+    delays = []
+    for text, at in replies:
+        if text in finals:
+            delays.append((at - (source.started + ends[finals.index(text)])) * 1000)
+    return delays, nero.speculator.summary() if nero.speculator else None
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.strip().splitlines()[0]).parse_args()
+    Config.CHAT_DB = ':memory:'
+    Config.TRACING = False
+    StubVoice.seconds_per_char = 0.005
+    wav, ends = make_fixture(os.path.join(tempfile.gettempdir(), "nero_speculation_bench"))
+    print(f"{len(LINES)} utterances, {Config.VAD_SILENCE}s end-of-speech silence, 300ms STT latency, "
+          f"800ms to gemini's first token, stable after {Config.SPECULATE_STABLE}s")
+    for speculation in (False, True):
+        delays, summary = run(wav, ends, speculation)
+        row = percentiles(delays)
+        print(f"speculation {'on ' if speculation else 'off'}: end of speech -> reply starts "
+              f"p50 {row['p50']:.0f}ms p95 {row['p95']:.0f}ms ({row['count']} replies)")
+        if summary:
+            print(f"  {summary['hits']} hits, {summary['misses']} misses, {summary['superseded']} superseded "
+                  f"({summary['hit_rate']:.0%}), by kind {summary['hits_by_kind']}, "
+                  f"{summary['saved_ms']:.0f}ms head start on average")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+When the words show up: batch vs streaming recognition, offline.
+
+    python -m benchmarks.stt
+
+Writes a wav + transcript fixture (one synthetic "word" per word of each line), plays it
+through Ears at real-time pace with FakeSTT as the backend, once batch and once streaming,
+and prints how long after each utterance started the first words were known, and how long
+after it ended the final text came back.
+"""
+import os
+import time
+import random
+import tempfile
+import argparse
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from config.settings import Config
+from modules.ears import Ears
+from modules.mic import WavSource
+from modules.stt import FakeSTT
+from utils.tracing import percentiles
+from benchmarks.wake import RATE, other_word, write_wav
+
+LINES = ["what time is it", "open youtube", "tell me a joke about robots",
+         "turn the volume up please", "what is the weather like in london today"]
+
+
+def make_fixture(directory):
+    rng = random.Random(5)
+    os.makedirs(directory, exist_ok=True)
+    samples, spans = [], []
+    silence = lambda seconds: [rng.gauss(0, 80) for _ in range(int(seconds * RATE))]
+    for line in LINES:
+        samples += silence(1.5)
+        start = len(samples) / RATE
+        for _ in line.split():
+            samples += other_word(rng) + silence(0.05)
+        spans.append((start, len(samples) / RATE))
+    samples += silence(2.0)
+    wav = os.path.join(directory, "fixture.wav")
+    write_wav(wav, samples)
+    transcript = os.path.join(directory, "fixture.txt")
+    with open(transcript, 'w', encoding='utf-8') as f:
+        f.write("\n".join(LINES) + "\n")
+    return wav, transcript, spans
+
+
+def run(wav, transcript, spans, streaming):
+    source = WavSource(wav)
+    ears = Ears(source=source, backend=FakeSTT.from_file(transcript, streaming=streaming, latency=0.3))
+    ears.start()
+    first, final, texts = [], [], []
+    for start, end in spans:
+        heard = []
+        text = ears.listen(on_partial=lambda partial: heard.append(time.perf_counter()))
+        now = time.perf_counter()
+        # first words: the first partial if there was one, otherwise the final text
+        first.append(((heard[0] if heard else now) - (source.started + start)) * 1000)
+        final.append((now - (source.started + end)) * 1000)
+        texts.append(text)
+    ears.close()
+    return first, final, texts
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.strip().splitlines()[0]).parse_args()
+    wav, transcript, spans = make_fixture(os.path.join(tempfile.gettempdir(), "nero_stt_bench"))
+    print(f"{len(spans)} utterances, {Config.VAD_SILENCE}s end-of-speech silence, 300ms fake recognition latency")
+    print(f"{'mode':>9} {'first words p50':>16} {'p95':>7} {'final p50':>10} {'p95':>7}  right")
+    for streaming in (False, True):
+        first, final, texts = run(wav, transcript, spans, streaming)
+        a, b = percentiles(first), percentiles(final)
+        right = sum(text == line for text, line in zip(texts, LINES))
+        print(f"{'streaming' if streaming else 'batch':>9} {a['p50']:>14.0f}ms {a['p95']:>5.0f}ms "
+              f"{b['p50']:>8.0f}ms {b['p95']:>5.0f}ms  {right}/{len(LINES)}")
+
+
+if __name__ == "__main__":
+    main()
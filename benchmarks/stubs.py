@@ -0,0 +1,218 @@
+"""
+Local stand-ins for the network bits so the benchmarks run offline.
+"""
+import asyncio
+import time
+import threading
+
+from modules.context import estimate_tokens
+from modules.prefetch import Prefetch
+
+
+def silent_mp3(seconds):
+    """Builds valid (silent) MPEG2 layer III frames, the same format edge tts streams"""
+    # 24kHz mono 48kbps -> 144 byte frames of 576 samples, all-zero side info decodes to silence
+    frame = bytes([0xFF, 0xF3, 0x64, 0xC0]) + bytes(140)
+    return frame * max(1, int(seconds * 24000 / 576))
+
+
+class StubCommunicate:
+    """
+    Pretends to be edge_tts.Communicate. Yields the mp3 in chunks with a delay before the
+    first one (connection + synthesis) and between the rest (network pacing).
+    """
+    def __init__(self, text, voice=None, rate=None, volume=None, pitch=None,
+                 mp3=None, chunk_size=4096, first_delay=0.4, chunk_delay=0.05):
+        self.text = text
+        # roughly 15 characters per second of speech
+        self.mp3 = mp3 if mp3 is not None else silent_mp3(max(1.0, len(text) / 15))
+        self.chunk_size = chunk_size
+        self.first_delay = first_delay
+        self.chunk_delay = chunk_delay
+    
+    @classmethod
+    def factory(cls, **kwargs):
+        """Voice.communicate_factory that passes our knobs along"""
+        return lambda **tts_kwargs: cls(**tts_kwargs, **kwargs)
+    
+    async def stream(self):
+        await asyncio.sleep(self.first_delay)
+        for i in range(0, len(self.mp3), self.chunk_size):
+            if i:
+                await asyncio.sleep(self.chunk_delay)
+            yield {"type": "audio", "data": self.mp3[i:i + self.chunk_size]}
+    
+    async def save(self, path):
+        with open(path, 'wb') as f:
+            async for chunk in self.stream():
+                f.write(chunk["data"])
+
+
+class StubBrain:
+    """
+    Pretends to be Brain. Emits the reply a few characters at a time at a fixed token rate,
+    so think() costs the whole reply and think_stream() hands out pieces as they're "generated".
+    """
+    FALLBACK_REPLY = "I'm having trouble connecting to my neural network, Sir."
+    REPLY = ("Certainly, Sir. The weather today looks clear with a high of twenty degrees. "
+             "I would recommend a light jacket for the evening. "
+             "Shall I set a reminder for your meeting at three?")
+    
+    def __init__(self, reply=None, tokens_per_second=40, chars_per_token=4, first_token_delay=0.3):
+        self.reply = reply or self.REPLY
+        self.token_delay = 1.0 / tokens_per_second
+        self.chars_per_token = chars_per_token
+        self.first_token_delay = first_token_delay
+    
+    def think_stream(self, user_text, visualizer=None, prefetch=None):
+        if visualizer:
+            visualizer.mode = "thinking"
+        if prefetch:
+            yield from prefetch.stream()
+            return
+        time.sleep(self.first_token_delay)
+        for i in range(0, len(self.reply), self.chars_per_token):
+            if i:
+                time.sleep(self.token_delay)
+            yield self.reply[i:i + self.chars_per_token]
+    
+    def think(self, user_text, visualizer=None):
+        return "".join(self.think_stream(user_text, visualizer))
+    
+    def prefetch(self, user_text):
+        return Prefetch(user_text, lambda: self.think_stream(user_text))
+
+
+class StubEars:
+    """Pretends to be Ears. Hands back scripted phrases (or nothing) after a short wait."""
+    
+    def __init__(self, phrases=None, delay=0.5):
+        self.phrases = list(phrases or [])
+        self.delay = delay
+    
+    def listen(self, visualizer=None, on_captured=None, on_partial=None, mic_open=None, on_barge_in=None,
+               on_speech=None):
+        if visualizer:
+            visualizer.set_mode("listening")
+        time.sleep(self.delay)
+        if mic_open is not None and not mic_open.is_set():
+            # scripted phrases are polite, they never talk over nero
+            return None
+        if visualizer:
+            visualizer.set_mode("idle")
+        if self.phrases and on_speech:
+            on_speech()
+        if self.phrases and on_partial:
+            # like a streaming recognizer, a word at a time
+            words = self.phrases[0].split()
+            for i in range(1, len(words) + 1):
+                on_partial(" ".join(words[:i]))
+        if self.phrases and on_captured:
+            on_captured()
+        return self.phrases.pop(0) if self.phrases else None
+
+
+class StubVoice:
+    """Pretends to be Voice. Just holds the speaking state for a bit, no audio at all."""
+    
+    seconds_per_char = 0.01
+    last_timing = {}
+    stopped = threading.Event()  # set by interrupt(), cleared when the next reply starts
+    interrupts = 0
+    
+    @classmethod
+    def speak(cls, text, visualizer=None):
+        cls.stopped.clear()
+        cls._say(text, visualizer)
+    
+    @classmethod
+    def _say(cls, text, visualizer):
+        if visualizer:
+            visualizer.set_mode("speaking")
+        cls.stopped.wait(len(text) * cls.seconds_per_char)
+        if visualizer:
+            visualizer.set_mode("idle")
+    
+    @classmethod
+    def speak_sentences(cls, sentences, visualizer=None):
+        cls.stopped.clear()
+        for sentence in sentences:
+            # like Voice, an interrupted reply still gets read to the end, just not said
+            if not cls.stopped.is_set():
+                cls._say(sentence, visualizer)
+    
+    @classmethod
+    def interrupt(cls):
+        cls.interrupts += 1
+        cls.stopped.set()
+        return True
+    
+    @staticmethod
+    def duck(volume=None):
+        pass
+    
+    @staticmethod
+    def unduck():
+        pass
+    
+    @staticmethod
+    def on_mixer_event():
+        pass
+    
+    @staticmethod
+    def warm_up(phrases):
+        return None
+    
+    @staticmethod
+    def prepare():
+        pass
+
+
+class StubPart:
+    """Just enough of genai.protos.Part: text, or a function call / response"""
+    
+    def __init__(self, text="", function_call=None, function_response=None):
+        self.text = text
+        self.function_call = function_call
+        self.function_response = function_response
+    
+    def __contains__(self, field):
+        return getattr(self, field, None) is not None
+
+
+class StubContent:
+    def __init__(self, role, parts):
+        self.role = role
+        self.parts = parts
+    
+    @classmethod
+    def of(cls, role, text):
+        return cls(role, [StubPart(text)])
+
+
+class StubChatSession:
+    """
+    Pretends to be a gemini ChatSession. Every few turns the "model" calls a tool first,
+    and every request records how many tokens of history it would have sent.
+    """
+    
+    def __init__(self, reply_chars=220, tool_every=5):
+        self.history = []
+        self.reply_chars = reply_chars
+        self.tool_every = tool_every
+        self.payloads = []  # estimated tokens per request
+        self.turns = 0
+    
+    def send_message(self, text):
+        self.turns += 1
+        message = StubContent.of('user', text)
+        self.payloads.append(sum(estimate_tokens(content) for content in self.history + [message]))
+        self.history.append(message)
+        if self.tool_every and self.turns % self.tool_every == 0:
+            call = type('Call', (), {'name': 'get_system_health', 'args': {}})()
+            result = type('Result', (), {'name': 'get_system_health', 'response': {'result': 'CPU Usage: 9%'}})()
+            self.history.append(StubContent('model', [StubPart(function_call=call)]))
+            self.history.append(StubContent('user', [StubPart(function_response=result)]))
+        reply = (f"Reply {self.turns}. " + "Certainly, Sir. " * self.reply_chars)[:self.reply_chars]
+        self.history.append(StubContent.of('model', reply))
+        return reply
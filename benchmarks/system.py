@@ -0,0 +1,105 @@
+"""
+System backend call latency with cold vs warm device handles.
+
+    python -m benchmarks.system [backend ...]
+
+Cold is what every SystemController call used to cost: the handle (COM volume interface,
+default sink, media player) opened again before the call. Warm is the per-thread cached
+handle. Runs the fake backend (free, and with a few ms of simulated device open) plus this
+OS's real one if it can reach the audio system, then checks the cache across threads and
+that an unplugged device gets reopened instead of failing the call.
+"""
+import argparse
+import time
+import threading
+
+from modules.system_backends import BACKENDS, FakeBackend, make_backend
+from utils.tracing import percentiles
+
+CALLS = 200
+
+
+def timed(backend, cold, calls):
+    samples = []
+    for _ in range(calls):
+        if cold:
+            backend.invalidate()
+        start = time.perf_counter()
+        backend.get_volume()
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def compare(label, backend, calls=CALLS):
+    try:
+        backend.get_volume()
+    except Exception as e:
+        print(f"{label:<34} unavailable: {e}")
+        return
+    cold = timed(backend, True, calls)
+    warm = timed(backend, False, calls)
+    print(f"{label:<34} cold p50 {cold['p50']:8.3f}ms  p95 {cold['p95']:8.3f}ms   "
+          f"warm p50 {warm['p50']:8.3f}ms  p95 {warm['p95']:8.3f}ms   {cold['p50'] / max(warm['p50'], 1e-6):6.0f}x")
+
+
+def threads_check(workers=4, calls=50):
+    backend = FakeBackend(open_delay=0.002)
+    
+    def work():
+        for _ in range(calls):
+            backend.set_volume(backend.get_volume())
+    
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"{workers} threads x {calls} adjusts: {backend.stats['opened']} handles opened, "
+          f"{backend.stats['reused']} reused")
+
+
+def unplug_check():
+    backend = FakeBackend()
+    worker_ready, unplugged = threading.Event(), threading.Event()
+    results = []
+    
+    def other_thread():
+        backend.get_volume()
+        worker_ready.set()
+        unplugged.wait()
+        results.append(backend.get_volume())
+    
+    thread = threading.Thread(target=other_thread)
+    thread.start()
+    worker_ready.wait()
+    backend.get_volume()
+    backend.unplug()
+    backend.set_volume(30)  # stale handle -> DeviceGone -> reopened and retried
+    unplugged.set()
+    thread.join()
+    print(f"unplug: call went through (volume {backend.volume}), other thread read {results[0]}, "
+          f"{backend.stats['invalidated']} invalidation, {backend.stats['opened']} handles opened")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('backends', nargs='*', help=f"real backends to try too ({', '.join(BACKENDS)}), this OS's by default")
+    names = parser.parse_args().backends
+    compare("fake (free open)", FakeBackend())
+    compare("fake (2ms device open)", FakeBackend(open_delay=0.002))
+    for name in names or [None]:
+        try:
+            backend = make_backend(name)
+        except Exception as e:
+            print(f"{name or 'native':<34} unavailable: {e}")
+            continue
+        if not isinstance(backend, FakeBackend):
+            compare(backend.name, backend, calls=CALLS // 10)
+    print()
+    threads_check()
+    unplug_check()
+    print(f"(backends: {', '.join(BACKENDS)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Time-to-first-audio for the temp file path vs the streaming path in Voice.speak().
+
+    python -m benchmarks.tts_stream [mp3 file] [first delay s] [chunk delay s]
+
+Uses StubCommunicate (silent audio unless you pass an mp3) on SDL's dummy audio driver.
+"""
+import os
+import argparse
+
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from config.settings import Config
+from modules.voice import Voice
+from benchmarks.stubs import StubCommunicate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('mp3', nargs='?', help="real speech to stream instead of silence")
+    parser.add_argument('first_delay', type=float, default=0.4, nargs='?', help="seconds before the first chunk")
+    parser.add_argument('chunk_delay', type=float, default=0.05, nargs='?', help="seconds between chunks")
+    args = parser.parse_args()
+    mp3 = None
+    if args.mp3:
+        with open(args.mp3, 'rb') as f:
+            mp3 = f.read()
+    first_delay, chunk_delay = args.first_delay, args.chunk_delay
+    
+    pygame.mixer.init()
+    Config.TTS_CACHE = False  # or the second run would just be a cache hit on the first one
+    Voice.communicate_factory = StubCommunicate.factory(mp3=mp3, first_delay=first_delay,
+                                                        chunk_delay=chunk_delay)
+    text = "Good evening, Sir. Nero online and ready to assist."
+    
+    print(f"{'mode':>8} {'first audio s':>14} {'total s':>8}")
+    for streaming in (False, True):
+        Config.TTS_STREAMING = streaming
+        Voice.speak(text)
+        timing = Voice.last_timing
+        print(f"{timing['mode']:>8} {timing['time_to_first_audio']:>14.3f} {timing['total']:>8.3f}")
+    
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,22 @@ class Config:
     VISUALIZER_WIDTH = 500  # visualizer sits on the left
     CHAT_WIDTH = 450  # text chat goes on the right
     FPS = 60
+    ADAPTIVE_FPS = True  # drop the frame rate when idle / minimized / in the background
+    IDLE_FPS = 30  # idle or listening
+    BACKGROUND_FPS = 5  # window doesn't have focus
+    HIDDEN_FPS = 1  # minimized, nobody can see it anyway
+    MAX_FRAME_DT = 0.1  # longest step the visualizer physics takes after a slow frame
     TITLE = "NERO"
     TITLE_BAR_HEIGHT = 35  # custom header height
+    DIRTY_RECTS = True  # cached title/chat layers + display.update(rects) instead of redrawing it all
+    TEXT_CACHE_MAX_ITEMS = 512  # rendered text surfaces we hang on to
+    TEXT_CACHE_MAX_MB = 8
+    CHAT_DB = os.path.join(os.path.expanduser("~"), ".nero", "chat.db")  # every message ever, sqlite
+    CHAT_RING_SIZE = 200  # newest messages kept in memory
+    CHAT_PAGE_SIZE = 50  # older ones load in pages this big when you scroll back
+    CHAT_CACHED_PAGES = 8
+    CHAT_LAYOUT_CACHE = 1024  # messages whose word-wrapped lines we keep around
+    CHAT_SCROLL_STEP = 40  # px per mouse wheel notch
     
     # Colors
     BLACK = (0, 0, 0)
@@ -31,6 +45,11 @@ class Config:
     # APP
     BG_COLOR = (5, 5, 15)
     
+    # Visualizer
+    VISUALIZER_BARS = 90  # bars around the circle
+    VISUALIZER_NUMPY = True  # whole-array physics, set False to use the plain python loops
+    VISUALIZER_BATCHED_DRAW = True  # cached geometry + batched cap sprites instead of line + 2 circles per bar
+    
     # AI Stuff
     # Grabs the key from your .env file so you don't leak it on github lol
     GEMINI_KEY = os.getenv("GEMINI_API_KEY")
@@ -38,6 +57,61 @@ class Config:
     SYSTEM_PROMPT = """You are NERO, an advanced AI assistant like JARVIS.
 You are sophisticated and speak elegantly. Address user as "Sir" occasionally.
 Keep responses concise (1-2 sentences) for voice. You ARE Nero."""
+    LLM_STREAMING = True  # speak sentence by sentence while gemini is still writing
+    COMMAND_QUEUE_SIZE = 3  # things you said while nero was busy, waiting their turn
+    RESPONSE_CACHE = True  # reuse gemini's answer when the same question comes back (never for tool turns)
+    RESPONSE_CACHE_TTL = 600  # seconds before a cached answer goes stale
+    RESPONSE_CACHE_MAX_ITEMS = 256
+    CONTEXT_TURNS = 10  # recent turns re-sent word for word, older ones get summarized
+    CONTEXT_MAX_TOKENS = 3000  # rough cap on those recent turns (~4 chars a token)
+    CONTEXT_SUMMARY_WORDS = 120
+    
+    # Local commands / system
+    LOCAL_COMMANDS = True  # volume/brightness/media/cpu commands run locally, no gemini round trip
+    LOCAL_COMMAND_CONFIDENCE = 0.75  # share of words the parser has to understand, below this gemini gets it
+    SYSTEM_BACKEND = None  # volume/brightness/media: 'windows', 'linux' (pactl + MPRIS) or 'fake', None picks by OS
+    SYSTEM_CALL_TIMEOUT = 2  # seconds before a pactl / dbus-send call is given up on
+    
+    # Metrics
+    METRICS = True  # sample cpu/ram/disk/network in the background so the health tool can talk about trends
+    METRICS_INTERVAL = 2.0  # seconds between samples
+    METRICS_HISTORY = 1800  # samples kept (an hour at 2s)
+    METRICS_PROCESS_EVERY = 5  # walk the process list every this many samples, it's the expensive part
+    METRICS_TOP_PROCESSES = 5
+    METRICS_TREND_WINDOW = 300  # seconds of history the health answer looks at
+    METRICS_CPU_HIGH = 90  # % that counts as maxed out
+    METRICS_MIN_TREND = 60  # seconds it has to stay there before it's worth mentioning
+    METRICS_MEMORY_TREND = 5  # RAM % points of change over the window worth mentioning
+    METRICS_BUSY_IO = 5 * 1024 ** 2  # bytes/s of disk or network worth mentioning
+    METRICS_BUSY_CPU = 20  # % of the whole machine one app has to use to get named
+    
+    # Mic stays open the whole run, speech gets cut out of it by a simple energy VAD
+    MIC_SAMPLE_RATE = 16000
+    MIC_CHUNK = 512  # samples per read (32ms at 16kHz)
+    MIC_PRE_ROLL = 0.5  # seconds from before speech was detected, stuck on the front of each utterance
+    VAD_RATIO = 3.0  # this many times the noise floor counts as speech
+    VAD_MIN_ENERGY = 300  # never lower than this (the old energy_threshold)
+    VAD_START = 0.06  # loud this long before we call it speech
+    VAD_SILENCE = 0.8  # quiet this long ends an utterance (sr's pause_threshold)
+    NOISE_FLOOR_ADAPT = 0.05  # how fast the noise floor follows the room, per quiet chunk
+    LISTEN_TIMEOUT = 6  # seconds to wait for speech to start
+    PHRASE_TIME_LIMIT = 12
+    STT_BACKEND = 'google'  # speech to text engine, one of modules/stt.py BACKENDS
+    # get going on a partial transcript once it stops changing. Needs a streaming STT backend for the
+    # partials (google isn't one, only 'fake' is so far), None = on only when the backend streams
+    SPECULATION = None
+    SPECULATE_STABLE = 0.5  # seconds a partial has to sit still (longer = fewer wasted gemini calls)
+    SPECULATE_LLM = True  # that includes asking gemini early (thrown away if the final text differs)
+    WAKE_WORD = False  # only send speech to google when it starts with "Nero" (needs recordings below)
+    WAKE_WORD_DIR = os.path.join(os.path.expanduser("~"), ".nero", "wake_word")  # a few wavs of you saying "Nero"
+    WAKE_WORD_THRESHOLD = 3.0  # average DTW distance per frame, lower is stricter
+    WAKE_WORD_SEARCH = 2.0  # seconds at the start of an utterance it has to be in (pre-roll included)
+    WAKE_WORD_MIN_REST = 0.3  # less speech than this after it counts as a bare "Nero"
+    WAKE_WORD_FOLLOW_UP = 8  # after a bare "Nero" the next thing said gets through without it
+    BARGE_IN = 'stop'  # talking over Nero: 'stop' cuts it off, 'duck' turns it down until the words are in, None = wait your turn
+    BARGE_IN_RATIO = 2.0  # while Nero talks you have to be this many times louder than normal speech (its own voice leaks into the mic)
+    BARGE_IN_MIN_SPEECH = 0.2  # and loud for this long, so a cough or a speaker pop doesn't count
+    BARGE_IN_DUCK_VOLUME = 0.3
 
     # Voice Settings
     # Pick one: 'guy', 'jenny', 'aria', 'davis', 'tony', 'jane'
@@ -45,3 +119,16 @@ Keep responses concise (1-2 sentences) for voice. You ARE Nero."""
     VOICE_RATE = "+25%"  # Speed: +0% is normal, +25% is snappy
     VOICE_VOLUME = "+0%" # Volume: +0% is default
     VOICE_PITCH = "+0Hz" # Pitch: +0Hz is default
+    TTS_STREAMING = True  # start talking while edge tts is still sending audio (no temp files)
+    TTS_STREAM_MIN_BYTES = 4000  # ~0.6s of edge tts mp3, smallest piece we bother decoding
+    
+    # TTS cache so fixed lines ("Goodbye, Sir..." etc) skip the network after the first time
+    TTS_CACHE = True
+    TTS_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".nero", "tts_cache")
+    TTS_CACHE_MAX_MB = 50  # oldest-used mp3s get deleted past this
+    TTS_CACHE_HOT_ITEMS = 16  # decoded sounds kept in memory for the most repeated lines
+    
+    # Turn tracing (listen -> think -> speak timings), cheap enough to leave on
+    TRACING = True
+    TRACE_DIR = os.path.join(os.path.expanduser("~"), ".nero", "traces")
+    TRACE_SUMMARY_SAMPLES = 500  # recent durations kept per stage for the percentiles
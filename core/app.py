@@ -1,7 +1,7 @@
 import pygame
+import time
 import threading
 import datetime
-import pywhatkit
 import webbrowser
 import ctypes
 import ctypes.wintypes
@@ -9,12 +9,26 @@ import ctypes.wintypes
 from config.settings import Config
 from ui.visualizer import CircularSpectrum
 from ui.components import UIComponents
+from ui.compositor import Compositor
+from ui.chat_view import ChatView
+from core.governor import FrameGovernor
+from core.router import Intent, IntentRouter
+from core.commands import LocalCommands
+from core.conversation import ConversationStore
+from core.speculation import Speculator
+from core.assistant import (StateMachine, EventQueue, CommandQueue, SpectrumRelay, LABELS, VISUALIZER_MODES,
+                            IDLE, LISTENING, RECOGNIZING, ROUTING, THINKING, SPEAKING)
 from modules.voice import Voice
-from modules.ears import Ears
-from modules.brain import Brain
+from modules.pipeline import sentences_from_stream
+from utils.tracing import tracer
 
 class NeroAI:
-    def __init__(self):
+    GOODBYE = "Goodbye, Sir. It was my pleasure."
+    SITES = {'youtube': 'https://youtube.com', 'google': 'https://google.com',
+             'github': 'https://github.com', 'facebook': 'https://facebook.com'}
+    
+    def __init__(self, brain=None, ears=None, voice=None):
+        """brain/ears/voice can be swapped for stand-ins (benchmarks, headless runs)"""
         pygame.init()
         
         # no frame because we want it to look futuristic
@@ -22,9 +36,10 @@ class NeroAI:
         pygame.display.set_caption(Config.TITLE)
         
         # grabbing the window handle so we can minimize it properly later
-        self.hwnd = pygame.display.get_wm_info()['window']
+        # (only windows has one we can use, the dummy driver has none at all)
+        self.hwnd = pygame.display.get_wm_info().get('window') if hasattr(ctypes, 'windll') else None
         
-        self.clock = pygame.time.Clock()
+        self.governor = FrameGovernor()
         
         # window dragging stuff
         self.dragging = False
@@ -45,132 +60,327 @@ class NeroAI:
         
         self.visualizer = CircularSpectrum(self.screen, center_x, center_y)
         self.ui = UIComponents(self.screen, self.fonts)
-        self.ears = Ears()
-        self.brain = Brain()
+        self.compositor = Compositor(self.ui)
+        self.chat_view = ChatView(self.fonts)
+        # only pull in the real ones (mic, network, windows apis) if nobody handed us stand-ins
+        if ears is None:
+            from modules.ears import Ears
+            ears = Ears()
+        if brain is None:
+            from modules.brain import Brain
+            brain = Brain()
+        self.ears = ears
+        self.brain = brain
+        self.voice = voice or Voice
+        # simple system commands go straight to the brain's tools (stand-in brains have none)
+        tool_map = getattr(self.brain, 'tool_map', None)
+        self.commands = LocalCommands(tool_map, Config.LOCAL_COMMAND_CONFIDENCE) if Config.LOCAL_COMMANDS and tool_map else None
         
         # store the chat history here
-        self.conversation = []  # List of {'role': 'user'/'nero', 'text': '...', 'time': '...'}
-        self.scroll_offset = 0
-        self.max_visible_messages = 12
+        self.conversation = ConversationStore()  # {'role': 'user'/'nero', 'text': '...', 'time': '...'} on disk + recent ones in memory
         
-        # app state
+        # app state (only the main thread writes these, workers post events instead)
         self.running = True
         self.status = "Initializing..."
+        self.state = None  # latest snapshot from the state machine
         self.message = ""
         self.user_text = ""
-        self.listening = False
         self.chat_visible = True
         self.mouse_pos = (0, 0)
         
+        # ear + worker threads talk to the main loop through these
+        self.events = EventQueue()
+        self.machine = StateMachine(self.events)
+        self.inbox = CommandQueue(Config.COMMAND_QUEUE_SIZE)
+        self.barged_in = False  # talked over nero during the current listen
+        self.spectrum = SpectrumRelay(self.events, self.visualizer)
+        
+        self.router = self.build_router(self)
+        # head start on partial transcripts, only used if the final one agrees (and there are only
+        # partials with a streaming recognizer)
+        speculate = Config.SPECULATION if Config.SPECULATION is not None else getattr(self.ears, 'streaming', False)
+        self.speculator = Speculator(self.router, self.commands, self.brain, self.voice) if speculate else None
+    
+    @classmethod
+    def build_router(cls, target):
+        """Local commands, compiled into one matcher so adding more doesn't slow routing down"""
+        return IntentRouter([
+            Intent('goodbye', ['goodbye', 'bye', 'exit', 'quit'], target.handle_goodbye, priority=40),
+            Intent('play', ['play {song}'], target.handle_play, priority=30),
+            Intent('time', ['what time', 'time is it'], target.handle_time, priority=20),
+            Intent('open_site', ['open'], target.handle_open_site, slots={'site': cls.SITES}, priority=10),
+        ])
+    
     def toggle_chat(self):
         """Hides or shows the chat panel and resizes the window"""
         self.chat_visible = not self.chat_visible
         new_width = Config.WIDTH if self.chat_visible else Config.VISUALIZER_WIDTH
         self.screen = pygame.display.set_mode((new_width, Config.HEIGHT), pygame.NOFRAME)
-        # Re-init UI to update hitbox positions for the new size
-        self.ui = UIComponents(self.screen, self.fonts)
-        
+        # Move the hitboxes for the new size, the cached layers stay as they are
+        self.ui.resize(self.screen)
+        self.visualizer.screen = self.screen
+        self.chat_view.invalidate()
+        self.compositor.invalidate()
+    
     def minimize_window(self):
         """Uses windows api to minimize the window since we don't have a normal title bar"""
+        if self.hwnd is None:
+            pygame.display.iconify()
+            return
         ctypes.windll.user32.ShowWindow(self.hwnd, 6)  # SW_MINIMIZE = 6
     
     def add_message(self, role, text):
-        """Pushes a new message to the list"""
-        timestamp = datetime.datetime.now().strftime('%H:%M')
-        self.conversation.append({
-            'role': role,
-            'text': text,
-            'time': timestamp
-        })
-        # keeps the chat scrolled to the bottom
-        if len(self.conversation) > self.max_visible_messages:
-            self.scroll_offset = len(self.conversation) - self.max_visible_messages
-            
+        """Pushes a new message to the list (from any thread, the main loop does the adding)"""
+        self.events.post('message', role, text)
+    
+    def apply_events(self):
+        """Main thread only: takes in everything the ear/worker threads posted since last frame"""
+        for kind, *args in self.events.drain():
+            if kind == 'state':
+                self.state = args[0]
+                self.status = LABELS[self.state['state']]
+                self.visualizer.set_mode(VISUALIZER_MODES[self.state['state']])
+            elif kind == 'message':
+                role, text = args
+                self.conversation.append(role, text)
+                self.message = text
+                # keeps the chat scrolled to the bottom
+                self.chat_view.scroll_to_bottom()
+            elif kind == 'partial':
+                # what the recognizer has heard so far, in the status pill while you talk
+                if self.state and self.state['state'] == LISTENING:
+                    partial = args[0] if len(args[0]) <= 40 else "..." + args[0][-37:]
+                    self.status = f'{LABELS[LISTENING]} "{partial}"'
+            elif kind == 'reply_text':
+                # streamed reply growing in the last bubble
+                reply = self.conversation[-1]
+                reply['text'] += args[0]
+                self.message = reply['text']
+            elif kind == 'reply_done':
+                self.conversation.update(self.conversation[-1])
+            elif kind == 'spectrum':
+                self.visualizer.set_spectrum(*args)
+            elif kind == 'clear_spectrum':
+                self.visualizer.clear_spectrum()
+            elif kind == 'quit':
+                self.running = False
+    
     def process_command(self, text):
-        """Decides what to do with what you said"""
+        """Decides what to do with what you said (worker thread)"""
         self.user_text = text
         self.add_message('user', text)
+        self.machine.set('worker', ROUTING)
+        route = tracer.begin("route")
+        
+        # whatever we already worked out from the partial transcript, if it was right
+        speculation = self.speculator.take(text) if self.speculator else None
+        if speculation:
+            tracer.mark("speculation.hit", kind=speculation.kind)
         
-        if any(w in text for w in ['goodbye', 'bye', 'exit', 'quit']):
-            self.status = "Speaking..."
-            self.message = "Goodbye, Sir. It was my pleasure."
-            self.add_message('nero', self.message)
-            Voice.speak(self.message, self.visualizer)
-            self.running = False
+        match = speculation.match if speculation and speculation.match else self.router.match(text)
+        if match:
+            route.end(intent=match.intent.name)
+            match.intent.handler(text, match.slots)
             return
         
-        if 'play ' in text:
-            song = text.replace('play', '').strip()
-            self.status = "Speaking..."
-            self.message = f"Playing {song} for you, Sir."
-            self.add_message('nero', self.message)
-            Voice.speak(self.message, self.visualizer)
-            pywhatkit.playonyt(song)
+        reply = self.commands.handle(text, speculation and speculation.command) if self.commands else None
+        if reply:
+            route.end(intent="system")
+            self.say(reply)
             return
         
-        if any(w in text for w in ['what time', 'time is it']):
-            current = datetime.datetime.now().strftime('%I:%M %p')
-            self.status = "Speaking..."
-            self.message = f"The time is {current}, Sir."
-            self.add_message('nero', self.message)
-            Voice.speak(self.message, self.visualizer)
+        route.end(intent="brain")
+        self.machine.set('worker', THINKING)
+        if Config.LLM_STREAMING:
+            self.think_and_speak(text, speculation and speculation.prefetch)
             return
+        response = self.brain.think(text)
+        self.say(response)
+    
+    def say(self, message):
+        """Puts a reply in the chat and speaks it"""
+        self.machine.set('worker', SPEAKING)
+        self.add_message('nero', message)
+        self.voice.speak(message, self.spectrum)
+    
+    def handle_goodbye(self, text, slots):
+        self.say(self.GOODBYE)
+        self.events.post('quit')
+    
+    def handle_play(self, text, slots):
+        song = slots['song']
+        self.say(f"Playing {song} for you, Sir.")
+        import pywhatkit  # imported late so headless runs never load it (it wants a display + network)
+        pywhatkit.playonyt(song)
+    
+    def handle_time(self, text, slots):
+        current = datetime.datetime.now().strftime('%I:%M %p')
+        self.say(f"The time is {current}, Sir.")
+    
+    def handle_open_site(self, text, slots):
+        site = slots['site']
+        self.say(f"Opening {site} for you, Sir.")
+        webbrowser.open(self.SITES[site])
+    
+    def think_and_speak(self, text, prefetch=None):
+        """
+        Streams the reply into the chat and starts talking as soon as the first sentence is done.
+        prefetch is a Brain request the speculator already started for this text.
+        """
+        self.add_message('nero', '')
         
-        sites = {'youtube': 'https://youtube.com', 'google': 'https://google.com',
-                 'github': 'https://github.com', 'facebook': 'https://facebook.com'}
-        for site, url in sites.items():
-            if site in text and 'open' in text:
-                self.status = "Speaking..."
-                self.message = f"Opening {site} for you, Sir."
-                self.add_message('nero', self.message)
-                Voice.speak(self.message, self.visualizer)
-                webbrowser.open(url)
-                return
-        
-        self.status = "Thinking..."
-        response = self.brain.think(text, self.visualizer)
-        self.status = "Speaking..."
-        self.message = response
-        self.add_message('nero', response)
-        Voice.speak(response, self.visualizer)
-    
-    def listen_thread(self):
-        """The ear thread that runs in the background"""
-        self.status = "Listening..."
-        text = self.ears.listen(self.visualizer)
-        if text:
-            self.process_command(text)
-        self.status = "Ready"
-        self.listening = False
+        def on_text(chunk):
+            # chat bubble fills in as the text arrives
+            self.events.post('reply_text', chunk)
+            self.machine.set('worker', SPEAKING)
+        
+        sentences = sentences_from_stream(self.brain.think_stream(text, prefetch=prefetch), on_text)
+        self.voice.speak_sentences(sentences, self.spectrum)
+        # it went in empty, now the whole reply is there so save it properly
+        self.events.post('reply_done')
     
-    def greet(self):
-        """Say hello when we start up"""
-        hour = datetime.datetime.now().hour
+    def ear_loop(self):
+        """
+        One thread for the whole run. Listens whenever Nero isn't talking (or all the time with
+        barge-in) and drops what it hears in the inbox, so it's listening again straight away,
+        even while a command runs.
+        """
+        while self.running:
+            if not Config.BARGE_IN and not self.machine.mic_open.wait(timeout=0.5):
+                continue
+            self.machine.set('ear', LISTENING)
+            started = time.monotonic()
+            # the turn starts when you start talking, on this thread, and goes to the worker with the text
+            with tracer.span("ears.listen"):
+                # mic_open also mutes the capture while we talk, so Nero never hears itself
+                # (barge-in only lets through speech clearly louder than that)
+                text = self.ears.listen(on_captured=lambda: self.machine.set('ear', RECOGNIZING),
+                                        on_partial=self.on_partial, mic_open=self.machine.mic_open,
+                                        on_barge_in=self.on_barge_in if Config.BARGE_IN else None,
+                                        on_speech=tracer.start_turn)
+            self.machine.set('ear', IDLE)
+            if Config.BARGE_IN == 'duck' and self.barged_in:
+                # turned down while you talked, cut off if it was actually something
+                if text:
+                    self.voice.interrupt()
+                else:
+                    self.voice.unduck()
+            self.barged_in = False
+            turn = tracer.current_turn
+            if text and self.inbox.put(text, turn):
+                tracer.hand_off()
+            else:
+                # listens where nobody said anything (or said it again) aren't worth a line in the log
+                tracer.end_turn(keep=False)
+            if not text and time.monotonic() - started < Config.VAD_SILENCE:
+                # back quicker than anyone could have said something, so the mic is broken
+                # (no device, reopen failed), don't spin and flood the main thread with states
+                time.sleep(0.5)
+    
+    def on_barge_in(self):
+        """Someone started talking over Nero (ear thread, straight from the capture stream)"""
+        if self.machine.state('worker') != SPEAKING:
+            return
+        self.barged_in = True
+        tracer.mark("barge_in", mode=Config.BARGE_IN)
+        if Config.BARGE_IN == 'duck':
+            self.voice.duck()
+        else:
+            self.voice.interrupt()
+    
+    def on_partial(self, text):
+        """Partial transcript from a streaming recognizer (ear thread)"""
+        self.events.post('partial', text)
+        if self.speculator:
+            self.speculator.on_partial(text)
+    
+    def worker_loop(self):
+        """One thread for the whole run: greets, then route -> think -> speak for each command"""
+        try:
+            self.greet()
+        finally:
+            self.machine.set('worker', IDLE)
+        while self.running:
+            item = self.inbox.get(timeout=0.5)
+            if not item:
+                continue
+            text, turn = item
+            tracer.start_turn(turn)
+            try:
+                with tracer.span("turn.process", queued=len(self.inbox)):
+                    self.process_command(text)
+            except Exception as e:
+                print(f"[Nero] Error: {e}")
+            finally:
+                self.machine.set('worker', IDLE)
+                tracer.end_turn()
+    
+    @staticmethod
+    def greeting_text(hour):
+        """The startup line for a given hour"""
         if hour < 12:
             greeting = "Good morning, Sir"
         elif hour < 18:
             greeting = "Good afternoon, Sir"
         else:
             greeting = "Good evening, Sir"
+        return f"{greeting}. Nero online and ready to assist."
+    
+    def fixed_phrases(self):
+        """Lines Nero says word for word, worth having in the tts cache before they're needed"""
+        phrases = [self.greeting_text(hour) for hour in (9, 15, 21)]
+        phrases.append(self.GOODBYE)
+        phrases += [f"Opening {site} for you, Sir." for site in self.SITES]
+        phrases.append(self.brain.FALLBACK_REPLY)
+        return phrases
+    
+    def greet(self):
+        """Say hello when we start up"""
+        self.say(self.greeting_text(datetime.datetime.now().hour))
+    
+    def render(self):
+        """Draws one frame"""
+        if Config.DIRTY_RECTS:
+            # cached title/chat layers, only changed regions get pushed
+            self.compositor.render(self.screen, self.visualizer, self.mouse_pos, self.conversation,
+                                   self.chat_view, self.status, self.chat_visible)
+            return
         
-        self.message = f"{greeting}. Nero online and ready to assist."
-        self.add_message('nero', self.message)
-        self.status = "Speaking..."
-        Voice.speak(self.message, self.visualizer)
-        self.status = "Ready"
+        # Render everything
+        self.screen.fill(Config.BG_COLOR)
+        self.visualizer.draw()
+        self.ui.draw_title_bar(self.mouse_pos)
+        
+        # Only draw chat if it's visible
+        if self.chat_visible:
+            self.ui.draw_chat_panel(self.conversation, self.chat_view, self.status)
+        
+        pygame.display.flip()
     
     def run(self):
         """The main game loop"""
-        threading.Thread(target=self.greet, daemon=True).start()
+        # two long-lived threads instead of a new listen thread every turn
+        threading.Thread(target=self.worker_loop, daemon=True).start()
+        threading.Thread(target=self.ear_loop, daemon=True).start()
+        self.voice.warm_up(self.fixed_phrases())
         
         while self.running:
-            dt = self.clock.tick(Config.FPS) / 1000.0
+            # sleeps until the next frame or until something happens
+            fps = self.governor.target_fps(self.visualizer.mode, self.dragging)
+            events, dt = self.governor.wait(fps)
             self.mouse_pos = pygame.mouse.get_pos()
             
-            for event in pygame.event.get():
+            for event in events:
+                if self.governor.handle_event(event):
+                    self.compositor.invalidate()
+                
                 if event.type == pygame.QUIT:
                     self.running = False
-                    
+                
+                elif event.type == Voice.END_EVENT:
+                    # a sound finished, whoever's waiting on the playback doesn't have to poll
+                    self.voice.on_mixer_event()
+                
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:  # Left click
                         # Close button
@@ -182,18 +392,18 @@ class NeroAI:
                         # Chat toggle button
                         elif self.ui.chat_rect.collidepoint(event.pos):
                             self.toggle_chat()
-                        # Title bar drag
-                        elif self.ui.title_rect.collidepoint(event.pos):
+                        # Title bar drag (needs the windows api to move the window)
+                        elif self.ui.title_rect.collidepoint(event.pos) and self.hwnd is not None:
                             self.dragging = True
                             mouse_x, mouse_y = event.pos
                             rect = ctypes.wintypes.RECT()
                             ctypes.windll.user32.GetWindowRect(self.hwnd, ctypes.byref(rect))
                             self.drag_offset = (mouse_x, mouse_y)
-                            
+                
                 elif event.type == pygame.MOUSEBUTTONUP:
                     if event.button == 1:
                         self.dragging = False
-                        
+                
                 elif event.type == pygame.MOUSEMOTION:
                     if self.dragging:
                         mouse_x, mouse_y = pygame.mouse.get_pos()
@@ -203,26 +413,44 @@ class NeroAI:
                         new_x = cursor_pos.x - self.drag_offset[0]
                         new_y = cursor_pos.y - self.drag_offset[1]
                         ctypes.windll.user32.SetWindowPos(self.hwnd, 0, new_x, new_y, 0, 0, 0x0001)
-                        
+                
+                elif event.type == pygame.MOUSEWHEEL:
+                    # scroll the chat when the mouse is over it
+                    if self.chat_visible and self.mouse_pos[0] >= Config.VISUALIZER_WIDTH:
+                        self.chat_view.scroll_by(self.conversation, event.y * Config.CHAT_SCROLL_STEP)
+                
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         self.running = False
             
-            if not self.listening and "Ready" in self.status:
-                self.listening = True
-                threading.Thread(target=self.listen_thread, daemon=True).start()
+            # whatever the ear/worker threads did since last frame
+            self.apply_events()
             
             self.visualizer.update(dt)
-            
-            # Render everything
-            self.screen.fill(Config.BG_COLOR)
-            self.visualizer.draw()
-            self.ui.draw_title_bar(self.mouse_pos)
-            
-            # Only draw chat if it's visible
-            if self.chat_visible:
-                self.ui.draw_chat_panel(self.conversation, self.scroll_offset, self.max_visible_messages, self.status)
-            
-            pygame.display.flip()
+            if not self.governor.minimized:
+                self.render()
         
+        tracer.print_summary()
+        if self.commands:
+            self.commands.print_summary()
+        cache = getattr(self.brain, 'cache', None)
+        if cache:
+            cache.print_summary()
+        # only there if something was said, Voice makes it on first use
+        tts_cache = getattr(self.voice, '_cache', None)
+        if tts_cache:
+            tts_cache.print_summary()
+        if self.speculator:
+            self.speculator.print_summary()
+        wake = getattr(self.ears, 'wake', None)
+        if wake:
+            wake.print_summary()
+        metrics = getattr(getattr(self.brain, 'sys', None), 'metrics', None)
+        if metrics:
+            metrics.print_summary()
+            metrics.stop()
+        # the mic has been open all along
+        if hasattr(self.ears, 'close'):
+            self.ears.close()
+        self.conversation.close()
         pygame.quit()
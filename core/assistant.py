@@ -0,0 +1,171 @@
+import re
+import time
+import queue
+import threading
+from collections import deque
+from core.governor import FrameGovernor
+
+IDLE = 'idle'
+LISTENING = 'listening'
+RECOGNIZING = 'recognizing'
+ROUTING = 'routing'
+THINKING = 'thinking'
+SPEAKING = 'speaking'
+
+# what the status pill says and which visualizer mode goes with each state
+LABELS = {IDLE: "Ready", LISTENING: "Listening...", RECOGNIZING: "Thinking...",
+          ROUTING: "Thinking...", THINKING: "Thinking...", SPEAKING: "Speaking..."}
+VISUALIZER_MODES = {IDLE: "idle", LISTENING: "listening", RECOGNIZING: "thinking",
+                    ROUTING: "thinking", THINKING: "thinking", SPEAKING: "speaking"}
+
+# the ear thread and the worker thread each move through their own states
+TRANSITIONS = {
+    'ear': {
+        IDLE: {LISTENING},
+        LISTENING: {RECOGNIZING, IDLE},
+        RECOGNIZING: {IDLE},
+    },
+    'worker': {
+        IDLE: {ROUTING, SPEAKING},
+        ROUTING: {THINKING, SPEAKING, IDLE},
+        THINKING: {SPEAKING, IDLE},
+        SPEAKING: {THINKING, IDLE},
+    },
+}
+# when both are busy, the one the user should see wins
+PRIORITY = [SPEAKING, THINKING, ROUTING, RECOGNIZING, LISTENING, IDLE]
+
+
+class StateMachine:
+    """
+    listen -> stt -> route -> think -> speak, tracked for the ear and worker threads.
+    Every change goes onto the event queue as a snapshot, so the render loop never has to
+    read anything the worker threads are writing. Also owns the mic gate: the ear only
+    listens while we're not talking (so Nero doesn't hear itself).
+    """
+    
+    def __init__(self, events):
+        self.events = events
+        self.lock = threading.Lock()
+        self.tracks = {'ear': IDLE, 'worker': IDLE}
+        self.mic_open = threading.Event()
+        self.speech_count = 0  # bumps every time we start talking, to spot echo in a capture
+        self.stats = {'transitions': 0, 'bad_transitions': 0}
+    
+    def set(self, track, state):
+        with self.lock:
+            current = self.tracks[track]
+            if state == current:
+                return
+            if state not in TRANSITIONS[track][current]:
+                # still follow along, but say so, it means somebody skipped a step
+                print(f"[Assistant] Error: {track} {current} -> {state}")
+                self.stats['bad_transitions'] += 1
+            self.tracks[track] = state
+            self.stats['transitions'] += 1
+            if track == 'worker':
+                if state == SPEAKING:
+                    self.speech_count += 1
+                    self.mic_open.clear()
+                elif state == IDLE:
+                    self.mic_open.set()
+            snapshot = self._snapshot()
+        self.events.post('state', snapshot)
+    
+    def state(self, track=None):
+        with self.lock:
+            return self.tracks[track] if track else self._snapshot()['state']
+    
+    def _snapshot(self):
+        state = next(s for s in PRIORITY if s in self.tracks.values())
+        return {'state': state, 'ear': self.tracks['ear'], 'worker': self.tracks['worker'],
+                'time': time.perf_counter()}
+
+
+class EventQueue:
+    """Worker threads post here, the main loop drains it once per frame"""
+    
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+    
+    def post(self, kind, *args):
+        self.queue.put((kind,) + args)
+        FrameGovernor.wake()
+    
+    def drain(self):
+        while True:
+            try:
+                yield self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class CommandQueue:
+    """
+    Utterances waiting for the worker, each with the trace turn it started. Bounded: saying
+    the same thing twice while Nero is busy only queues it once, and past the limit the
+    oldest pending one gets dropped.
+    """
+    
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.ready = threading.Condition()
+        self.stats = {'queued': 0, 'coalesced': 0, 'dropped': 0}
+    
+    @staticmethod
+    def _norm(text):
+        return " ".join(re.findall(r"[a-z0-9']+", text.lower()))
+    
+    def put(self, text, turn=None):
+        """False if it got merged into one that was already waiting"""
+        with self.ready:
+            if any(self._norm(pending) == self._norm(text) for pending, _ in self.items):
+                self.stats['coalesced'] += 1
+                return False
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.stats['dropped'] += 1
+            self.items.append((text, turn))
+            self.stats['queued'] += 1
+            self.ready.notify()
+            return True
+    
+    def get(self, timeout=None):
+        """Next (utterance, turn), or None if nothing came in time"""
+        with self.ready:
+            if not self.items:
+                self.ready.wait(timeout)
+            return self.items.popleft() if self.items else None
+    
+    def __len__(self):
+        with self.ready:
+            return len(self.items)
+
+
+class SpectrumRelay:
+    """
+    Stands in for the visualizer on the voice thread. Spectrum hand-offs become events for
+    the main thread, mode changes are dropped since the state machine decides the mode.
+    """
+    
+    def __init__(self, events, visualizer):
+        self.events = events
+        self.num_bands = visualizer.num_bands
+    
+    def set_spectrum(self, frames, fps, position_fn):
+        self.events.post('spectrum', frames, fps, position_fn)
+    
+    def clear_spectrum(self):
+        self.events.post('clear_spectrum')
+    
+    def set_mode(self, mode):
+        pass
+    
+    @property
+    def mode(self):
+        return None
+    
+    @mode.setter
+    def mode(self, value):
+        pass
@@ -0,0 +1,187 @@
+from core.router import tokenize
+from utils.tracing import tracer
+
+# number words people actually say to a volume knob
+UNITS = {'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+         'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14,
+         'fifteen': 15, 'sixteen': 16, 'seventeen': 17, 'eighteen': 18, 'nineteen': 19}
+TENS = {'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60, 'seventy': 70,
+        'eighty': 80, 'ninety': 90, 'hundred': 100}
+NAMED = {'half': 50, 'max': 100, 'maximum': 100, 'full': 100, 'minimum': 0}
+
+SUBJECTS = {
+    'volume': 'volume', 'sound': 'volume', 'audio': 'volume', 'louder': 'volume', 'quieter': 'volume',
+    'softer': 'volume', 'brightness': 'brightness', 'brighter': 'brightness', 'dimmer': 'brightness',
+    'darker': 'brightness',
+}
+UP = {'up', 'increase', 'raise', 'louder', 'brighter', 'higher', 'more', 'boost'}
+DOWN = {'down', 'decrease', 'lower', 'reduce', 'quieter', 'softer', 'dimmer', 'darker', 'less'}
+HEALTH = {'cpu', 'ram', 'memory', 'health', 'performance', 'processor'}
+MEDIA_NEXT = {'next', 'skip'}
+MEDIA_PREV = {'previous', 'prev'}
+MEDIA_PREV_NEEDS_TRACK = {'back', 'last'}
+MEDIA_TOGGLE = {'pause', 'resume', 'unpause'}
+TRACK = {'track', 'song', 'music', 'playback', 'media', 'tune'}
+# "what's next" is asking, not skipping, so media commands never start with these
+QUESTION = {'what', "what's", 'whats', 'is', 'are', 'who', "who's", 'which', 'when', 'where', 'why', 'does', 'do'}
+# "tell me more about the cpu" wants a conversation about it, not the health readout
+CONVERSATION = {'about', 'why', 'explain', 'mean', 'means'}
+WAKE = {'nero', 'hey', 'ok', 'okay', 'please'}
+
+# words that can sit around a command without changing what it means
+FILLER = {
+    'nero', 'hey', 'ok', 'okay', 'please', 'sir', 'can', 'could', 'would', 'will', 'you', 'i', 'me',
+    'my', 'the', 'a', 'it', 'to', 'at', 'by', 'of', 'for', 'and', 'now', 'set', 'make', 'turn',
+    'change', 'put', 'go', 'percent', 'per', 'cent', 'level', 'bit', 'little', 'just', 'what', "what's",
+    'whats', 'is', 'how', "how's", 'check', 'show', 'tell', 'current', 'system', 'computer', 'pc',
+    'usage', 'status', 'screen', 'this', 'that', 'want', 'need', 'some', 'again', 'all', 'way',
+}
+KNOWN = (FILLER | set(SUBJECTS) | UP | DOWN | HEALTH | MEDIA_NEXT | MEDIA_PREV | MEDIA_PREV_NEEDS_TRACK
+         | MEDIA_TOGGLE | TRACK | set(UNITS) | set(TENS) | set(NAMED) | {'mute', 'unmute', 'silence'})
+
+DEFAULT_STEP = 10  # "volume up" with no number
+
+
+class LocalCommand:
+    def __init__(self, tool, args, confidence):
+        self.tool = tool
+        self.args = args
+        self.confidence = confidence
+    
+    def __repr__(self):
+        return f"LocalCommand({self.tool!r}, {self.args!r}, {self.confidence:.2f})"
+
+
+class LocalCommands:
+    """
+    Deterministic parser for the simple SystemController commands ("set volume to 50",
+    "mute", "next track", "brightness 80", "check cpu usage") so they skip the Gemini
+    round trip and go straight to the matching Brain tool.
+    Anything it isn't sure about goes to the model as before.
+    """
+    
+    def __init__(self, tool_map, min_confidence=0.75):
+        self.tool_map = tool_map
+        self.min_confidence = min_confidence
+        self.stats = {'turns': 0, 'local': 0, 'low_confidence': 0, 'no_match': 0}
+    
+    @staticmethod
+    def _below_hundred(tokens, i):
+        """A spelled out 0-99 starting at tokens[i] as (value, words used), (None, 0) if there isn't one"""
+        token = tokens[i] if i < len(tokens) else None
+        if token in TENS and token != 'hundred':
+            value = TENS[token]
+            if i + 1 < len(tokens) and tokens[i + 1] in UNITS and UNITS[tokens[i + 1]] < 10:
+                return value + UNITS[tokens[i + 1]], 2
+            return value, 1
+        if token in UNITS:
+            return UNITS[token], 1
+        return None, 0
+    
+    @classmethod
+    def _number(cls, tokens):
+        """
+        First number in the sentence, digits or words ("fifty five", "one hundred"), as
+        (value, index of its first word), (None, None) if there isn't one
+        """
+        for i, token in enumerate(tokens):
+            if token.isdigit():
+                return int(token), i
+            if token in NAMED:
+                return NAMED[token], i
+            if token == 'hundred':
+                return 100, i  # "a hundred"
+            value, used = cls._below_hundred(tokens, i)
+            if value is None:
+                continue
+            after = i + used
+            if used == 1 and token in UNITS and after < len(tokens) and tokens[after] == 'hundred':
+                # "one hundred", "two hundred and five" (clamped by whoever uses it)
+                after += 1
+                if after < len(tokens) and tokens[after] == 'and':
+                    after += 1
+                rest, _ = cls._below_hundred(tokens, after)
+                return value * 100 + (rest or 0), i
+            return value, i
+        return None, None
+    
+    def parse(self, text):
+        """What the sentence asks for as a LocalCommand, or None if it isn't one of ours"""
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+        words = set(tokens)
+        known = sum(1 for token in tokens if token in KNOWN or token.isdigit())
+        confidence = known / len(tokens)
+        if words & CONVERSATION:
+            return None
+        lead = next((token for token in tokens if token not in WAKE), None)
+        
+        if 'unmute' in words:
+            return LocalCommand('unmute_volume', {}, confidence)
+        if words & {'mute', 'silence'}:
+            return LocalCommand('mute_volume', {}, confidence)
+        if words & HEALTH:
+            return LocalCommand('get_system_health', {}, confidence)
+        if lead not in QUESTION:
+            # a bare "next" only counts as the first word, otherwise it needs a track word
+            if 'skip' in words or ('next' in words and (lead == 'next' or words & TRACK)):
+                return LocalCommand('media_next', {}, confidence)
+            if words & MEDIA_PREV or (words & MEDIA_PREV_NEEDS_TRACK and words & TRACK):
+                return LocalCommand('media_prev', {}, confidence)
+            if words & MEDIA_TOGGLE:
+                return LocalCommand('media_play_pause', {}, confidence)
+        
+        subject = next((SUBJECTS[token] for token in tokens if token in SUBJECTS), None)
+        if subject is None and 'turn' in words and words & (UP | DOWN):
+            subject = 'volume'  # "turn it up" means the volume
+        if subject is None:
+            return None
+        number, at = self._number(tokens)
+        # "up to 80" / "lower it to the minimum" is a level, only "up by 20" or a bare "up" is a step
+        before = [token for token in tokens[:at] if token != 'the'] if number is not None else []
+        absolute = bool(before) and before[-1] in ('to', 'at')
+        if (words & UP or words & DOWN) and not absolute:
+            step = number if number is not None else DEFAULT_STEP
+            if words & DOWN:
+                step = -step
+            return LocalCommand(f'adjust_{subject}', {'change': step}, confidence)
+        if number is not None:
+            return LocalCommand(f'set_{subject}', {'level': max(0, min(100, number))}, confidence)
+        return None  # "what's the volume" etc, let gemini answer it
+    
+    def handle(self, text, command=None):
+        """
+        Runs the command and returns the reply, or None when the model should take this one.
+        command is parse(text) if you already have it (speculation does).
+        """
+        self.stats['turns'] += 1
+        if command is None:
+            command = self.parse(text)
+        if command is None or command.tool not in self.tool_map:
+            self.stats['no_match'] += 1
+            return None
+        if command.confidence < self.min_confidence:
+            self.stats['low_confidence'] += 1
+            return None
+        
+        with tracer.span("commands.tool", tool=command.tool):
+            try:
+                result = self.tool_map[command.tool](**command.args)
+            except Exception as e:
+                print(f"[Commands] Error: {e}")
+                result = None
+        self.stats['local'] += 1
+        if not result:
+            return "I couldn't reach that control, Sir."
+        return f"{result}, Sir."
+    
+    def summary(self):
+        turns = self.stats['turns']
+        return dict(self.stats, local_fraction=self.stats['local'] / turns if turns else 0.0)
+    
+    def print_summary(self):
+        summary = self.summary()
+        if summary['turns']:
+            print(f"[Commands] {summary['local']}/{summary['turns']} turns handled locally "
+                  f"({summary['local_fraction']:.0%}), {summary['low_confidence']} sent to the model on low confidence")
@@ -0,0 +1,140 @@
+import os
+import time
+import sqlite3
+import datetime
+import threading
+from collections import deque, OrderedDict
+from config.settings import Config
+
+
+class ConversationStore:
+    """
+    Chat history that survives restarts and doesn't grow in memory.
+    Every message goes to an append-only SQLite log, the newest ones also sit in a
+    ring buffer and older ones are paged in (and out again) when you scroll back.
+    Acts enough like a list (len, [i], [a:b]) that the chat panel doesn't care.
+    """
+    
+    def __init__(self, path=None, ring_size=None, page_size=None, cached_pages=None):
+        self.path = path or Config.CHAT_DB
+        self.page_size = page_size or Config.CHAT_PAGE_SIZE
+        self.cached_pages = cached_pages or Config.CHAT_CACHED_PAGES
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        
+        self.lock = threading.Lock()
+        # in the app only the main thread touches it (the worker's messages come in as events),
+        # check_same_thread is off so a store made on one thread still works from another
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS messages ("
+                        "id INTEGER PRIMARY KEY, role TEXT NOT NULL, text TEXT NOT NULL, "
+                        "time TEXT NOT NULL, ts REAL NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS messages_ts ON messages (ts)")
+        self.db.commit()
+        
+        # ids run 1..count with no gaps, so list index i is id i + 1
+        self.count = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0]
+        self.recent = deque(maxlen=ring_size or Config.CHAT_RING_SIZE)
+        self.pages = OrderedDict()  # page number -> list of messages, most recent use last
+        self.stats = {'page_loads': 0, 'page_hits': 0}
+        
+        # pick up where the last session left off
+        first = max(0, self.count - self.recent.maxlen)
+        for row in self._rows(first, self.count):
+            self.recent.append(row)
+    
+    @staticmethod
+    def _message(row):
+        return {'id': row[0], 'role': row[1], 'text': row[2], 'time': row[3]}
+    
+    def _rows(self, start, stop):
+        """Messages [start, stop) straight from disk"""
+        rows = self.db.execute("SELECT id, role, text, time FROM messages WHERE id > ? AND id <= ? ORDER BY id",
+                               (start, stop)).fetchall()
+        return [self._message(row) for row in rows]
+    
+    def append(self, role, text, commit=True):
+        """Adds a message and hands back its dict (same fields the chat panel always used)"""
+        now = time.time()
+        with self.lock:
+            message = {'id': self.count + 1, 'role': role, 'text': text,
+                       'time': datetime.datetime.fromtimestamp(now).strftime('%H:%M')}
+            self.db.execute("INSERT INTO messages (id, role, text, time, ts) VALUES (?, ?, ?, ?, ?)",
+                            (message['id'], role, text, message['time'], now))
+            if commit:
+                self.db.commit()
+            self.count += 1
+            self.recent.append(message)
+        return message
+    
+    def update(self, message):
+        """Writes back a message whose text changed after it was added (streamed replies)"""
+        with self.lock:
+            self.db.execute("UPDATE messages SET text = ? WHERE id = ?", (message['text'], message['id']))
+            self.db.commit()
+            self.pages.clear()
+    
+    def commit(self):
+        with self.lock:
+            self.db.commit()
+    
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+    
+    def __len__(self):
+        return self.count
+    
+    def _page(self, number):
+        page = self.pages.get(number)
+        if page is not None:
+            self.pages.move_to_end(number)
+            self.stats['page_hits'] += 1
+            return page
+        page = self._rows(number * self.page_size, (number + 1) * self.page_size)
+        self.stats['page_loads'] += 1
+        if len(page) < self.page_size:
+            return page  # the page still has room, don't keep a short copy of it
+        self.pages[number] = page
+        while len(self.pages) > self.cached_pages:
+            self.pages.popitem(last=False)
+        return page
+    
+    def slice(self, start, stop):
+        """Messages [start, stop), from the ring buffer when they're recent, paged in when not"""
+        with self.lock:
+            start = max(0, start)
+            stop = min(self.count, stop)
+            ring_start = self.count - len(self.recent)
+            out = []
+            index = start
+            while index < min(stop, ring_start):
+                number = index // self.page_size
+                page = self._page(number)
+                offset = index - number * self.page_size
+                take = min(stop, ring_start, (number + 1) * self.page_size) - index
+                out += page[offset:offset + take]
+                index += take
+            if stop > ring_start:
+                # the ring is small and deque indexing walks in from the nearer end
+                out += [self.recent[i - ring_start] for i in range(max(index, ring_start), stop)]
+            return out
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.count)
+            items = self.slice(start, stop)
+            return items[::step] if step != 1 else items
+        if key < 0:
+            key += self.count
+        if not 0 <= key < self.count:
+            raise IndexError("message index out of range")
+        return self.slice(key, key + 1)[0]
+    
+    def __iter__(self):
+        # whole history a page at a time, only for exports and the like
+        for start in range(0, self.count, self.page_size):
+            yield from self.slice(start, start + self.page_size)
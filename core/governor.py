@@ -0,0 +1,78 @@
+import time
+import pygame
+from config.settings import Config
+
+# worker threads post this when something on screen changed, so the loop wakes up right away
+WAKE_EVENT = pygame.event.custom_type()
+
+
+class FrameGovernor:
+    """
+    Picks the frame rate from what the app is doing instead of ticking at 60 forever.
+    Full speed while talking/thinking or dragging, slower when idle or listening,
+    and barely anything when the window is minimized or in the background.
+    Sleeps on the SDL event queue, so input or a state change wakes it immediately.
+    """
+    
+    def __init__(self):
+        self.focused = True
+        self.minimized = False
+        self.last_frame = time.perf_counter()
+    
+    @staticmethod
+    def wake():
+        """Safe to call from any thread"""
+        try:
+            pygame.event.post(pygame.event.Event(WAKE_EVENT))
+        except pygame.error:
+            pass  # display not up (yet / anymore)
+    
+    def handle_event(self, event):
+        """Tracks focus/minimize from SDL window events. True means the window just came back."""
+        if event.type == pygame.WINDOWFOCUSGAINED:
+            self.focused = True
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            self.focused = False
+        elif event.type in (pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN):
+            self.minimized = True
+        elif event.type in (pygame.WINDOWRESTORED, pygame.WINDOWSHOWN, pygame.WINDOWEXPOSED):
+            was_minimized = self.minimized
+            self.minimized = False
+            return was_minimized or event.type == pygame.WINDOWEXPOSED
+        return False
+    
+    def target_fps(self, mode, dragging=False):
+        if not Config.ADAPTIVE_FPS:
+            return Config.FPS
+        if self.minimized:
+            return Config.HIDDEN_FPS
+        if dragging:
+            return Config.FPS
+        active = mode in ("speaking", "thinking")
+        if not self.focused:
+            # still on screen while it talks, so don't make it look choppy
+            return Config.IDLE_FPS if active else Config.BACKGROUND_FPS
+        return Config.FPS if active else Config.IDLE_FPS
+    
+    def wait(self, fps):
+        """
+        Waits until the next frame is due or an event shows up, whichever is first.
+        Returns (events, dt). dt is capped so physics doesn't explode after a long sleep.
+        """
+        events = []
+        remaining = self.last_frame + 1.0 / fps - time.perf_counter()
+        # event.wait(0) means forever, so only wait if it's at least a millisecond
+        if remaining >= 0.001:
+            event = pygame.event.wait(int(remaining * 1000))
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+                # woken early, but don't let a mouse wiggle push us past the full frame rate
+                early = self.last_frame + 1.0 / Config.FPS - time.perf_counter()
+                if early > 0:
+                    time.sleep(early)
+        events += pygame.event.get()
+        
+        now = time.perf_counter()
+        dt = min(now - self.last_frame, Config.MAX_FRAME_DT)
+        self.last_frame = now
+        return events, dt
@@ -0,0 +1,180 @@
+import re
+from collections import deque
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+_SLOT = re.compile(r"^\{(\w+)\}$")
+
+
+def tokenize(text):
+    """Lowercase words, so matching is always on whole words ("play" never hits "display")"""
+    return _TOKEN.findall(text.lower())
+
+
+class Intent:
+    """
+    One local command.
+    phrases: trigger phrases, matched as whole words anywhere in what was said.
+             A trailing {slot} grabs the rest of the sentence ("play {song}").
+    slots:   name -> vocabulary (list or dict keys) that also has to show up somewhere,
+             e.g. open + one of the known sites.
+    handler: called as handler(text, slots) when this intent wins.
+    priority: higher wins when several intents match.
+    """
+    
+    def __init__(self, name, phrases, handler, slots=None, priority=0):
+        self.name = name
+        self.phrases = phrases
+        self.handler = handler
+        self.slots = {slot: list(values) for slot, values in (slots or {}).items()}
+        self.priority = priority
+    
+    def __repr__(self):
+        return f"Intent({self.name!r})"
+
+
+class IntentMatch:
+    def __init__(self, intent, slots, start, end):
+        self.intent = intent
+        self.slots = slots
+        self.start = start
+        self.end = end
+    
+    def __repr__(self):
+        return f"IntentMatch({self.intent.name!r}, {self.slots!r})"
+
+
+class IntentRouter:
+    """
+    Compiles every intent's phrases and slot words into one token-level Aho-Corasick
+    automaton, so a single pass over the words finds every trigger at once and the
+    cost doesn't grow with the number of commands.
+    """
+    
+    def __init__(self, intents=()):
+        self.intents = []
+        for intent in intents:
+            self.add(intent)
+    
+    def add(self, intent):
+        self.intents.append(intent)
+        self._compiled = False
+    
+    def _compile(self):
+        # trie nodes: goto (token -> node), fail link, outputs [(kind, intent index, payload, length)]
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self.keywords = []  # (tokens, kind, intent, payload) for the conflict report
+        
+        for idx, intent in enumerate(self.intents):
+            for phrase in intent.phrases:
+                tokens = phrase.split()
+                rest = None
+                if tokens and _SLOT.match(tokens[-1]):
+                    rest = _SLOT.match(tokens.pop()).group(1)
+                self._insert([t for word in tokens for t in tokenize(word)], 'trigger', idx, rest)
+            for slot, values in intent.slots.items():
+                for value in values:
+                    self._insert(tokenize(value), 'slot', idx, (slot, value))
+        
+        # classic BFS to fill in the failure links
+        queue = deque()
+        for node in self._goto[0].values():
+            queue.append(node)
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._compiled = True
+    
+    def _insert(self, tokens, kind, idx, payload):
+        if not tokens:
+            return
+        node = 0
+        for token in tokens:
+            nxt = self._goto[node].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((kind, idx, payload, len(tokens)))
+        self.keywords.append((tuple(tokens), kind, self.intents[idx], payload))
+    
+    def _scan(self, tokens):
+        """Every keyword hit in one pass: (kind, intent index, payload, start, end)"""
+        hits = []
+        node = 0
+        for i, token in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for kind, idx, payload, length in self._out[node]:
+                hits.append((kind, idx, payload, i + 1 - length, i + 1))
+        return hits
+    
+    def match(self, text):
+        """Best matching intent for what was said, or None (then it's the brain's turn)"""
+        if not self._compiled:
+            self._compile()
+        words = list(_TOKEN.finditer(text.lower()))
+        tokens = [word.group(0) for word in words]
+        hits = self._scan(tokens)
+        if not hits:
+            return None
+        
+        # slot words found anywhere, first one wins per slot
+        found_slots = {}
+        for kind, idx, payload, start, end in hits:
+            if kind == 'slot':
+                found_slots.setdefault(idx, {}).setdefault(payload[0], payload[1])
+        
+        best = None
+        for kind, idx, payload, start, end in hits:
+            if kind != 'trigger':
+                continue
+            intent = self.intents[idx]
+            slots = dict(found_slots.get(idx, {}))
+            if len(slots) < len(intent.slots):
+                continue  # "open" with no known site isn't ours
+            if payload:
+                if end == len(tokens):
+                    continue  # "play" with nothing after it
+                # the rest as it was said, hyphens and all
+                slots[payload] = text[words[end].start():].strip()
+            
+            # priority first, then earliest in the sentence, then the longest phrase
+            rank = (intent.priority, -start, end - start)
+            if best is None or rank > best[0]:
+                best = (rank, IntentMatch(intent, slots, start, end))
+        return best[1] if best else None
+    
+    def conflicts(self):
+        """
+        Pairs of keywords from different intents where one contains the other (or they're
+        equal), i.e. places where the winner is decided by priority rather than the words.
+        """
+        if not self._compiled:
+            self._compile()
+        report = []
+        for i, (tokens_a, kind_a, intent_a, _) in enumerate(self.keywords):
+            for tokens_b, kind_b, intent_b, _ in self.keywords[i + 1:]:
+                if intent_a is intent_b:
+                    continue
+                short, long_ = (tokens_a, tokens_b) if len(tokens_a) <= len(tokens_b) else (tokens_b, tokens_a)
+                n = len(short)
+                if any(long_[k:k + n] == short for k in range(len(long_) - n + 1)):
+                    winner = max((intent_a, intent_b), key=lambda intent: intent.priority)
+                    report.append({
+                        'a': (intent_a.name, " ".join(tokens_a), kind_a),
+                        'b': (intent_b.name, " ".join(tokens_b), kind_b),
+                        'winner': winner.name if intent_a.priority != intent_b.priority else None,
+                    })
+        return report
@@ -0,0 +1,160 @@
+import re
+import time
+import threading
+from collections import deque
+from config.settings import Config
+from utils.tracing import tracer
+
+
+def _norm(text):
+    return " ".join(re.findall(r"[a-z0-9']+", (text or "").lower()))
+
+
+class Speculation:
+    """What we worked out from a partial transcript, waiting to see if the final one agrees"""
+    
+    def __init__(self, text):
+        self.text = text
+        self.started = time.perf_counter()
+        self.match = None  # IntentMatch from the router
+        self.command = None  # LocalCommand from the system command parser
+        self.prefetch = None  # speculative Brain request
+        self.took = 0.0  # seconds spent matching/parsing
+    
+    @property
+    def kind(self):
+        return 'router' if self.match else 'local' if self.command else 'brain' if self.prefetch else 'none'
+    
+    def cancel(self):
+        if self.prefetch:
+            self.prefetch.cancel()
+
+
+class Speculator:
+    """
+    Gets a head start on what you're saying while you're still saying it. Once the partial
+    transcript has stopped changing for SPECULATE_STABLE seconds (you've probably finished,
+    the recognizer just doesn't know yet), it runs the router / local command parser on it
+    and, if neither wants it, warms up the voice and starts a Brain request on the side.
+    Nothing with side effects happens here: the worker only uses the result if the final
+    transcript says the same thing, otherwise it's thrown away (take()).
+    """
+    
+    def __init__(self, router, commands, brain, voice):
+        self.router = router
+        self.commands = commands
+        self.brain = brain
+        self.voice = voice
+        self.changed = threading.Condition()
+        self.partial = None
+        self.partial_at = 0.0
+        self.current = None
+        self.generation = 0  # bumps on every take(), so a guess that finishes late gets dropped
+        self.stats = {'started': 0, 'hits': 0, 'misses': 0, 'superseded': 0, 'no_speculation': 0}
+        self.hits_by_kind = {}
+        self.saved = deque(maxlen=Config.TRACE_SUMMARY_SAMPLES)  # seconds of head start per hit
+        threading.Thread(target=self._run, daemon=True).start()
+    
+    def on_partial(self, text):
+        """Latest partial transcript (ear thread)"""
+        with self.changed:
+            if _norm(text) != _norm(self.partial):
+                self.partial = text
+                self.partial_at = time.monotonic()
+                self.changed.notify()
+    
+    def _run(self):
+        while True:
+            with self.changed:
+                # wait for a partial, then for it to sit still long enough
+                while True:
+                    if self.partial is not None:
+                        wait = self.partial_at + Config.SPECULATE_STABLE - time.monotonic()
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    self.changed.wait(wait)
+                text = self.partial
+                self.partial = None
+                generation = self.generation
+                previous = self.current
+                if previous and _norm(previous.text) == _norm(text):
+                    continue
+                self.current = None
+            if previous:
+                previous.cancel()
+                self.stats['superseded'] += 1
+            speculation = self._speculate(text)
+            with self.changed:
+                if generation == self.generation:
+                    self.current = speculation
+                    continue
+            # the final transcript came in while we were at it
+            speculation.cancel()
+    
+    def _speculate(self, text):
+        speculation = Speculation(text)
+        self.stats['started'] += 1
+        with tracer.span("speculate", text=text):
+            match = self.router.match(text) if self.router else None
+            command = self.commands.parse(text) if self.commands and not match else None
+            speculation.took = time.perf_counter() - speculation.started
+            if match:
+                speculation.match = match
+                return speculation
+            if command and command.tool in self.commands.tool_map and command.confidence >= self.commands.min_confidence:
+                speculation.command = command
+                return speculation
+            try:
+                self.voice.prepare()
+                if Config.SPECULATE_LLM and Config.LLM_STREAMING and hasattr(self.brain, 'prefetch'):
+                    speculation.prefetch = self.brain.prefetch(text)
+            except Exception as e:
+                print(f"[Speculator] Error: {e}")
+        return speculation
+    
+    def take(self, text):
+        """
+        The final transcript is in (worker thread). Hands back the speculation if it guessed
+        this exact sentence, otherwise cancels whatever was going and returns None.
+        """
+        with self.changed:
+            speculation = self.current
+            self.current = None
+            self.partial = None
+            self.generation += 1
+        if speculation is None:
+            self.stats['no_speculation'] += 1
+            return None
+        if _norm(speculation.text) != _norm(text):
+            speculation.cancel()
+            self.stats['misses'] += 1
+            return None
+        
+        self.stats['hits'] += 1
+        kind = speculation.kind
+        self.hits_by_kind[kind] = self.hits_by_kind.get(kind, 0) + 1
+        # how much of the wait for gemini's first words was over before we'd normally have asked
+        now = time.perf_counter()
+        prefetch = speculation.prefetch
+        if prefetch:
+            self.saved.append(min(now, prefetch.first_piece_at or now) - prefetch.started)
+        else:
+            self.saved.append(speculation.took)
+        return speculation
+    
+    def summary(self):
+        stats = dict(self.stats)
+        guesses = stats['hits'] + stats['misses'] + stats['superseded']
+        stats['hit_rate'] = stats['hits'] / guesses if guesses else 0.0
+        stats['hits_by_kind'] = dict(self.hits_by_kind)
+        stats['saved_ms'] = 1000 * sum(self.saved) / len(self.saved) if self.saved else 0.0
+        return stats
+    
+    def print_summary(self):
+        stats = self.summary()
+        guesses = stats['hits'] + stats['misses'] + stats['superseded']
+        if guesses:
+            print(f"[Speculator] {stats['hits']}/{guesses} guesses right ({stats['hit_rate']:.0%}), "
+                  f"{stats['saved_ms']:.0f}ms head start on average")
@@ -1,11 +1,17 @@
 import google.generativeai as genai
 from config.settings import Config
 from modules.system import SystemController
+from modules.response_cache import ResponseCache
+from modules.context import ContextWindow
+from modules.prefetch import Prefetch, ToolCallRequested
+from utils.tracing import tracer
 
 class Brain:
     """
     The intelligence layer. Connects to Gemini and manages system tools.
     """
+    # what we say when gemini can't be reached (also pre-cached by the voice)
+    FALLBACK_REPLY = "I'm having trouble connecting to my neural network, Sir."
     
     def __init__(self):
         # Fire up the system controller
@@ -21,6 +27,7 @@ class Brain:
             self.sys.mute_volume,
             self.sys.unmute_volume,
             self.sys.set_brightness,
+            self.sys.adjust_brightness,
             self.sys.media_play_pause,
             self.sys.media_next,
             self.sys.media_prev,
@@ -35,8 +42,118 @@ class Brain:
             tools=self.tools
         )
         
-        # Keep chat history for context
-        self.chat_session = self.model.start_chat(enable_automatic_function_calling=True)
+        # Lookup so we can run the tools ourselves (the SDK won't auto-call them when streaming)
+        self.tool_map = {tool.__name__: tool for tool in self.tools}
+        
+        # Keep chat history for context, bounded so old turns don't get re-sent forever
+        self.chat_session = self.model.start_chat()
+        self.summarizer = genai.GenerativeModel(model_name=Config.GEMINI_MODEL)
+        self.context = ContextWindow(self._summarize, self._content)
+        # (turns committed, the history after them), only ever replaced whole by the worker so
+        # prefetch() can read it from the speculator thread while a turn is changing chat_session
+        self.committed = (0, [])
+        
+        # repeated questions get the last answer back without a gemini call
+        self.cache = ResponseCache() if Config.RESPONSE_CACHE else None
+
+    def _run_tools(self, calls, called=None):
+        """Runs the function calls Gemini asked for and packs the results up to send back"""
+        parts = []
+        for call in calls:
+            if called is not None:
+                called.append(call.name)
+            tool = self.tool_map.get(call.name)
+            with tracer.span("brain.tool", tool=call.name):
+                try:
+                    result = tool(**dict(call.args)) if tool else f"Unknown tool {call.name}"
+                except Exception as e:
+                    result = f"Error: {e}"
+            parts.append(genai.protos.Part(function_response=genai.protos.FunctionResponse(
+                name=call.name, response={'result': result})))
+        return parts
+
+    @staticmethod
+    def _content(role, text):
+        return genai.protos.Content(role=role, parts=[genai.protos.Part(text=text)])
+
+    def _summarize(self, prompt):
+        """Plain model call for the context summary (no tools, no persona)"""
+        return self.summarizer.generate_content(prompt).text
+
+    def _commit(self):
+        """End of a turn (worker thread): trims the history and publishes it for prefetch()"""
+        self.context.trim(self.chat_session)
+        self.committed = (self.committed[0] + 1, list(self.chat_session.history))
+    
+    def _rollback(self):
+        """
+        Back to the last committed history after a turn failed halfway. A streamed response
+        that was never read to the end stays in the session and gets every later turn
+        rejected, and rewind() would only drop the last of a tool loop's exchanges.
+        """
+        self.chat_session.history = list(self.committed[1])
+    
+    def _cached_reply(self, user_text):
+        """A cached answer, written into the chat history as if gemini had just said it"""
+        reply = self.cache.get(user_text) if self.cache else None
+        if reply:
+            tracer.mark("brain.cache_hit")
+            self.chat_session.history = self.chat_session.history + [
+                self._content('user', user_text), self._content('model', reply)]
+            self._commit()
+        return reply
+
+    def prefetch(self, user_text):
+        """
+        Starts answering user_text on the side, before we're sure it's what was said.
+        Uses a plain generate_content call on the last committed history, so chat_session is
+        untouched until think_stream() commits it. Gives up if the model wants a tool.
+        """
+        generation, history = self.committed
+        
+        def pieces():
+            with tracer.span("brain.prefetch"):
+                response = self.model.generate_content(history + [self._content('user', user_text)], stream=True)
+                for chunk in response:
+                    for part in chunk.parts:
+                        if "function_call" in part:
+                            raise ToolCallRequested(part.function_call.name)
+                        if part.text:
+                            yield part.text
+        
+        return Prefetch(user_text, pieces, generation)
+
+    def _from_prefetch(self, user_text, prefetch):
+        """Replays a speculative reply and writes the turn into the history. False if it was no use."""
+        if self.committed[0] != prefetch.generation:
+            # the conversation moved on since it started
+            prefetch.cancel()
+            return False
+        pieces = []
+        whole = True
+        try:
+            for piece in prefetch.stream():
+                pieces.append(piece)
+                yield piece
+        except Exception as e:
+            if not pieces:
+                # tool call or error before it said anything, ask for real
+                return False
+            # half an answer is already out loud (then it wanted a tool, or the request died),
+            # so that's what the history has to say, just not something to cache
+            print(f"Brain Error: {e}")
+            whole = False
+        reply = "".join(pieces)
+        self.chat_session.history = self.chat_session.history + [
+            self._content('user', user_text), self._content('model', reply)]
+        if self.cache and whole:
+            self.cache.put(user_text, reply)
+        self._commit()
+        return True
+
+    @staticmethod
+    def _function_calls(response):
+        return [part.function_call for part in response.parts if "function_call" in part]
 
     def think(self, user_text, visualizer=None):
         """
@@ -44,11 +161,78 @@ class Brain:
         """
         if visualizer:
             visualizer.mode = "thinking"
+        
+        cached = self._cached_reply(user_text)
+        if cached:
+            return cached
             
+        called = []
         try:
-            # Send message to Gemini
-            response = self.chat_session.send_message(user_text)
+            # Send message to Gemini, then keep feeding it tool results until it actually answers
+            with tracer.span("brain.request"):
+                response = self.chat_session.send_message(user_text)
+            calls = self._function_calls(response)
+            while calls:
+                parts = self._run_tools(calls, called)
+                with tracer.span("brain.request", tool_results=len(parts)):
+                    response = self.chat_session.send_message(parts)
+                calls = self._function_calls(response)
+            if self.cache:
+                self.cache.put(user_text, response.text, called)
+            self._commit()
             return response.text
         except Exception as e:
             print(f"Brain Error: {e}")
-            return "I'm having trouble connecting to my neural network, Sir."
+            self._rollback()
+            return self.FALLBACK_REPLY
+
+    def think_stream(self, user_text, visualizer=None, prefetch=None):
+        """
+        Same as think() but yields the reply in pieces as Gemini sends them.
+        prefetch is a speculative request for the same text (see prefetch()), used if it worked out.
+        """
+        if visualizer:
+            visualizer.mode = "thinking"
+        
+        cached = self._cached_reply(user_text)
+        if cached:
+            if prefetch:
+                prefetch.cancel()
+            yield cached
+            return
+        if prefetch and (yield from self._from_prefetch(user_text, prefetch)):
+            return
+        
+        said_something = False
+        pieces = []
+        called = []
+        try:
+            request = tracer.begin("brain.request", stream=True)
+            response = self.chat_session.send_message(user_text, stream=True)
+            while True:
+                calls = []
+                # reading the whole stream is also what commits the turn to the chat history
+                for chunk in response:
+                    for part in chunk.parts:
+                        if "function_call" in part:
+                            calls.append(part.function_call)
+                        elif part.text:
+                            if not said_something:
+                                tracer.mark("brain.first_token")
+                            said_something = True
+                            pieces.append(part.text)
+                            yield part.text
+                request.end()
+                if not calls:
+                    if self.cache:
+                        self.cache.put(user_text, "".join(pieces), called)
+                    self._commit()
+                    return
+                parts = self._run_tools(calls, called)
+                request = tracer.begin("brain.request", stream=True, tool_results=len(parts))
+                response = self.chat_session.send_message(parts, stream=True)
+        except Exception as e:
+            print(f"Brain Error: {e}")
+            self._rollback()
+            if not said_something:
+                yield self.FALLBACK_REPLY
@@ -0,0 +1,139 @@
+import threading
+from config.settings import Config
+from utils.tracing import tracer
+
+SUMMARY_PROMPT = """Condense this conversation between a user and their assistant NERO into a short
+summary (under {words} words) of what is worth remembering: facts about the user, requests,
+decisions and open questions. Plain sentences, no preamble.
+
+Summary so far:
+{summary}
+
+Newer conversation:
+{turns}"""
+
+SUMMARY_PREFIX = "Summary of our earlier conversation: "
+SUMMARY_ACK = "Understood, Sir."
+MAX_PENDING = 100  # dropped turns waiting on the summarizer
+
+
+def estimate_tokens(content):
+    """Rough token count for one history entry (~4 characters a token)"""
+    chars = 0
+    for part in content.parts:
+        if "function_call" in part:
+            chars += len(part.function_call.name) + len(str(dict(part.function_call.args)))
+        elif "function_response" in part:
+            chars += len(part.function_response.name) + len(str(part.function_response.response))
+        else:
+            chars += len(part.text)
+    return chars // 4 + 1
+
+
+def split_turns(history):
+    """Groups a flat history into turns, each starting at a message the user actually typed/said"""
+    turns = []
+    for content in history:
+        said = content.role == 'user' and not any("function_response" in part for part in content.parts)
+        if said or not turns:
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def turn_text(turn):
+    """One turn as plain lines for the summarizer"""
+    lines = []
+    for content in turn:
+        for part in content.parts:
+            if "function_call" in part:
+                lines.append(f"(NERO used {part.function_call.name})")
+            elif "function_response" in part:
+                continue
+            elif part.text:
+                lines.append(f"{'User' if content.role == 'user' else 'NERO'}: {part.text}")
+    return "\n".join(lines)
+
+
+class ContextWindow:
+    """
+    Keeps the chat history Brain re-sends on every request bounded. The last few turns
+    stay word for word, anything older is dropped from the history and folded into a
+    short summary that sits at the front as one user/model exchange. The summary is
+    rewritten on a background thread, so requests never wait for it.
+    """
+    
+    def __init__(self, summarize, make_content, max_turns=None, max_tokens=None):
+        # summarize(prompt) -> text, make_content(role, text) -> a history entry
+        self.summarize = summarize
+        self.make_content = make_content
+        self.max_turns = max_turns or Config.CONTEXT_TURNS
+        self.max_tokens = max_tokens or Config.CONTEXT_MAX_TOKENS
+        
+        self.lock = threading.Lock()
+        self.summary = ""
+        self.pending = []  # text of dropped turns the summary doesn't cover yet
+        self.summarizing = False
+        self.stats = {'turns_folded': 0, 'summaries': 0, 'summary_errors': 0, 'history_tokens': 0}
+    
+    def _summary_pair(self):
+        return [self.make_content('user', SUMMARY_PREFIX + self.summary),
+                self.make_content('model', SUMMARY_ACK)]
+    
+    def trim(self, chat_session):
+        """Call after every finished turn, on the thread that talks to gemini"""
+        history = list(chat_session.history)
+        current = ""
+        if history and history[0].role == 'user' and history[0].parts and \
+                history[0].parts[0].text.startswith(SUMMARY_PREFIX):
+            current = history[0].parts[0].text[len(SUMMARY_PREFIX):]
+            history = history[2:]
+        turns = split_turns(history)
+        
+        # newest turns first until we hit either limit (always keep the latest one)
+        keep = 0
+        tokens = 0
+        for turn in reversed(turns):
+            turn_tokens = sum(estimate_tokens(content) for content in turn)
+            if keep and (keep >= self.max_turns or tokens + turn_tokens > self.max_tokens):
+                break
+            keep += 1
+            tokens += turn_tokens
+        dropped, kept = turns[:len(turns) - keep], turns[len(turns) - keep:]
+        
+        with self.lock:
+            if dropped:
+                # if the summarizer keeps failing, only the newest dropped turns are worth retrying
+                self.pending = (self.pending + [turn_text(turn) for turn in dropped])[-MAX_PENDING:]
+                self.stats['turns_folded'] += len(dropped)
+            if self.pending and not self.summarizing:
+                self.summarizing = True
+                job = (self.summary, self.pending)
+                self.pending = []
+                threading.Thread(target=self._summarize, args=job, daemon=True).start()
+            changed = self.summary != current
+            summary = self._summary_pair() if self.summary else []
+            self.stats['history_tokens'] = tokens + sum(estimate_tokens(content) for content in summary)
+        
+        if dropped or changed:
+            chat_session.history = summary + [content for turn in kept for content in turn]
+    
+    def _summarize(self, summary, turns):
+        """Background job, folds the dropped turns into the summary"""
+        try:
+            with tracer.span("context.summarize", turns=len(turns)):
+                prompt = SUMMARY_PROMPT.format(words=Config.CONTEXT_SUMMARY_WORDS,
+                                               summary=summary or "(nothing yet)", turns="\n\n".join(turns))
+                new_summary = self.summarize(prompt).strip()
+            with self.lock:
+                self.summary = new_summary
+                self.stats['summaries'] += 1
+        except Exception as e:
+            print(f"[Context] Error: {e}")
+            with self.lock:
+                # put them back so the next attempt still covers them
+                self.pending = (turns + self.pending)[-MAX_PENDING:]
+                self.stats['summary_errors'] += 1
+        finally:
+            with self.lock:
+                self.summarizing = False
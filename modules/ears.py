@@ -1,27 +1,89 @@
-import speech_recognition as sr
+from config.settings import Config
+from modules.mic import MicSource, CaptureStream
+from modules.wake import WakeWord
+from modules.stt import make_backend
+from utils.tracing import tracer
 
 class Ears:
-    def __init__(self):
-        self.recognizer = sr.Recognizer()
-        # threshold for background noise
-        self.recognizer.energy_threshold = 300
-        self.recognizer.dynamic_energy_threshold = True
+    def __init__(self, source=None, backend=None):
+        # google by default, anything with the STTBackend methods works (see modules/stt.py)
+        self.backend = backend or make_backend()
+        # mic (or a WavSource) is opened once and stays open, see CaptureStream
+        self.source = source
+        self.stream = None
+        # local "Nero" check so random office chatter never reaches google
+        self.wake = WakeWord() if Config.WAKE_WORD else None
     
-    def listen(self, visualizer=None):
+    @property
+    def streaming(self):
+        """Whether listen() hands out partial transcripts (the wake word needs the whole utterance first)"""
+        return self.backend.streaming and not self.wake
+    
+    def start(self):
+        """Opens the mic and starts listening in the background (listen() does this too)"""
+        if self.stream is None or (not self.stream.running and self.source is None):
+            # first time, or the mic fell over and needs reopening
+            self.stream = CaptureStream(self.source or MicSource()).start()
+            # the wake word needs the whole utterance before anything can go out
+            self.stream.emit_chunks = self.streaming
+        return self.stream
+    
+    def close(self):
+        if self.stream:
+            self.stream.stop()
+            self.stream = None
+    
+    def listen(self, visualizer=None, on_captured=None, on_partial=None, mic_open=None, on_barge_in=None,
+               on_speech=None):
+        """
+        Next thing said as text, None if nothing (useful) was heard. With a streaming
+        backend on_partial gets the running guess while you're still talking. mic_open is a
+        threading.Event; whatever is heard while it's clear (Nero talking) is dropped, unless
+        on_barge_in is given: then loud enough speech still comes through and it's called
+        as soon as it starts. on_speech is called when speech starts.
+        """
         if visualizer:
             visualizer.set_mode("listening")
+        session = None
         try:
-            with sr.Microphone() as source:
-                # adjust for room noise quickly
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.3)
-                audio = self.recognizer.listen(source, timeout=6, phrase_time_limit=12)
-                if visualizer:
-                    visualizer.set_mode("thinking")
-                # ship it to google for recognition
-                text = self.recognizer.recognize_google(audio)
-                return text.lower().strip()
-        except:
+            stream = self.start()
+            stream.mic_open = mic_open
+            stream.barge_in = on_barge_in is not None
+            # no flush here: the stream already drops what it hears while mic_open is clear,
+            # so anything queued up is the user talking while we were busy recognizing
+            
+            def on_chunk(chunk):
+                nonlocal session
+                if session is None:
+                    session = self.backend.session(stream.source.sample_rate, stream.source.sample_width, on_partial)
+                session.feed(chunk)
+            
+            with tracer.span("ears.capture"):
+                utterance = stream.next_utterance(timeout=Config.LISTEN_TIMEOUT,
+                                                  on_chunk=on_chunk if stream.emit_chunks else None,
+                                                  on_barge_in=on_barge_in, on_speech=on_speech)
+            if utterance is None:
+                return None
+            if self.wake:
+                with tracer.span("ears.wake_word"):
+                    utterance = self.wake.gate(utterance)
+                if utterance is None:
+                    return None
+            if visualizer:
+                visualizer.set_mode("thinking")
+            if on_captured:
+                on_captured()
+            # streamed already? then it's just the final result, otherwise the whole thing in one go
+            with tracer.span("ears.recognize", backend=self.backend.name, streamed=session is not None):
+                text = session.finish() if session else self.backend.recognize(utterance)
+            session = None
+            return text.lower().strip() if text else None
+        except Exception as e:
+            # no mic, the device went away, the recognizer fell over
+            print(f"[Ears] Error: {e}")
             return None
         finally:
+            if session:
+                session.cancel()
             if visualizer:
                 visualizer.set_mode("idle")
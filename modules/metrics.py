@@ -0,0 +1,250 @@
+import time
+import array
+import threading
+import psutil
+from config.settings import Config
+
+# one number per sample each, all in the same slot so index i is the same moment everywhere
+SERIES = ('time', 'cpu', 'memory', 'memory_used', 'disk_read', 'disk_write', 'net_sent', 'net_recv')
+
+
+class RingBuffer:
+    """A fixed number of floats in one preallocated array, the oldest get overwritten"""
+    
+    def __init__(self, size):
+        self.data = array.array('d', [0.0]) * size
+        self.size = size
+        self.next = 0
+        self.count = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def append(self, value):
+        self.data[self.next] = value
+        self.next = (self.next + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+    
+    def latest(self):
+        return self.data[self.next - 1] if self.count else None
+    
+    def values(self, last=None):
+        """Oldest first, just the newest `last` of them if given"""
+        n = self.count if last is None else min(last, self.count)
+        if n <= 0:
+            return []
+        start = (self.next - n) % self.size
+        if start + n <= self.size:
+            return self.data[start:start + n].tolist()
+        return (self.data[start:] + self.data[:start + n - self.size]).tolist()
+
+
+def _total(times):
+    """All of a core's cpu time. On linux guest/guest_nice are already counted in user/nice"""
+    return sum(times) - getattr(times, 'guest', 0) - getattr(times, 'guest_nice', 0)
+
+
+def _duration(seconds):
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        seconds = max(1, round(seconds))
+        return f"{seconds} second{'s' if seconds != 1 else ''}"
+    if minutes < 60:
+        return f"{minutes} minute{'s' if minutes != 1 else ''}"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} hour{'s' if hours != 1 else ''}" + (f" {minutes} minutes" if minutes else "")
+
+
+def _size(size):
+    if size >= 1024 ** 3:
+        return f"{size / 1024 ** 3:.1f} GB"
+    return f"{size / 1024 ** 2:.0f} MB"
+
+
+class MetricsSampler:
+    """
+    Watches the machine in the background so the health tool has history to talk about
+    instead of one cpu_percent() reading (which is 0.0 the first time and only covers the gap
+    since the previous call after that). Every interval it records CPU (total and per core),
+    memory, disk and network rates into ring buffers; every few samples it also walks the
+    process list for the heaviest apps. health() only reads what's already there.
+    """
+    
+    def __init__(self, interval=None, history=None, top=None):
+        self.interval = interval or Config.METRICS_INTERVAL
+        size = history or Config.METRICS_HISTORY
+        self.top = top or Config.METRICS_TOP_PROCESSES
+        self.lock = threading.Lock()
+        self.series = {name: RingBuffer(size) for name in SERIES}
+        self.cores = [RingBuffer(size) for _ in range(psutil.cpu_count() or 1)]
+        self.cost = RingBuffer(size)  # cpu seconds the sampler itself spent on each sample
+        self.memory_total = psutil.virtual_memory().total
+        self.top_memory = []  # [(name, rss bytes, % of the machine's cpu)], heaviest first
+        self.top_cpu = []
+        self.samples = 0
+        self.walks = 0
+        self.walk_cost = 0.0  # cpu seconds spent walking processes, out of the total in self.cost
+        self.last = None  # counters from the previous sample, everything is a rate against them
+        self.stop_event = threading.Event()
+        self.thread = None
+    
+    def start(self):
+        if self.thread is None:
+            # the first sample needs something to diff against
+            self.last = self._counters()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        return self
+    
+    def stop(self):
+        self.stop_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+    
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"[Metrics] Error: {e}")
+    
+    @staticmethod
+    def _counters():
+        disk = psutil.disk_io_counters()  # None in some containers / VMs
+        net = psutil.net_io_counters()
+        return {'time': time.monotonic(), 'cpu': psutil.cpu_times(percpu=True),
+                'disk': (disk.read_bytes, disk.write_bytes) if disk else (0, 0),
+                'net': (net.bytes_sent, net.bytes_recv) if net else (0, 0)}
+    
+    def sample(self):
+        """One reading into the buffers (the thread calls this, it works by hand too)"""
+        started = time.thread_time()
+        now = self._counters()
+        last, self.last = self.last, now
+        elapsed = max(now['time'] - last['time'], 1e-6)
+        
+        # busy share of each core since the last sample, from the raw times so nobody else's
+        # cpu_percent() call can move our baseline
+        cores = []
+        for before, after in zip(last['cpu'], now['cpu']):
+            total = _total(after) - _total(before)
+            idle = (after.idle + getattr(after, 'iowait', 0)) - (before.idle + getattr(before, 'iowait', 0))
+            cores.append(100.0 * (1 - idle / total) if total > 0 else 0.0)
+        memory = psutil.virtual_memory()
+        
+        walk = self.samples % Config.METRICS_PROCESS_EVERY == 0
+        if walk:
+            walk_started = time.thread_time()
+            top_memory, top_cpu = self._processes()
+        
+        with self.lock:
+            row = {'time': now['time'], 'cpu': sum(cores) / len(cores), 'memory': memory.percent,
+                   'memory_used': memory.total - memory.available,
+                   'disk_read': (now['disk'][0] - last['disk'][0]) / elapsed,
+                   'disk_write': (now['disk'][1] - last['disk'][1]) / elapsed,
+                   'net_sent': (now['net'][0] - last['net'][0]) / elapsed,
+                   'net_recv': (now['net'][1] - last['net'][1]) / elapsed}
+            for name, value in row.items():
+                self.series[name].append(value)
+            for buffer, value in zip(self.cores, cores):
+                buffer.append(value)
+            if walk:
+                self.top_memory, self.top_cpu = top_memory, top_cpu
+            self.samples += 1
+        if walk:
+            self.walks += 1
+            self.walk_cost += time.thread_time() - walk_started
+        self.cost.append(time.thread_time() - started)
+    
+    def _processes(self):
+        """Heaviest apps by memory and by cpu, with chrome's dozen processes counted as one chrome"""
+        apps = {}
+        cores = len(self.cores)
+        # process_iter keeps its Process objects between calls, so cpu_percent is since the last walk
+        for process in psutil.process_iter(['name', 'memory_info', 'cpu_percent']):
+            info = process.info
+            if not info['name'] or info['memory_info'] is None:
+                continue
+            name = info['name'].rsplit('.exe', 1)[0].lower()
+            rss, cpu = apps.get(name, (0, 0.0))
+            apps[name] = (rss + info['memory_info'].rss, cpu + (info['cpu_percent'] or 0.0) / cores)
+        rows = [(name, rss, cpu) for name, (rss, cpu) in apps.items()]
+        top_memory = sorted(rows, key=lambda row: row[1], reverse=True)[:self.top]
+        top_cpu = sorted(rows, key=lambda row: row[2], reverse=True)[:self.top]
+        return top_memory, top_cpu
+    
+    def _streak(self, values, times, above):
+        """Seconds the newest values have been above `above` without a break"""
+        start = len(values)
+        while start and values[start - 1] >= above:
+            start -= 1
+        if start == len(values):
+            return 0.0
+        return times[-1] - times[start] + self.interval
+    
+    def health(self):
+        """The health tool's answer from the buffers: now, the trend, anything pegged, the heaviest apps"""
+        with self.lock:
+            if not self.samples:
+                return None
+            window = max(1, int(Config.METRICS_TREND_WINDOW / self.interval))
+            times = self.series['time'].values(window)
+            cpu = self.series['cpu'].values(window)
+            # the whole history for how long it's been maxed out, that can be longer than the window
+            all_times = self.series['time'].values()
+            all_cpu = self.series['cpu'].values()
+            memory = self.series['memory'].values(window)
+            used = self.series['memory_used'].latest()
+            cores = [buffer.latest() for buffer in self.cores]
+            rates = {name: self.series[name].latest() for name in ('disk_read', 'disk_write', 'net_sent', 'net_recv')}
+            top_memory, top_cpu = list(self.top_memory), list(self.top_cpu)
+        
+        span = times[-1] - times[0] + self.interval
+        parts = [f"CPU Usage: {cpu[-1]:.0f}% ({sum(cpu) / len(cpu):.0f}% average over the last {_duration(span)}), "
+                 f"RAM Usage: {memory[-1]:.0f}% ({_size(used)} of {_size(self.memory_total)})."]
+        
+        streak = self._streak(all_cpu, all_times, Config.METRICS_CPU_HIGH)
+        if streak >= Config.METRICS_MIN_TREND:
+            parts.append(f"CPU has been above {Config.METRICS_CPU_HIGH}% for {_duration(streak)}.")
+        elif len(cores) > 1 and max(cores) >= Config.METRICS_CPU_HIGH:
+            parts.append(f"One core is maxed out ({max(cores):.0f}%) while the rest are not.")
+        
+        # memory creeping up (or down) over the window, first third against the last third
+        third = max(1, len(memory) // 3)
+        change = sum(memory[-third:]) / third - sum(memory[:third]) / third
+        if len(memory) >= 3 and abs(change) >= Config.METRICS_MEMORY_TREND:
+            parts.append(f"RAM has gone {'up' if change > 0 else 'down'} {abs(change):.0f} points "
+                         f"in the last {_duration(span)}.")
+        
+        busy = [f"{label} {_size(rates[name])}/s" for name, label in
+                (('disk_read', 'disk reading'), ('disk_write', 'disk writing'),
+                 ('net_recv', 'downloading'), ('net_sent', 'uploading'))
+                if rates[name] >= Config.METRICS_BUSY_IO]
+        if busy:
+            parts.append("Currently " + ", ".join(busy) + ".")
+        
+        if top_memory:
+            name, rss, _ = top_memory[0]
+            parts.append(f"{name} is using {_size(rss)} of memory.")
+        if top_cpu and top_cpu[0][2] >= Config.METRICS_BUSY_CPU:
+            name, _, share = top_cpu[0]
+            parts.append(f"{name} is using {share:.0f}% of the CPU.")
+        return " ".join(parts)
+    
+    def overhead(self):
+        """What watching costs: cpu ms per sample and the share of one core it adds up to"""
+        with self.lock:
+            costs = self.cost.values()
+        if not costs:
+            return None
+        per_sample = sum(costs) / len(costs)
+        return {'samples': self.samples, 'walks': self.walks, 'ms_per_sample': per_sample * 1000,
+                'ms_per_walk': 1000 * self.walk_cost / self.walks if self.walks else 0.0,
+                'core_share': per_sample / self.interval}
+    
+    def print_summary(self):
+        stats = self.overhead()
+        if stats:
+            print(f"[Metrics] {stats['samples']} samples, {stats['ms_per_sample']:.2f}ms cpu each "
+                  f"({stats['ms_per_walk']:.1f}ms per process walk), {stats['core_share']:.3%} of a core")
@@ -0,0 +1,271 @@
+import math
+import time
+import wave
+import queue
+import array
+import threading
+from collections import deque
+from config.settings import Config
+
+# numpy just makes the per-chunk energy cheaper, the plain array path works fine too
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def rms(chunk):
+    """Loudness of one chunk of 16 bit mono PCM"""
+    if not chunk:
+        return 0.0
+    if np is not None:
+        samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+        return float(np.sqrt(np.mean(samples * samples)))
+    samples = array.array('h', chunk)
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class MicSource:
+    """The real microphone, opened once and read chunk by chunk"""
+    
+    sample_width = 2
+    
+    def __init__(self, sample_rate=None, chunk=None):
+        import speech_recognition as sr
+        self.sample_rate = sample_rate or Config.MIC_SAMPLE_RATE
+        self.chunk = chunk or Config.MIC_CHUNK
+        self.mic = sr.Microphone(sample_rate=self.sample_rate, chunk_size=self.chunk)
+        self.stream = self.mic.__enter__().stream
+    
+    def read(self):
+        return self.stream.read(self.chunk)
+    
+    def close(self):
+        self.mic.__exit__(None, None, None)
+
+
+class WavSource:
+    """A 16 bit mono wav played into the stream instead of the mic (benchmarks / testing)"""
+    
+    sample_width = 2
+    
+    def __init__(self, path, chunk=None, realtime=True):
+        self.wav = wave.open(path, 'rb')
+        if self.wav.getsampwidth() != 2 or self.wav.getnchannels() != 1:
+            raise ValueError("wav source needs 16 bit mono audio")
+        self.sample_rate = self.wav.getframerate()
+        self.chunk = chunk or Config.MIC_CHUNK
+        self.realtime = realtime  # False reads as fast as the stream can take it
+        self.started = None
+        self.frames = 0
+    
+    def read(self):
+        """Next chunk, or None once the file runs out"""
+        data = self.wav.readframes(self.chunk)
+        if not data:
+            return None
+        if self.realtime:
+            # hand chunks over at the pace a mic would
+            if self.started is None:
+                self.started = time.perf_counter()
+            self.frames += len(data) // 2
+            wait = self.started + self.frames / self.sample_rate - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        return data
+    
+    def close(self):
+        self.wav.close()
+
+
+class Utterance:
+    """One stretch of speech cut out of the stream. Times are seconds into the stream."""
+    
+    def __init__(self, data, sample_rate, sample_width, start, end, detected):
+        self.data = data
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.start = start  # first chunk of the pre-roll
+        self.end = end
+        self.detected = detected  # when we decided it was speech
+    
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+class CaptureStream:
+    """
+    Keeps the mic open for the whole run. A background thread reads it chunk by chunk,
+    tracks the room's noise floor, and cuts speech out of it with a simple energy VAD.
+    The last bit of audio before speech was detected (pre-roll) goes on the front of every
+    utterance, so the first syllable isn't lost. Finished utterances (and speech starts)
+    come out of `events` as ('speech', stream time) / ('utterance', Utterance), and with
+    emit_chunks on, the audio in between as ('chunk', bytes) for streaming recognizers.
+    With barge_in on, speech that's clearly louder than Nero's own voice still gets through
+    while the mic is muted, announced by a ('barge_in', stream time) right before its 'speech'.
+    """
+    
+    def __init__(self, source):
+        self.source = source
+        self.events = queue.Queue()
+        self.chunk_seconds = source.chunk / source.sample_rate
+        self.pre_roll = deque(maxlen=max(1, round(Config.MIC_PRE_ROLL / self.chunk_seconds)))
+        self.start_chunks = max(1, round(Config.VAD_START / self.chunk_seconds))
+        self.barge_in_chunks = max(1, round(Config.BARGE_IN_MIN_SPEECH / self.chunk_seconds))
+        self.silence_chunks = max(1, round(Config.VAD_SILENCE / self.chunk_seconds))
+        self.max_chunks = max(1, round(Config.PHRASE_TIME_LIMIT / self.chunk_seconds))
+        
+        self.noise_floor = None
+        self.position = 0  # chunks read so far
+        self.speech = None  # chunks of the utterance in progress
+        self.run_length = 0  # loud chunks in a row while waiting for speech
+        self.quiet = 0
+        self.speech_start = self.onset = self.detected = None
+        self.emit_chunks = False
+        self.mic_open = None  # threading.Event, while it's clear everything heard is dropped (we're talking)
+        self.barge_in = False  # ...except someone talking over us
+        self.barging = False  # the utterance in progress started as a barge-in
+        self.running = False
+        self.thread = None
+        self.stats = {'chunks': 0, 'utterances': 0, 'flushed': 0}
+        self.detect_latency = deque(maxlen=Config.TRACE_SUMMARY_SAMPLES)  # onset -> detected, seconds
+    
+    def threshold(self):
+        floor = self.noise_floor or 0.0
+        return max(floor * Config.VAD_RATIO, Config.VAD_MIN_ENERGY)
+    
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        return self
+    
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+        self.source.close()
+    
+    def flush(self):
+        """Drops finished utterances nobody picked up yet (stuff said while we were talking)"""
+        while True:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                return
+            self.stats['flushed'] += 1
+    
+    def _run(self):
+        try:
+            while self.running:
+                chunk = self.source.read()
+                if chunk is None:
+                    break
+                self.feed(chunk)
+        except Exception as e:
+            print(f"[Mic] Error: {e}")
+        finally:
+            self.running = False
+            self.events.put(('closed', self.position * self.chunk_seconds))
+    
+    def feed(self, chunk):
+        """One chunk through the VAD (the thread does this, but it works by hand too)"""
+        now = self.position * self.chunk_seconds
+        self.position += 1
+        self.stats['chunks'] += 1
+        muted = self.mic_open is not None and not self.mic_open.is_set()
+        if muted and not (self.barge_in and self.noise_floor is not None):
+            # our own voice, not worth a VAD decision or a noise floor update
+            self.speech = None
+            self.pre_roll.clear()
+            self.run_length = 0
+            return
+        if muted and self.speech and not self.barging:
+            # started before we did, it's cut off now
+            self.speech = None
+            self.pre_roll.clear()
+            self.run_length = 0
+        energy = rms(chunk)
+        if self.noise_floor is None:
+            self.noise_floor = energy
+        threshold = self.threshold()
+        if muted:
+            # Nero is in the room too, only someone clearly louder than it counts
+            threshold *= Config.BARGE_IN_RATIO
+        loud = energy > threshold
+        
+        if not self.speech:
+            self.pre_roll.append(chunk)
+            if not loud:
+                # only quiet chunks move the floor, so talking doesn't raise it (ours included)
+                if not muted:
+                    self.noise_floor += (energy - self.noise_floor) * Config.NOISE_FLOOR_ADAPT
+                self.run_length = 0
+                return
+            self.run_length += 1
+            if self.run_length < (self.barge_in_chunks if muted else self.start_chunks):
+                return
+            # enough loud chunks in a row, it's speech (and it began run_length chunks ago)
+            self.speech = list(self.pre_roll)
+            self.speech_start = (self.position - len(self.speech)) * self.chunk_seconds
+            self.onset = (self.position - self.run_length) * self.chunk_seconds
+            self.detected = now + self.chunk_seconds
+            self.detect_latency.append(self.detected - self.onset)
+            self.pre_roll.clear()
+            self.quiet = 0
+            self.barging = muted
+            if muted:
+                self.events.put(('barge_in', self.onset))
+            self.events.put(('speech', self.onset))
+            if self.emit_chunks:
+                self.events.put(('chunk', b"".join(self.speech)))
+            return
+        
+        self.speech.append(chunk)
+        if self.emit_chunks:
+            self.events.put(('chunk', chunk))
+        self.quiet = 0 if loud else self.quiet + 1
+        if self.quiet >= self.silence_chunks or len(self.speech) >= self.max_chunks:
+            end = self.position * self.chunk_seconds
+            utterance = Utterance(b"".join(self.speech), self.source.sample_rate, self.source.sample_width,
+                                  self.speech_start, end, self.detected)
+            self.speech = None
+            self.barging = False
+            self.run_length = 0
+            self.stats['utterances'] += 1
+            self.events.put(('utterance', utterance))
+    
+    def next_utterance(self, timeout=None, on_chunk=None, on_barge_in=None, on_speech=None):
+        """
+        Waits for the next utterance. timeout is how long to wait for speech to *start*,
+        once it has we wait for it to finish like sr's listen() does. None on timeout/close.
+        on_chunk gets the audio as it comes in (needs emit_chunks), on_barge_in the moment
+        someone starts talking over Nero (needs barge_in), on_speech the moment speech starts.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        started = False
+        while True:
+            wait = None if started or deadline is None else deadline - time.monotonic()
+            if wait is not None and wait <= 0:
+                return None
+            try:
+                kind, value = self.events.get(timeout=wait)
+            except queue.Empty:
+                return None
+            if kind == 'utterance':
+                return value
+            if kind == 'speech':
+                started = True
+                if on_speech:
+                    on_speech()
+            elif kind == 'barge_in':
+                if on_barge_in:
+                    on_barge_in()
+            elif kind == 'chunk':
+                # a chunk left over from before we started waiting is no use on its own
+                if started and on_chunk:
+                    on_chunk(value)
+            elif kind == 'closed':
+                return None
@@ -0,0 +1,59 @@
+import re
+
+# words that end in a dot but don't end the sentence
+_ABBREVIATIONS = {'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g', 'i.e', 'approx', 'a.m', 'p.m'}
+
+# sentence enders, optionally followed by closing quotes/brackets, then whitespace
+_BOUNDARY = re.compile(r'[.!?]+["\')\]]*\s+|\n+')
+
+
+class SentenceSegmenter:
+    """
+    Collects streamed text and hands back whole sentences as soon as they're complete,
+    so the voice can start on sentence one while the model is still writing sentence two.
+    """
+    
+    def __init__(self, min_chars=12):
+        # really short bits ("Sir." / "Yes.") get glued onto the next sentence
+        self.min_chars = min_chars
+        self.buffer = ""
+    
+    def feed(self, text):
+        """Adds a chunk, returns the list of sentences it completed"""
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(self.buffer):
+            candidate = self.buffer[start:match.end()].strip()
+            
+            # "Dr. Smith" shouldn't be split after "Dr."
+            last_word = candidate.rstrip('.!?"\')]').split()[-1].lower() if candidate.split() else ""
+            if candidate.endswith('.') and last_word in _ABBREVIATIONS:
+                continue
+            if len(candidate) < self.min_chars and '\n' not in match.group():
+                continue
+            
+            if candidate:
+                sentences.append(candidate)
+            start = match.end()
+        
+        self.buffer = self.buffer[start:]
+        return sentences
+    
+    def flush(self):
+        """Whatever's left once the stream is done"""
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return [rest] if rest else []
+
+
+def sentences_from_stream(chunks, on_text=None, min_chars=12):
+    """Turns a stream of text chunks into a stream of sentences, on_text sees every raw chunk"""
+    segmenter = SentenceSegmenter(min_chars)
+    for chunk in chunks:
+        if on_text:
+            on_text(chunk)
+        for sentence in segmenter.feed(chunk):
+            yield sentence
+    for sentence in segmenter.flush():
+        yield sentence
@@ -0,0 +1,68 @@
+import time
+import threading
+
+
+class ToolCallRequested(Exception):
+    """The speculative reply wants to run a tool, which only the real turn is allowed to do"""
+
+
+class Prefetch:
+    """
+    A reply being generated on the side, before we know we want it. `pieces` is a function
+    returning the reply text piece by piece; it runs on its own thread and everything it
+    produces is buffered, so whoever commits to it can replay it (and keep reading what's
+    still coming) with stream(). cancel() makes the thread stop at the next piece.
+    """
+    
+    def __init__(self, text, pieces, generation=0):
+        self.text = text
+        self.generation = generation  # how many turns the history had when we started, stale once it moves on
+        self.buffer = []
+        self.error = None
+        self.done = False
+        self.cancelled = False
+        self.ready = threading.Condition()
+        self.started = time.perf_counter()
+        self.first_piece_at = None
+        threading.Thread(target=self._run, args=(pieces,), daemon=True).start()
+    
+    def _run(self, pieces):
+        try:
+            for piece in pieces():
+                with self.ready:
+                    if self.cancelled:
+                        break
+                    if self.first_piece_at is None:
+                        self.first_piece_at = time.perf_counter()
+                    self.buffer.append(piece)
+                    self.ready.notify_all()
+        except Exception as e:
+            with self.ready:
+                self.error = e
+        finally:
+            with self.ready:
+                self.done = True
+                self.ready.notify_all()
+    
+    def cancel(self):
+        with self.ready:
+            self.cancelled = True
+            self.ready.notify_all()
+    
+    def stream(self):
+        """Everything produced so far, then the rest as it arrives. Re-raises whatever the request hit."""
+        index = 0
+        while True:
+            with self.ready:
+                while index >= len(self.buffer) and not self.done and not self.cancelled:
+                    self.ready.wait()
+                pieces = self.buffer[index:]
+                finished = self.done or self.cancelled
+                error = self.error
+            for piece in pieces:
+                yield piece
+            index += len(pieces)
+            if finished and index >= len(self.buffer):
+                if error is not None:
+                    raise error
+                return
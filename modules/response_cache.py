@@ -0,0 +1,98 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from config.settings import Config
+
+_WORD = re.compile(r"[a-z0-9']+")
+# politeness doesn't change the answer
+_NOISE = {'nero', 'hey', 'please', 'ok', 'okay', 'sir', 'so', 'um', 'uh'}
+# these only make sense with what came before, so the answer depends on context
+_CONTEXTUAL = {'it', 'that', 'this', 'those', 'these', 'he', 'she', 'they', 'him', 'her', 'them',
+               'again', 'more', 'why', 'else', 'another', 'previous', 'last', 'same'}
+
+
+class ResponseCache:
+    """
+    Remembers Gemini's answers to things people ask over and over ("who are you",
+    "what can you do"). Keyed on the normalized sentence, entries expire after a TTL and
+    the least recently used go first past the size cap. Turns that ran a tool are never
+    stored since their answers depend on the state of the machine.
+    """
+    
+    def __init__(self, ttl=None, max_items=None):
+        self.ttl = ttl if ttl is not None else Config.RESPONSE_CACHE_TTL
+        self.max_items = max_items if max_items is not None else Config.RESPONSE_CACHE_MAX_ITEMS
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (reply, stored at), most recent last
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stored': 0, 'evictions': 0,
+                      'skipped_contextual': 0, 'skipped_tools': 0}
+        self.skipped_by_tool = {}  # tool name -> turns not cached because of it
+    
+    @staticmethod
+    def key(text):
+        """Normalized sentence, or None if it isn't safe to cache"""
+        words = [w for w in _WORD.findall(text.lower()) if w not in _NOISE]
+        if not words or _CONTEXTUAL.intersection(words):
+            return None
+        return " ".join(words)
+    
+    def get(self, text):
+        """The cached reply, or None"""
+        key = self.key(text)
+        with self.lock:
+            if key is None:
+                self.stats['skipped_contextual'] += 1
+                return None
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            reply, stored = entry
+            if time.monotonic() - stored > self.ttl:
+                del self.entries[key]
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return reply
+    
+    def put(self, text, reply, tools_called=()):
+        """Stores a reply, unless the turn ran tools (volume, cpu usage etc)"""
+        key = self.key(text)
+        if key is None or not reply:
+            return
+        with self.lock:
+            if tools_called:
+                self.stats['skipped_tools'] += 1
+                for name in set(tools_called):
+                    self.skipped_by_tool[name] = self.skipped_by_tool.get(name, 0) + 1
+                return
+            self.entries[key] = (reply, time.monotonic())
+            self.entries.move_to_end(key)
+            self.stats['stored'] += 1
+            while len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+    
+    def summary(self):
+        """Counters plus hit rate, for logging / debugging"""
+        with self.lock:
+            stats = dict(self.stats)
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+            stats['items'] = len(self.entries)
+            stats['skipped_by_tool'] = dict(self.skipped_by_tool)
+        return stats
+    
+    def print_summary(self):
+        stats = self.summary()
+        lookups = stats['hits'] + stats['misses']
+        if lookups:
+            print(f"[ResponseCache] {stats['hits']}/{lookups} hits ({stats['hit_rate']:.0%}), "
+                  f"{stats['skipped_tools']} tool turns not cached, {stats['items']} stored")
@@ -0,0 +1,97 @@
+import pygame
+from config.settings import Config
+
+# numpy does all the heavy lifting here, no numpy = no real spectrum (visualizer fakes it instead)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _band_matrix(n_bins, sample_rate, n_fft, num_bands, low_hz=60.0, high_hz=12000.0):
+    """Averaging weights that fold the FFT bins into log-spaced bands"""
+    high_hz = min(high_hz, sample_rate / 2)
+    edges = np.geomspace(low_hz, high_hz, num_bands + 1)
+    bins = np.round(edges * n_fft / sample_rate).astype(int)
+    
+    weights = np.zeros((n_bins, num_bands))
+    for b in range(num_bands):
+        lo = min(bins[b], n_bins - 1)
+        hi = max(lo + 1, min(bins[b + 1], n_bins))  # low bands can be narrower than a bin
+        weights[lo:hi, b] = 1.0 / (hi - lo)
+    return weights
+
+
+def band_db(samples, sample_rate, num_bands, fps=None):
+    """Mono float PCM as a (frames, num_bands) table of band levels in dB, one row per display frame"""
+    fps = fps or Config.FPS
+    samples = np.asarray(samples, dtype=np.float64)
+    hop = max(1, int(sample_rate / fps))
+    n_fft = 1 << max(8, (2 * hop - 1).bit_length())  # next power of two covering 2 hops
+    
+    num_frames = max(1, int(np.ceil(len(samples) / hop)))
+    padded = np.zeros(num_frames * hop + n_fft)
+    padded[:len(samples)] = samples
+    
+    frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft)[::hop][:num_frames]
+    mags = np.abs(np.fft.rfft(frames * np.hanning(n_fft), axis=1))
+    bands = mags @ _band_matrix(mags.shape[1], sample_rate, n_fft, num_bands)
+    
+    return 20 * np.log10(bands + 1e-9)
+
+
+def levels(db, reference_db=None, floor_db=60.0):
+    """dB table squashed into 0..1, reference_db (the loudest band in it by default) is the top"""
+    reference_db = db.max() if reference_db is None else reference_db
+    return np.clip((db - (reference_db - floor_db)) / floor_db, 0.0, 1.0)
+
+
+def analyze_pcm(samples, sample_rate, num_bands, fps=None, floor_db=60.0):
+    """
+    Turns mono float PCM into a (frames, num_bands) table of 0..1 band levels.
+    One row per display frame so playback just has to index into it.
+    """
+    # log scale relative to the loudest band in the clip
+    return levels(band_db(samples, sample_rate, num_bands, fps), floor_db=floor_db)
+
+
+def sound_db(sound, num_bands, fps=None):
+    """
+    band_db() of an already decoded pygame Sound, None if we can't. For pieces of one reply
+    that get normalised against a shared level instead of each against its own loudest band.
+    """
+    if np is None:
+        return None
+    try:
+        sample_rate = pygame.mixer.get_init()[0]
+        pcm = pygame.sndarray.array(sound)
+    except Exception as e:
+        print(f"[Spectrum] Decode Error: {e}")
+        return None
+    
+    # downmix to mono, the levels end up relative so sample format doesn't matter
+    pcm = pcm.astype(np.float64)
+    if pcm.ndim > 1:
+        pcm = pcm.mean(axis=1)
+    
+    return band_db(pcm, sample_rate, num_bands, fps)
+
+
+def analyze_sound(sound, num_bands, fps=None):
+    """Analyses an already decoded pygame Sound, None if we can't"""
+    db = sound_db(sound, num_bands, fps)
+    return None if db is None else levels(db)
+
+
+def analyze_file(path, num_bands, fps=None):
+    """Decodes an audio file once through the mixer and analyses it, None if we can't"""
+    if np is None:
+        return None
+    try:
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        sound = pygame.mixer.Sound(path)
+    except Exception as e:
+        print(f"[Spectrum] Decode Error: {e}")
+        return None
+    return analyze_sound(sound, num_bands, fps)
@@ -0,0 +1,124 @@
+import time
+from config.settings import Config
+
+
+class STTBackend:
+    """
+    What Ears needs from a speech recognizer. Every backend can do a finished utterance
+    in one go (recognize), streaming ones can also take the audio while it's still being
+    spoken and call on_partial with their best guess so far (session).
+    """
+    
+    name = 'base'
+    streaming = False
+    
+    def recognize(self, utterance):
+        """Text for a whole Utterance, None if nothing was understood"""
+        raise NotImplementedError
+    
+    def session(self, sample_rate, sample_width, on_partial=None):
+        """A StreamingSession for one utterance (streaming backends only)"""
+        raise NotImplementedError
+
+
+class StreamingSession:
+    """One utterance worth of streaming recognition: feed() chunks, then finish()"""
+    
+    def feed(self, chunk):
+        raise NotImplementedError
+    
+    def finish(self):
+        """Final text (None if nothing was understood)"""
+        raise NotImplementedError
+    
+    def cancel(self):
+        pass
+
+
+class GoogleSTT(STTBackend):
+    """The free Google web recognizer from speech_recognition. Batch only, waits for the whole phrase."""
+    
+    name = 'google'
+    
+    def __init__(self):
+        import speech_recognition as sr
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+    
+    def recognize(self, utterance):
+        audio = self.sr.AudioData(utterance.data, utterance.sample_rate, utterance.sample_width)
+        try:
+            return self.recognizer.recognize_google(audio).lower().strip()
+        except self.sr.UnknownValueError:
+            return None
+
+
+class FakeSTT(STTBackend):
+    """
+    Deterministic stand-in for testing offline. Hands back the lines of a transcript in
+    order, one per utterance. Streaming, it reveals the line a word at a time as audio is fed
+    (words_per_second of audio each), and the final result takes `latency` seconds like a
+    network round trip would. A line like "play some music -> play some muse" shows the
+    left side as partials and then finals with the right (a recognizer changing its mind).
+    """
+    
+    name = 'fake'
+    
+    def __init__(self, transcripts, streaming=True, words_per_second=3.0, latency=0.3):
+        self.transcripts = list(transcripts)
+        self.streaming = streaming
+        self.words_per_second = words_per_second
+        self.latency = latency
+    
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """A transcript file next to a wav fixture: one utterance per line"""
+        with open(path, encoding='utf-8') as f:
+            return cls([line.strip() for line in f if line.strip()], **kwargs)
+    
+    def _next(self):
+        """(what the partials say, the final text) for the next utterance"""
+        line = self.transcripts.pop(0) if self.transcripts else ""
+        shown, _, final = line.partition("->")
+        return shown.strip(), (final or shown).strip() or None
+    
+    def recognize(self, utterance):
+        _, final = self._next()
+        time.sleep(self.latency)
+        return final
+    
+    def session(self, sample_rate, sample_width, on_partial=None):
+        return _FakeSession(self, sample_rate * sample_width, on_partial)
+
+
+class _FakeSession(StreamingSession):
+    
+    def __init__(self, backend, bytes_per_second, on_partial):
+        self.backend = backend
+        self.bytes_per_second = bytes_per_second
+        self.on_partial = on_partial
+        shown, self.final = backend._next()
+        self.words = shown.split()
+        self.fed = 0
+        self.shown = 0
+    
+    def feed(self, chunk):
+        self.fed += len(chunk)
+        heard = int(self.fed / self.bytes_per_second * self.backend.words_per_second)
+        heard = min(heard, len(self.words))
+        if heard > self.shown:
+            self.shown = heard
+            if self.on_partial:
+                self.on_partial(" ".join(self.words[:heard]))
+    
+    def finish(self):
+        time.sleep(self.backend.latency)
+        return self.final
+
+
+# what Config.STT_BACKEND can name (FakeSTT needs its transcripts, so it's built by hand)
+BACKENDS = {'google': GoogleSTT}
+
+
+def make_backend(name=None):
+    return BACKENDS[name or Config.STT_BACKEND]()
@@ -1,11 +1,7 @@
 import psutil
-import screen_brightness_control as sbc
-from AppOpener import open as app_open, close as app_close
-from ctypes import cast, POINTER
-from comtypes import CLSCTX_ALL, CoInitialize
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-import win32api
-import win32con
+from config.settings import Config
+from modules.system_backends import make_backend
+from modules.metrics import MetricsSampler
 
 class SystemController:
     """
@@ -14,92 +10,106 @@ class SystemController:
     - Media (Play/Pause/Next)
     - Hardware (Brightness, CPU/RAM)
     - Apps (Open/Close)
+    The OS specific parts live in a backend (modules/system_backends.py), so this loads anywhere.
     """
     
-    def __init__(self):
-        # We don't init audio here because it's thread-dependent.
-        # We will init it on demand in the methods.
-        pass
-
-    def _get_volume_interface(self):
-        """Helper to get the volume interface for the current thread"""
-        try:
-            # Initialize COM for this thread
-            CoInitialize()
-            devices = AudioUtilities.GetSpeakers()
-            interface = devices.Activate(
-                IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-            return cast(interface, POINTER(IAudioEndpointVolume))
-        except Exception as e:
-            print(f"[System] API Error: {e}")
-            return None
+    def __init__(self, backend=None, metrics=None):
+        # windows / linux picked by OS (Config.SYSTEM_BACKEND), or pass a FakeBackend
+        # device handles are cached per thread in there, not reopened on every call
+        self.backend = backend or make_backend()
+        # keeps a history of cpu/ram/disk/network so health questions get trends, not one reading
+        self.metrics = metrics or (MetricsSampler().start() if Config.METRICS else None)
 
     def set_volume(self, level: int):
         """Sets system volume (0-100)"""
-        volume = self._get_volume_interface()
-        if not volume: return "Audio unavailable"
-        
         # Clamp between 0-100
         level = max(0, min(100, level))
-        scalar = level / 100.0
-        
-        volume.SetMasterVolumeLevelScalar(scalar, None)
+        try:
+            self.backend.set_volume(level)
+        except Exception as e:
+            print(f"[System] API Error: {e}")
+            return "Audio unavailable"
         return f"Volume set to {level}%"
 
     def get_volume(self):
-        volume = self._get_volume_interface()
-        if not volume: return 0
-        return int(volume.GetMasterVolumeLevelScalar() * 100)
+        """Current volume (0-100), None if we couldn't read it"""
+        try:
+            return self.backend.get_volume()
+        except Exception as e:
+            print(f"[System] API Error: {e}")
+            return None
     
     def adjust_volume(self, change: int):
         """Relative volume change (+10, -20 etc)"""
         current = self.get_volume()
+        if current is None:
+            # guessing 0 would turn "a bit louder" into 10%
+            return "Audio unavailable"
         return self.set_volume(current + change)
 
     def mute_volume(self):
-        volume = self._get_volume_interface()
-        if not volume: return
-        volume.SetMute(1, None)
+        try:
+            self.backend.set_mute(True)
+        except Exception as e:
+            print(f"[System] API Error: {e}")
+            return
         return "System muted"
     
     def unmute_volume(self):
-        volume = self._get_volume_interface()
-        if not volume: return
-        volume.SetMute(0, None)
+        try:
+            self.backend.set_mute(False)
+        except Exception as e:
+            print(f"[System] API Error: {e}")
+            return
         return "System unmuted"
 
     def get_brightness(self):
+        """Current brightness (0-100), None if we couldn't read it"""
         try:
-            return sbc.get_brightness()[0]
-        except:
-            return 50 # Default failover
+            return self.backend.get_brightness()
+        except Exception as e:
+            print(f"[System] Brightness Error: {e}")
+            return None
 
     def set_brightness(self, level: int):
         """Sets generic screen brightness"""
         try:
-            sbc.set_brightness(level)
+            self.backend.set_brightness(level)
             return f"Brightness set to {level}%"
         except Exception as e:
             return f"Could not set brightness: {e}"
 
+    def adjust_brightness(self, change: int):
+        """Relative brightness change (+10, -20 etc)"""
+        current = self.get_brightness()
+        if current is None:
+            # same as the volume, guessing 50 would make "brighter" jump to 60%
+            return "Could not read the brightness"
+        return self.set_brightness(max(0, min(100, current + change)))
+
+    def _media(self, key, done):
+        try:
+            self.backend.media_key(key)
+            return done
+        except Exception as e:
+            return f"Could not reach the media player: {e}"
+
     def media_play_pause(self):
-        win32api.keybd_event(win32con.VK_MEDIA_PLAY_PAUSE, 0, 0, 0)
-        win32api.keybd_event(win32con.VK_MEDIA_PLAY_PAUSE, 0, win32con.KEYEVENTF_KEYUP, 0)
-        return "Toggled media playback"
+        return self._media('play_pause', "Toggled media playback")
 
     def media_next(self):
-        win32api.keybd_event(win32con.VK_MEDIA_NEXT_TRACK, 0, 0, 0)
-        win32api.keybd_event(win32con.VK_MEDIA_NEXT_TRACK, 0, win32con.KEYEVENTF_KEYUP, 0)
-        return "Skipped to next track"
+        return self._media('next', "Skipped to next track")
 
     def media_prev(self):
-        win32api.keybd_event(win32con.VK_MEDIA_PREV_TRACK, 0, 0, 0)
-        win32api.keybd_event(win32con.VK_MEDIA_PREV_TRACK, 0, win32con.KEYEVENTF_KEYUP, 0)
-        return "Back to previous track"
+        return self._media('prev', "Back to previous track")
 
     def get_system_health(self):
-        """Returns string summary of CPU/RAM"""
-        cpu = psutil.cpu_percent(interval=None)
+        """Returns string summary of CPU/RAM/disk/network load, recent trends and the heaviest apps"""
+        report = self.metrics.health() if self.metrics else None
+        if report:
+            return report
+        # no sampler or no sample yet, one reading like before (but over a real interval, not 0.0)
+        cpu = psutil.cpu_percent(interval=0.1)
         ram = psutil.virtual_memory().percent
         return f"CPU Usage: {cpu}%, RAM Usage: {ram}%"
 
@@ -108,7 +118,7 @@ class SystemController:
         try:
             # We strip common phrases to help the fuzzy matcher
             clean_name = app_name_str.lower().replace("open ", "").replace("launch ", "").strip()
-            app_open(clean_name, match_closest=True, output=False)
+            self.backend.open_app(clean_name)
             return f"Launching {clean_name}"
         except Exception as e:
             return f"Failed to launch {app_name_str}: {e}"
@@ -116,7 +126,7 @@ class SystemController:
     def close_app(self, app_name_str):
         try:
              clean_name = app_name_str.lower().replace("close ", "").replace("kill ", "").strip()
-             app_close(clean_name, match_closest=True, output=False)
+             self.backend.close_app(clean_name)
              return f"Closing {clean_name}"
         except:
             # Fallback to older method if AppOpener fails
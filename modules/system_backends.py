@@ -0,0 +1,312 @@
+import re
+import sys
+import shutil
+import threading
+import subprocess
+from config.settings import Config
+
+
+class DeviceGone(Exception):
+    """A cached handle went stale (speakers unplugged, default sink changed, media player closed)"""
+
+
+class SystemBackend:
+    """
+    What SystemController needs from the OS: volume, brightness, media keys, apps.
+    Handles (the COM volume interface, the default sink, the media player's bus name) are
+    opened on first use and cached per thread, COM objects can't be shared between threads
+    anyway. A call that fails because its handle went stale drops it, reopens and tries once
+    more, and the other threads reopen theirs on their next call instead of failing first.
+    """
+    
+    name = 'base'
+    
+    def __init__(self):
+        self.local = threading.local()
+        self.generation = 0  # bumped on every invalidation, older cached handles get reopened
+        self.lock = threading.Lock()
+        self.stats = {'opened': 0, 'reused': 0, 'invalidated': 0}
+        self._sbc = None
+    
+    def open(self, kind):
+        """A fresh handle of this kind for the calling thread"""
+        raise NotImplementedError
+    
+    def is_stale(self, error):
+        """Whether an error means the handle has to be reopened (rather than the call being wrong)"""
+        return isinstance(error, DeviceGone)
+    
+    def handle(self, kind):
+        handles = self.local.__dict__.setdefault('handles', {})
+        cached = handles.get(kind)
+        if cached is not None and cached[0] == self.generation:
+            self.stats['reused'] += 1
+            return cached[1]
+        generation = self.generation
+        handle = self.open(kind)
+        handles[kind] = (generation, handle)
+        self.stats['opened'] += 1
+        return handle
+    
+    def invalidate(self, kind=None):
+        """Forget this thread's handle (all of them without a kind), other threads' go stale too"""
+        handles = self.local.__dict__.get('handles', {})
+        if kind is None:
+            handles.clear()
+        else:
+            handles.pop(kind, None)
+        with self.lock:
+            self.generation += 1
+        self.stats['invalidated'] += 1
+    
+    def call(self, kind, action):
+        """action(handle), once more with a fresh handle if the cached one went stale"""
+        try:
+            return action(self.handle(kind))
+        except Exception as e:
+            if not self.is_stale(e):
+                raise
+            print(f"[System] {kind} handle went stale, reopening: {e}")
+            self.invalidate(kind)
+        return action(self.handle(kind))
+    
+    # volume, 0-100
+    def get_volume(self):
+        raise NotImplementedError
+    
+    def set_volume(self, level):
+        raise NotImplementedError
+    
+    def set_mute(self, muted):
+        raise NotImplementedError
+    
+    # screen_brightness_control does windows and linux (sysfs / ddcutil) already
+    def _brightness(self):
+        if self._sbc is None:
+            import screen_brightness_control as sbc
+            self._sbc = sbc
+        return self._sbc
+    
+    def get_brightness(self):
+        return self._brightness().get_brightness()[0]
+    
+    def set_brightness(self, level):
+        self._brightness().set_brightness(level)
+    
+    def media_key(self, key):
+        """key is 'play_pause', 'next' or 'prev'"""
+        raise NotImplementedError
+    
+    def open_app(self, name):
+        raise NotImplementedError
+    
+    def close_app(self, name):
+        raise NotImplementedError
+
+
+class WindowsBackend(SystemBackend):
+    """pycaw (Core Audio over COM) for the volume, media keys through keybd_event, AppOpener for apps"""
+    
+    name = 'windows'
+    
+    def __init__(self):
+        super().__init__()
+        # imported here so the module loads on machines that don't have them
+        import win32api
+        import win32con
+        from comtypes import COMError
+        self.win32api = win32api
+        self.win32con = win32con
+        self.COMError = COMError
+        self.keys = {'play_pause': win32con.VK_MEDIA_PLAY_PAUSE, 'next': win32con.VK_MEDIA_NEXT_TRACK,
+                     'prev': win32con.VK_MEDIA_PREV_TRACK}
+    
+    def open(self, kind):
+        from ctypes import cast, POINTER
+        from comtypes import CLSCTX_ALL, CoInitialize
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+        if not getattr(self.local, 'com', False):
+            # once per thread, not once per call
+            CoInitialize()
+            self.local.com = True
+        devices = AudioUtilities.GetSpeakers()
+        interface = devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        return cast(interface, POINTER(IAudioEndpointVolume))
+    
+    def is_stale(self, error):
+        # AUDCLNT_E_DEVICE_INVALIDATED and friends, the endpoint we hold isn't there anymore
+        return isinstance(error, (DeviceGone, self.COMError, OSError))
+    
+    def get_volume(self):
+        return int(round(self.call('volume', lambda volume: volume.GetMasterVolumeLevelScalar()) * 100))
+    
+    def set_volume(self, level):
+        self.call('volume', lambda volume: volume.SetMasterVolumeLevelScalar(level / 100.0, None))
+    
+    def set_mute(self, muted):
+        self.call('volume', lambda volume: volume.SetMute(1 if muted else 0, None))
+    
+    def media_key(self, key):
+        code = self.keys[key]
+        self.win32api.keybd_event(code, 0, 0, 0)
+        self.win32api.keybd_event(code, 0, self.win32con.KEYEVENTF_KEYUP, 0)
+    
+    def open_app(self, name):
+        from AppOpener import open as app_open
+        app_open(name, match_closest=True, output=False)
+    
+    def close_app(self, name):
+        from AppOpener import close as app_close
+        app_close(name, match_closest=True, output=False)
+
+
+class LinuxBackend(SystemBackend):
+    """
+    PulseAudio / PipeWire through pactl for the volume, MPRIS over D-Bus (dbus-send) for the
+    media keys. The handles are what each call needs looked up first: the default sink's name
+    and the bus name of a running media player.
+    """
+    
+    name = 'linux'
+    
+    MPRIS = "org.mpris.MediaPlayer2."
+    METHODS = {'play_pause': 'PlayPause', 'next': 'Next', 'prev': 'Previous'}
+    
+    def __init__(self):
+        super().__init__()
+        self.pactl = shutil.which('pactl')
+        self.dbus_send = shutil.which('dbus-send')
+    
+    def _run(self, *args):
+        result = subprocess.run(args, capture_output=True, text=True, timeout=Config.SYSTEM_CALL_TIMEOUT)
+        if result.returncode != 0:
+            error = result.stderr.strip() or f"{args[0]} exited with {result.returncode}"
+            # the sink / player we had cached isn't there anymore
+            if any(word in error for word in ("No such entity", "ServiceUnknown", "NoReply")):
+                raise DeviceGone(error)
+            raise RuntimeError(error)
+        return result.stdout
+    
+    def open(self, kind):
+        if kind == 'sink':
+            if not self.pactl:
+                raise RuntimeError("pactl not found (needs PulseAudio or PipeWire's pulse server)")
+            try:
+                return self._run(self.pactl, 'get-default-sink').strip()
+            except RuntimeError:
+                # pactl older than 15 has no get-default-sink, let the server resolve it every time
+                return '@DEFAULT_SINK@'
+        if kind == 'player':
+            if not self.dbus_send:
+                raise RuntimeError("dbus-send not found")
+            names = self._run(self.dbus_send, '--session', '--print-reply', '--dest=org.freedesktop.DBus',
+                              '/org/freedesktop/DBus', 'org.freedesktop.DBus.ListNames')
+            players = re.findall(r'"(' + re.escape(self.MPRIS) + r'[^"]+)"', names)
+            if not players:
+                raise RuntimeError("no media player running")
+            return players[0]
+        raise KeyError(kind)
+    
+    def get_volume(self):
+        output = self.call('sink', lambda sink: self._run(self.pactl, 'get-sink-volume', sink))
+        found = re.search(r'(\d+)%', output)
+        if not found:
+            raise RuntimeError(f"no volume in pactl's output: {output.strip()!r}")
+        return int(found.group(1))
+    
+    def set_volume(self, level):
+        self.call('sink', lambda sink: self._run(self.pactl, 'set-sink-volume', sink, f"{level}%"))
+    
+    def set_mute(self, muted):
+        self.call('sink', lambda sink: self._run(self.pactl, 'set-sink-mute', sink, '1' if muted else '0'))
+    
+    def media_key(self, key):
+        method = self.METHODS[key]
+        self.call('player', lambda player: self._run(
+            self.dbus_send, '--session', '--type=method_call', f"--dest={player}",
+            '/org/mpris/MediaPlayer2', f"org.mpris.MediaPlayer2.Player.{method}"))
+    
+    def open_app(self, name):
+        path = shutil.which(name) or shutil.which(name.replace(" ", "-"))
+        if path:
+            subprocess.Popen([path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+            return
+        # a desktop entry then ("visual studio code" -> code.desktop won't match, but firefox will)
+        self._run('gtk-launch', name.replace(" ", "-"))
+    
+    def close_app(self, name):
+        self._run('pkill', '-i', '-x', name.replace(" ", "-"))
+
+
+class FakeBackend(SystemBackend):
+    """
+    Everything in memory, for tests and benchmarks. open_delay makes opening a handle cost
+    something like a real device would, unplug() makes the handles everyone holds go stale.
+    """
+    
+    name = 'fake'
+    
+    def __init__(self, volume=50, brightness=50, open_delay=0.0):
+        super().__init__()
+        self.volume = volume
+        self.muted = False
+        self.brightness = brightness
+        self.open_delay = open_delay
+        self.device = 0  # which "device" is plugged in right now
+        self.pressed = []  # media keys, in order
+        self.apps = set()
+    
+    def open(self, kind):
+        if self.open_delay:
+            threading.Event().wait(self.open_delay)
+        return self.device
+    
+    def unplug(self):
+        self.device += 1
+    
+    def _speakers(self):
+        """The cached handle, if it's still the device that's plugged in"""
+        def check(device):
+            if device != self.device:
+                raise DeviceGone(f"device {device} was unplugged")
+            return device
+        return self.call('volume', check)
+    
+    def get_volume(self):
+        self._speakers()
+        return self.volume
+    
+    def set_volume(self, level):
+        self._speakers()
+        self.volume = level
+    
+    def set_mute(self, muted):
+        self._speakers()
+        self.muted = muted
+    
+    def get_brightness(self):
+        return self.brightness
+    
+    def set_brightness(self, level):
+        self.brightness = level
+    
+    def media_key(self, key):
+        self.pressed.append(key)
+    
+    def open_app(self, name):
+        self.apps.add(name)
+    
+    def close_app(self, name):
+        if name not in self.apps:
+            raise RuntimeError(f"{name} isn't running")
+        self.apps.discard(name)
+
+
+# what Config.SYSTEM_BACKEND can name
+BACKENDS = {'windows': WindowsBackend, 'linux': LinuxBackend, 'fake': FakeBackend}
+
+
+def make_backend(name=None):
+    """Config.SYSTEM_BACKEND, or the one for this OS when that's None"""
+    name = name or Config.SYSTEM_BACKEND or ('windows' if sys.platform == 'win32' else 'linux')
+    return BACKENDS[name]()
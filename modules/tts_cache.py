@@ -0,0 +1,138 @@
+import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import pygame
+from config.settings import Config
+
+
+class TTSCache:
+    """
+    Keeps synthesized speech around so fixed lines don't go back over the network.
+    Two tiers: mp3 files on disk (size capped, least recently used gets dropped first)
+    and a handful of already decoded Sounds in memory for the phrases we keep repeating.
+    """
+    
+    def __init__(self, directory=None, max_bytes=None, hot_items=None):
+        self.directory = directory or Config.TTS_CACHE_DIR
+        self.max_bytes = max_bytes or Config.TTS_CACHE_MAX_MB * 1024 * 1024
+        self.hot_items = hot_items if hot_items is not None else Config.TTS_CACHE_HOT_ITEMS
+        os.makedirs(self.directory, exist_ok=True)
+        
+        self.lock = threading.Lock()
+        self.hot = OrderedDict()  # key -> decoded Sound, most recent last
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        
+        # rebuild the LRU order from file times so it survives restarts
+        self.files = OrderedDict()  # key -> size, oldest first
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.mp3'):
+                st = os.stat(os.path.join(self.directory, name))
+                entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self.files[key] = size
+        self.total_bytes = sum(self.files.values())
+    
+    @staticmethod
+    def key(params):
+        """Content address for (text, voice, rate, volume, pitch)"""
+        return hashlib.sha1("\0".join(params).encode('utf-8')).hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.mp3')
+    
+    def __contains__(self, params):
+        return self.key(params) in self.files
+    
+    def get_bytes(self, params):
+        """The cached mp3, or None"""
+        key = self.key(params)
+        with self.lock:
+            if key not in self.files:
+                return None
+            self.files.move_to_end(key)
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            os.utime(self._path(key))  # mtime doubles as "last used" for the next startup
+            return data
+        except OSError:
+            # someone deleted it under us, just forget about it
+            with self.lock:
+                self.total_bytes -= self.files.pop(key, 0)
+            return None
+    
+    def get_sound(self, params):
+        """A decoded Sound ready to play, or None on a miss"""
+        key = self.key(params)
+        with self.lock:
+            sound = self.hot.get(key)
+            if sound is not None:
+                self.hot.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return sound
+        
+        data = self.get_bytes(params)
+        if data is None:
+            with self.lock:
+                self.stats['misses'] += 1
+            return None
+        
+        sound = pygame.mixer.Sound(io.BytesIO(data))
+        with self.lock:
+            self.stats['disk_hits'] += 1
+            # second time we've needed it, so it's earned a spot in memory
+            if self.hot_items:
+                self.hot[key] = sound
+                while len(self.hot) > self.hot_items:
+                    self.hot.popitem(last=False)
+        return sound
+    
+    def put(self, params, data):
+        """Stores a finished mp3 and evicts old ones if we're over the size cap"""
+        if not data:
+            return
+        key = self.key(params)
+        path = self._path(key)
+        tmp = path + '.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[TTSCache] Write Error: {e}")
+            return
+        
+        with self.lock:
+            self.total_bytes += len(data) - self.files.pop(key, 0)
+            self.files[key] = len(data)
+            while self.total_bytes > self.max_bytes and len(self.files) > 1:
+                old_key, size = self.files.popitem(last=False)
+                self.hot.pop(old_key, None)
+                self.total_bytes -= size
+                self.stats['evictions'] += 1
+                try:
+                    os.remove(self._path(old_key))
+                except OSError:
+                    pass
+    
+    def summary(self):
+        """Counters plus hit rate, for logging / debugging"""
+        with self.lock:
+            stats = dict(self.stats)
+            lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+            stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+            stats['files'] = len(self.files)
+            stats['bytes'] = self.total_bytes
+            stats['hot'] = len(self.hot)
+        return stats
+    
+    def print_summary(self):
+        stats = self.summary()
+        hits = stats['memory_hits'] + stats['disk_hits']
+        lookups = hits + stats['misses']
+        if lookups:
+            print(f"[TTSCache] {hits}/{lookups} hits ({stats['hit_rate']:.0%}, {stats['memory_hits']} from memory), "
+                  f"{stats['files']} files / {stats['bytes'] / 1024 / 1024:.1f}MB, {stats['evictions']} evicted")
@@ -1,9 +1,73 @@
+import io
 import os
 import time
+import queue
 import pygame
 import asyncio
 import tempfile
+import threading
+import concurrent.futures
+from collections import deque
 from config.settings import Config
+from modules.spectrum import sound_db, levels
+from modules.tts_cache import TTSCache
+from utils.tracing import tracer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# MPEG audio header tables (layer III only, that's all edge tts sends)
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],  # MPEG1
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],      # MPEG2 / 2.5
+}
+_MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG1
+    2: [22050, 24000, 16000],  # MPEG2
+    0: [11025, 12000, 8000],   # MPEG2.5
+}
+
+
+# a streamed piece doesn't decode on its own: layer III frames borrow bits from the ones
+# before them (the bit reservoir, up to ~2 frames at edge tts' 48kbps) and each one overlaps
+# the last, so every piece also gets the frames around it decoded and trimmed off again.
+# WARM_UP in front so the decoder is primed when the new audio starts, LOOKAHEAD behind
+# since SDL's resampler drops the last few ms of every Sound it converts
+MP3_WARM_UP_FRAMES = 4
+MP3_LOOKAHEAD_FRAMES = 2
+
+
+def mp3_frames(buffer, pos=0):
+    """
+    Complete layer III frames in the buffer from pos on, as [(start, end, seconds)], and
+    where the next (incomplete) one starts
+    """
+    frames = []
+    while pos + 4 <= len(buffer):
+        b1, b2 = buffer[pos + 1], buffer[pos + 2]
+        version = (b1 >> 3) & 0x03
+        bitrate_idx = (b2 >> 4) & 0x0F
+        rate_idx = (b2 >> 2) & 0x03
+        
+        # not a layer III frame header, skip a byte and look again (ID3 tags etc)
+        if buffer[pos] != 0xFF or (b1 & 0xE0) != 0xE0 or ((b1 >> 1) & 0x03) != 1 \
+                or version == 1 or bitrate_idx in (0, 15) or rate_idx == 3:
+            pos += 1
+            continue
+        
+        bitrate = _MP3_BITRATES[1 if version == 3 else 2][bitrate_idx] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_idx]
+        padding = (b2 >> 1) & 0x01
+        frame_len = (144 if version == 3 else 72) * bitrate // sample_rate + padding
+        
+        if pos + frame_len > len(buffer):
+            break
+        frames.append((pos, pos + frame_len, (1152 if version == 3 else 576) / sample_rate))
+        pos += frame_len
+    return frames, pos
+
 
 class Voice:
     """
@@ -27,67 +91,542 @@ class Voice:
         print(f"Warning: Voice '{Config.VOICE_NAME}' not found. Defaulting to Jenny.")
         CURRENT_VOICE = VOICES['jenny']
     
+    # swap this for a stand-in (anything with async stream()/save()) to run without the network
+    communicate_factory = None
+    
+    # how long the last utterance took, time_to_first_audio is the one people actually feel
+    last_timing = {}
+    
+    # one asyncio loop that lives for the whole app instead of asyncio.run() every time
+    _loop = None
+    _loop_lock = threading.Lock()
+    
+    # made on first use so importing Voice doesn't touch the disk
+    _cache = None
+    
+    # mixer channels post this when a sound ends, the main loop hands it to on_mixer_event()
+    END_EVENT = pygame.event.custom_type()
+    # the Playback that's talking right now, so it can be interrupted
+    current = None
+    
+    @staticmethod
+    def get_cache():
+        """The shared TTS cache, or None if it's turned off"""
+        if not Config.TTS_CACHE:
+            return None
+        with Voice._loop_lock:
+            if Voice._cache is None:
+                try:
+                    Voice._cache = TTSCache()
+                except OSError as e:
+                    print(f"[Voice] Cache Error: {e}")
+                    Config.TTS_CACHE = False
+                    return None
+        return Voice._cache
+    
+    @staticmethod
+    def _cache_params(text):
+        """Everything that changes how the audio sounds"""
+        return (text, Voice.CURRENT_VOICE, Config.VOICE_RATE, Config.VOICE_VOLUME, Config.VOICE_PITCH)
+    
+    @staticmethod
+    def warm_up(phrases):
+        """Synthesizes any phrases the cache doesn't have yet, in the background"""
+        cache = Voice.get_cache()
+        if cache is None:
+            return None
+        
+        async def _synthesize(text):
+            data = b""
+            async for chunk in Voice._communicate(text).stream():
+                if chunk.get("type") == "audio":
+                    data += chunk["data"]
+            return data
+        
+        def _warm():
+            for text in phrases:
+                params = Voice._cache_params(text)
+                if params in cache:
+                    continue
+                try:
+                    cache.put(params, Voice._run(_synthesize(text)))
+                except Exception as e:
+                    print(f"[Voice] Warm-up Error: {e}")
+                    return
+        
+        thread = threading.Thread(target=_warm, daemon=True)
+        thread.start()
+        return thread
+    
+    @staticmethod
+    def on_mixer_event():
+        """A sound finished on some channel (main thread), wakes whoever is waiting on it"""
+        playback = Voice.current
+        if playback:
+            playback.notify()
+    
+    @staticmethod
+    def interrupt():
+        """Barge-in: stops what's playing and whatever was still going to be said. True if anything was."""
+        playback = Voice.current
+        if playback is None:
+            return False
+        playback.stop()
+        return True
+    
+    @staticmethod
+    def duck(volume=None):
+        """Talks quieter while you might be saying something (unduck() if you weren't)"""
+        playback = Voice.current
+        if playback:
+            playback.set_volume(Config.BARGE_IN_DUCK_VOLUME if volume is None else volume)
+    
+    @staticmethod
+    def unduck():
+        playback = Voice.current
+        if playback:
+            playback.set_volume(1.0)
+    
+    @staticmethod
+    def prepare():
+        """Gets the asyncio loop going and edge tts imported before the reply needs them (safe to repeat)"""
+        Voice._get_loop()
+        if Voice.communicate_factory is None:
+            import edge_tts
+    
+    @staticmethod
+    def _get_loop():
+        """Starts the background asyncio loop the first time we need it"""
+        with Voice._loop_lock:
+            if Voice._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, daemon=True).start()
+                Voice._loop = loop
+        return Voice._loop
+    
+    @staticmethod
+    def _run(coro):
+        """Runs a coroutine on the shared loop and waits for the result"""
+        return asyncio.run_coroutine_threadsafe(coro, Voice._get_loop()).result()
+    
+    @staticmethod
+    def _communicate(text):
+        """Builds the edge tts request (or the stand-in)"""
+        factory = Voice.communicate_factory
+        if factory is None:
+            import edge_tts
+            factory = edge_tts.Communicate
+        # Talk to the edge tts api
+        return factory(
+            text=text,
+            voice=Voice.CURRENT_VOICE,
+            rate=Config.VOICE_RATE,
+            volume=Config.VOICE_VOLUME,
+            pitch=Config.VOICE_PITCH
+        )
+    
     @staticmethod
     def speak(text, visualizer=None):
         """Actually generates the mp3 and plays it"""
         if visualizer:
             visualizer.set_mode("speaking")
+        span = tracer.begin("voice.speak", chars=len(text))
+        fallback = False
         try:
-            import edge_tts
-            
-            async def _generate_speech():
-                # Talk to the edge tts api
-                communicate = edge_tts.Communicate(
-                    text=text,
-                    voice=Voice.CURRENT_VOICE,
-                    rate=Config.VOICE_RATE,
-                    volume=Config.VOICE_VOLUME,
-                    pitch=Config.VOICE_PITCH
-                )
-                
-                # dump it to a temp file so we can play it
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-                temp_path = temp_file.name
-                temp_file.close()
-                
-                await communicate.save(temp_path)
-                return temp_path
-            
-            # run the async function
-            audio_path = asyncio.run(_generate_speech())
-            
-            # play it using pygame mixer
             if not pygame.mixer.get_init():
                 pygame.mixer.init()
-                
-            pygame.mixer.music.load(audio_path)
-            pygame.mixer.music.play()
             
-            # wait until it's done talking
-            while pygame.mixer.music.get_busy():
-                time.sleep(0.1)
-            
-            # clean up the temp file so we don't fill up the drive
-            pygame.mixer.music.unload()
-            try:
-                os.remove(audio_path)
-            except:
-                pass
-                
+            if Config.TTS_STREAMING:
+                Voice._speak_streaming(text, visualizer)
+            else:
+                Voice._speak_file(text, visualizer)
+        
         except Exception as e:
-            # if internet is down or something breaks, fall back to the oldschool windows voice
+            fallback = True
+            Voice._fallback_speak(text)
+        finally:
+            span.end(fallback=fallback)
+            if visualizer:
+                visualizer.clear_spectrum()
+                visualizer.set_mode("idle")
+    
+    @staticmethod
+    def speak_sentences(sentences, visualizer=None):
+        """
+        Speaks sentences as they show up (e.g. from a streaming LLM reply).
+        The next sentence is already synthesising while the current one plays.
+        """
+        if not Config.TTS_STREAMING:
+            for sentence in sentences:
+                Voice.speak(sentence, visualizer)
+            return
+        
+        start = time.perf_counter()
+        span = tracer.begin("voice.speak", pipelined=True)
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        
+        # kicking off synthesis happens on this thread since pulling sentences blocks on the LLM
+        # the small queue stops us running miles ahead of what's actually playing
+        started = queue.Queue(maxsize=1)
+        playback = Playback(visualizer)
+        
+        def _feed():
             try:
-                import win32com.client
-                speaker = win32com.client.Dispatch("SAPI.SpVoice")
-                voices = speaker.GetVoices()
-                for i in range(voices.Count):
-                    if "David" in voices.Item(i).GetDescription():
-                        speaker.Voice = voices.Item(i)
-                        break
-                speaker.Rate = 1
-                speaker.Speak(text)
-            except:
-                pass
+                for sentence in sentences:
+                    # interrupted: keep reading the reply so it finishes (and lands in gemini's
+                    # history) properly, just don't say the rest of it
+                    if not playback.stopped:
+                        started.put((sentence,) + Voice._start_stream(sentence))
+            except Exception as e:
+                print(f"[Voice] Pipeline Error: {e}")
+            finally:
+                started.put(None)
+        
+        threading.Thread(target=_feed, daemon=True).start()
+        
+        try:
+            while True:
+                item = started.get()
+                if item is None:
+                    break
+                sentence, segments, future = item
+                if playback.stopped:
+                    continue
+                if visualizer:
+                    visualizer.set_mode("speaking")
+                try:
+                    Voice._play_segments(segments, future, playback)
+                except Exception:
+                    playback.wait()
+                    if not playback.stopped:
+                        Voice._fallback_speak(sentence)
+            playback.wait()
         finally:
+            playback.release()
+            span.end(interrupted=playback.stopped)
             if visualizer:
+                visualizer.clear_spectrum()
                 visualizer.set_mode("idle")
+        
+        Voice.last_timing = {
+            'mode': 'pipeline',
+            'time_to_first_audio': (playback.origin - start) if playback.origin else None,
+            'total': time.perf_counter() - start,
+        }
+    
+    @staticmethod
+    def _fallback_speak(text):
+        """If internet is down or something breaks, fall back to the oldschool windows voice"""
+        try:
+            import win32com.client
+            speaker = win32com.client.Dispatch("SAPI.SpVoice")
+            voices = speaker.GetVoices()
+            for i in range(voices.Count):
+                if "David" in voices.Item(i).GetDescription():
+                    speaker.Voice = voices.Item(i)
+                    break
+            speaker.Rate = 1
+            speaker.Speak(text)
+        except:
+            pass
+    
+    @staticmethod
+    def _start_stream(text):
+        """
+        Starts pulling audio from edge tts in the background. Returns (queue, future); the
+        queue gets mp3 pieces as (bytes, seconds of warm-up to skip, seconds to keep), see
+        MP3_WARM_UP_FRAMES, or a decoded Sound, and None when done.
+        """
+        segments = queue.Queue()
+        
+        # cached lines come back as one already decoded Sound, no network at all
+        cache = Voice.get_cache()
+        params = Voice._cache_params(text)
+        sound = cache.get_sound(params) if cache else None
+        if sound is not None:
+            tracer.mark("voice.cache_hit")
+            segments.put(sound)
+            segments.put(None)
+            done = concurrent.futures.Future()
+            done.set_result(None)
+            return segments, done
+        
+        async def _produce():
+            synthesis = tracer.begin("voice.synthesis", chars=len(text))
+            try:
+                communicate = Voice._communicate(text)
+                data = bytearray()
+                frames = []  # every complete frame so far
+                parsed = 0  # where the next frame starts
+                played = 0  # first frame no piece has covered yet
+                
+                def send(upto):
+                    """Frames played..upto as a piece, with the warm-up before and lookahead after it"""
+                    first = max(0, played - MP3_WARM_UP_FRAMES)
+                    last = min(len(frames), upto + MP3_LOOKAHEAD_FRAMES)
+                    segments.put((bytes(data[frames[first][0]:frames[last - 1][1]]),
+                                  sum(seconds for _, _, seconds in frames[first:played]),
+                                  sum(seconds for _, _, seconds in frames[played:upto])))
+                    return upto
+                
+                async for chunk in communicate.stream():
+                    if chunk.get("type") != "audio":
+                        continue
+                    data += chunk["data"]
+                    found, parsed = mp3_frames(data, parsed)
+                    frames += found
+                    # the lookahead has to be there already, so the newest frames wait for the next piece
+                    upto = len(frames) - MP3_LOOKAHEAD_FRAMES
+                    if upto > played and frames[-1][1] - frames[played][0] >= Config.TTS_STREAM_MIN_BYTES:
+                        played = send(upto)
+                if len(frames) > played:
+                    send(len(frames))
+                # only complete streams make it into the cache
+                if cache:
+                    cache.put(params, bytes(data))
+            finally:
+                # always tell the player we're done, even if the stream blew up
+                synthesis.end()
+                segments.put(None)
+        
+        return segments, asyncio.run_coroutine_threadsafe(_produce(), Voice._get_loop())
+    
+    @staticmethod
+    def _play_segments(segments, future, playback):
+        """Decodes each piece from memory as it lands and hands it to the playback channel"""
+        played = False
+        while True:
+            data = segments.get()
+            if data is None:
+                break
+            if playback.stopped:
+                # cut off, let the rest of the stream drain without decoding it
+                continue
+            if isinstance(data, tuple):
+                data = Voice._decode_piece(*data)
+            playback.add(data)
+            played = True
+        
+        # surfaces any error from the stream (goes to the fallback voice if nothing played)
+        try:
+            future.result()
+        except Exception:
+            if not played:
+                raise
+    
+    @staticmethod
+    def _decode_piece(mp3, skip, keep):
+        """A streamed piece as a Sound, just the `keep` seconds after the `skip` seconds of warm-up"""
+        sound = pygame.mixer.Sound(io.BytesIO(mp3))
+        rate, size, channels = pygame.mixer.get_init()
+        sample_bytes = abs(size) // 8 * channels
+        start = round(skip * rate) * sample_bytes
+        end = start + round(keep * rate) * sample_bytes
+        raw = sound.get_raw()
+        if start == 0 and end >= len(raw):
+            return sound
+        return pygame.mixer.Sound(buffer=raw[start:end])
+    
+    @staticmethod
+    def _speak_streaming(text, visualizer=None):
+        """
+        Plays the audio while edge tts is still sending it.
+        Chunks get cut on mp3 frame boundaries, decoded from memory and queued on a mixer channel.
+        """
+        start = time.perf_counter()
+        playback = Playback(visualizer)
+        try:
+            segments, future = Voice._start_stream(text)
+            Voice._play_segments(segments, future, playback)
+            
+            # wait until it's done talking (or someone talks over us)
+            playback.wait()
+        finally:
+            playback.release()
+        
+        Voice.last_timing = {
+            'mode': 'stream',
+            'time_to_first_audio': (playback.origin - start) if playback.origin else None,
+            'total': time.perf_counter() - start,
+        }
+    
+    @staticmethod
+    def _speak_file(text, visualizer=None):
+        """The original way: save the whole mp3 to a temp file, then play it"""
+        start = time.perf_counter()
+        
+        cache = Voice.get_cache()
+        params = Voice._cache_params(text)
+        sound = cache.get_sound(params) if cache else None
+        if sound is not None:
+            playback = Playback(visualizer)
+            try:
+                playback.add(sound)
+                playback.wait()
+            finally:
+                playback.release()
+            Voice.last_timing = {
+                'mode': 'cache',
+                'time_to_first_audio': playback.origin - start,
+                'total': time.perf_counter() - start,
+            }
+            return
+        
+        async def _generate_speech():
+            communicate = Voice._communicate(text)
+            
+            # dump it to a temp file so we can play it
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
+            temp_path = temp_file.name
+            temp_file.close()
+            
+            await communicate.save(temp_path)
+            return temp_path
+        
+        # run it on the shared loop
+        with tracer.span("voice.synthesis", chars=len(text)):
+            audio_path = Voice._run(_generate_speech())
+        if cache:
+            with open(audio_path, 'rb') as f:
+                cache.put(params, f.read())
+        
+        # decoded whole onto a channel like the streamed pieces, so it can be interrupted the same way
+        # (Playback does the spectrum table too)
+        playback = Playback(visualizer)
+        try:
+            playback.add(pygame.mixer.Sound(audio_path))
+            first_audio = playback.origin
+            playback.wait()
+        finally:
+            playback.release()
+        
+        # clean up the temp file so we don't fill up the drive
+        try:
+            os.remove(audio_path)
+        except:
+            pass
+        
+        Voice.last_timing = {
+            'mode': 'file',
+            'time_to_first_audio': first_audio - start,
+            'total': time.perf_counter() - start,
+        }
+
+
+class Playback:
+    """
+    Keeps a mixer channel fed and the visualizer's spectrum table lined up with what's audible.
+    Also the handle for cutting Nero off: stop() from any thread ends the sound, drops what was
+    queued and makes wait() return straight away.
+    """
+    
+    def __init__(self, visualizer=None):
+        self.channel = pygame.mixer.find_channel(True)
+        self.channel.set_volume(1.0)
+        # the channel posts END_EVENT whenever a sound on it finishes, so waiting is event driven
+        self.channel.set_endevent(Voice.END_EVENT)
+        self.visualizer = visualizer
+        self.origin = None  # when the first sound actually started
+        self.scheduled_end = 0.0
+        self.ends = deque()  # when each sound handed to the channel ends, the playing one first
+        self.stopped = False
+        self.changed = threading.Condition()
+        self.table = None  # spectrum rows so far, grown by doubling, only [:frames] is filled in
+        self.frames = 0
+        self.reference_db = None  # loudest band of the reply so far, every piece is scaled to it
+        self.playback_span = None
+        Voice.current = self
+    
+    def add(self, sound):
+        with self.changed:
+            # channels only hold one queued sound, so wait for the slot to free up
+            while not self.stopped and self.channel.get_busy() and self.channel.get_queue() is not None:
+                self.changed.wait(self._until_end())
+            if self.stopped:
+                return
+            
+            now = time.perf_counter()
+            if self.channel.get_busy():
+                self.channel.queue(sound)
+                start = max(now, self.scheduled_end)
+            else:
+                self.channel.play(sound)
+                self.ends.clear()
+                start = now
+            if self.origin is None:
+                self.origin = start
+                tracer.mark("voice.first_audio")
+                self.playback_span = tracer.begin("voice.playback")
+            self.scheduled_end = start + sound.get_length()
+            self.ends.append(self.scheduled_end)
+        
+        if self.visualizer:
+            self._add_spectrum(sound, start)
+    
+    def _add_spectrum(self, sound, start):
+        """Analyse each piece as it lands and keep growing the visualizer's table"""
+        db = sound_db(sound, self.visualizer.num_bands, Config.FPS)
+        if db is None:
+            return
+        # a running peak rather than each piece's own, so a quiet sentence doesn't light up like a loud one
+        self.reference_db = db.max() if self.reference_db is None else max(self.reference_db, db.max())
+        frames = levels(db, self.reference_db)
+        
+        # skip over any gap (rows start out zero) so row index still lines up with time since the first sound
+        at = max(self.frames, int((start - self.origin) * Config.FPS))
+        needed = at + len(frames)
+        size = 0 if self.table is None else len(self.table)
+        if needed > size:
+            # doubling, so the copies add up to about one table no matter how many pieces there are
+            grown = np.zeros((max(needed, 2 * size), frames.shape[1]))
+            if size:
+                grown[:self.frames] = self.table[:self.frames]
+            self.table = grown
+        self.table[at:needed] = frames
+        self.frames = needed
+        
+        # a view, rows past it get written later but the ones it covers never change
+        origin = self.origin
+        self.visualizer.set_spectrum(self.table[:self.frames], Config.FPS,
+                                     lambda: time.perf_counter() - origin)
+    
+    def _until_end(self):
+        # the end event normally wakes us, this is only the backstop if nobody pumps pygame events,
+        # so it's when the sound playing now ends (the queue slot frees up then), not the last one
+        now = time.perf_counter()
+        while self.ends and self.ends[0] <= now:
+            self.ends.popleft()
+        return max(0.01, self.ends[0] - now) if self.ends else 0.01
+    
+    def notify(self):
+        with self.changed:
+            self.changed.notify_all()
+    
+    def wait(self):
+        """Blocks until everything we handed over has played (or stop() was called)"""
+        with self.changed:
+            while not self.stopped and self.channel.get_busy():
+                self.changed.wait(self._until_end())
+        if self.playback_span is not None:
+            self.playback_span.end(interrupted=self.stopped)
+            self.playback_span = None
+    
+    def stop(self):
+        with self.changed:
+            if self.stopped:
+                return
+            self.stopped = True
+            # stop() drops the queued sound too (fadeout() would go on to play it)
+            self.channel.stop()
+            self.changed.notify_all()
+        tracer.mark("voice.interrupted")
+    
+    def set_volume(self, volume):
+        if not self.stopped:
+            self.channel.set_volume(volume)
+    
+    def release(self):
+        """Done with it, so interrupt() stops pointing here"""
+        if Voice.current is self:
+            Voice.current = None
@@ -0,0 +1,170 @@
+import os
+import time
+import wave
+import threading
+from config.settings import Config
+from modules.mic import Utterance
+from modules.spectrum import _band_matrix
+
+# no numpy = no keyword spotting, everything goes through like before
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HOP = 0.02  # seconds between feature frames
+N_FFT = 512
+NUM_BANDS = 20
+
+
+def features(samples, sample_rate):
+    """(frames, bands) log band energies, each frame minus its own mean so loudness doesn't matter"""
+    samples = np.asarray(samples, dtype=np.float32)
+    hop = max(1, int(sample_rate * HOP))
+    if len(samples) < N_FFT:
+        samples = np.pad(samples, (0, N_FFT - len(samples)))
+    frames = np.lib.stride_tricks.sliding_window_view(samples, N_FFT)[::hop]
+    mags = np.abs(np.fft.rfft(frames * np.hanning(N_FFT), axis=1))
+    bands = np.log(mags @ _band_matrix(mags.shape[1], sample_rate, N_FFT, NUM_BANDS) + 1.0)
+    return bands - bands.mean(axis=1, keepdims=True)
+
+
+def resample(samples, from_rate, to_rate):
+    """Band-limited resample through the FFT (cut or zero-pad the spectrum), fine for a short clip"""
+    if from_rate == to_rate:
+        return np.asarray(samples, dtype=np.float32)
+    samples = np.asarray(samples, dtype=np.float32)
+    length = max(1, int(round(len(samples) * to_rate / from_rate)))
+    spectrum = np.fft.rfft(samples)
+    kept = np.zeros(length // 2 + 1, dtype=spectrum.dtype)
+    n = min(len(kept), len(spectrum))
+    kept[:n] = spectrum[:n]
+    return (np.fft.irfft(kept, length) * (length / len(samples))).astype(np.float32)
+
+
+def match(template, query):
+    """
+    Subsequence DTW: best place the template fits somewhere in the query.
+    (average per-frame distance, query frame where the match ends)
+    """
+    cost = np.sqrt(((template[:, None, :] - query[None, :, :]) ** 2).sum(axis=2)).tolist()
+    m, n = len(template), len(query)
+    previous = cost[0]  # free start anywhere in the query
+    for i in range(1, m):
+        row = cost[i]
+        current = [previous[0] + row[0]] + [0.0] * (n - 1)
+        for j in range(1, n):
+            current[j] = row[j] + min(previous[j], previous[j - 1], current[j - 1])
+        previous = current
+    end = min(range(n), key=previous.__getitem__)
+    return previous[end] / m, end
+
+
+class WakeWord:
+    """
+    Local "Nero" spotter that sits in front of cloud speech recognition. Compares the start
+    of each utterance against a few recordings of the wake word (DTW over log band energies),
+    and only the audio after it goes on to Google. A bare "Nero" opens a short window where
+    the next thing said gets through without it.
+    """
+    
+    def __init__(self, directory=None, threshold=None):
+        self.directory = directory or Config.WAKE_WORD_DIR
+        self.threshold = threshold or Config.WAKE_WORD_THRESHOLD
+        self.templates = []  # (sample_rate, samples) as recorded
+        self._features = {}  # sample rate -> every template's features at that rate
+        self.armed_until = 0.0
+        self.last_distance = None  # for tuning the threshold
+        self.lock = threading.Lock()
+        self.stats = {'gated': 0, 'forwarded': 0, 'wake_only': 0, 'follow_ups': 0, 'no_templates': 0}
+        if np is not None:
+            self.load(self.directory)
+    
+    def load(self, directory):
+        """Every 16 bit mono wav in the folder becomes a template"""
+        if not os.path.isdir(directory):
+            return
+        for name in sorted(os.listdir(directory)):
+            if not name.lower().endswith('.wav'):
+                continue
+            try:
+                with wave.open(os.path.join(directory, name), 'rb') as f:
+                    if f.getsampwidth() != 2 or f.getnchannels() != 1:
+                        raise ValueError("needs 16 bit mono")
+                    samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+                    self.enroll(samples, f.getframerate())
+            except Exception as e:
+                print(f"[WakeWord] Error: {name}: {e}")
+    
+    def enroll(self, samples, sample_rate):
+        self.templates.append((sample_rate, np.asarray(samples)))
+        # the mic rate right away, so the first utterance doesn't pay for it
+        self._features.clear()
+        self._templates_at(Config.MIC_SAMPLE_RATE)
+    
+    def _templates_at(self, sample_rate):
+        """Every template resampled to the utterance's rate, clips recorded at 44.1kHz still count"""
+        cached = self._features.get(sample_rate)
+        if cached is None:
+            cached = [features(resample(samples, rate, sample_rate), sample_rate) for rate, samples in self.templates]
+            self._features[sample_rate] = cached
+        return cached
+    
+    @property
+    def ready(self):
+        return np is not None and bool(self.templates)
+    
+    def spot(self, utterance):
+        """(distance, seconds into the utterance where the wake word ends) for the best template"""
+        samples = np.frombuffer(utterance.data, dtype=np.int16)
+        samples = samples[:int(Config.WAKE_WORD_SEARCH * utterance.sample_rate)]
+        query = features(samples, utterance.sample_rate)
+        sample_rate = utterance.sample_rate
+        best = (float('inf'), 0.0)
+        for template in self._templates_at(sample_rate):
+            distance, end = match(template, query)
+            best = min(best, (distance, (end * HOP * sample_rate + N_FFT) / sample_rate))
+        return best
+    
+    def arm(self, seconds=None):
+        """Let the next utterance through without the wake word"""
+        with self.lock:
+            self.armed_until = time.monotonic() + (seconds or Config.WAKE_WORD_FOLLOW_UP)
+    
+    def gate(self, utterance):
+        """The part of the utterance worth recognizing, or None to drop it"""
+        if not self.ready:
+            self.stats['no_templates'] += 1
+            return utterance
+        with self.lock:
+            armed = time.monotonic() < self.armed_until
+            self.armed_until = 0.0
+        if armed:
+            self.stats['follow_ups'] += 1
+            return utterance
+        
+        distance, end = self.spot(utterance)
+        self.last_distance = distance
+        if distance > self.threshold:
+            self.stats['gated'] += 1
+            return None
+        
+        offset = int(end * utterance.sample_rate) * utterance.sample_width
+        rest = utterance.data[offset:]
+        # every utterance ends in VAD_SILENCE of quiet, that part doesn't count
+        said = len(rest) / (utterance.sample_rate * utterance.sample_width) - Config.VAD_SILENCE
+        if said < Config.WAKE_WORD_MIN_REST:
+            # just "Nero", wait for the actual command
+            self.stats['wake_only'] += 1
+            self.arm()
+            return None
+        self.stats['forwarded'] += 1
+        return Utterance(rest, utterance.sample_rate, utterance.sample_width,
+                         utterance.start + end, utterance.end, utterance.detected)
+    
+    def print_summary(self):
+        stats = self.stats
+        total = stats['gated'] + stats['forwarded'] + stats['wake_only'] + stats['follow_ups']
+        if total:
+            print(f"[WakeWord] {stats['forwarded'] + stats['follow_ups']}/{total} utterances sent to recognition, "
+                  f"{stats['gated']} gated, {stats['wake_only']} bare wake words")
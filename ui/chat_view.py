@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from config.settings import Config
+
+
+class ChatView:
+    """
+    Scroll position and word-wrapped layout for the chat panel.
+    Each message is wrapped once and the lines cached (keyed by text, font and width).
+    Scrolling is anchored on the message at the bottom of the viewport, so working out
+    what's on screen only ever touches the handful of messages that are actually visible,
+    no matter how long the history is.
+    """
+    
+    TOP = 60  # viewport starts this far below the top of the panel (under the header)
+    BOTTOM = 45  # and stops this far above the bottom (status pill)
+    GAP = 5  # between bubbles
+    TEXT_X = 22  # text inset inside the panel
+    TEXT_Y = 24  # first line below the top of the bubble (name/time go above)
+    PADDING = 8  # under the last line
+    FONT = 'chat_small'
+    
+    def __init__(self, fonts, width=None):
+        self.fonts = fonts
+        self.resize(width or Config.CHAT_WIDTH)
+        self.layouts = OrderedDict()  # (text, font, width) -> wrapped lines
+        self.stats = {'hits': 0, 'misses': 0}
+        
+        # message `anchor` ends `offset` px below the bottom of the viewport,
+        # anchor None means stuck to the newest message
+        self.anchor = None
+        self.offset = 0
+    
+    def resize(self, width):
+        self.width = width
+        self.text_width = width - self.TEXT_X - 20
+        self.viewport_height = Config.HEIGHT - Config.TITLE_BAR_HEIGHT - self.TOP - self.BOTTOM
+        self.line_height = self.fonts[self.FONT].get_linesize()
+    
+    def invalidate(self):
+        """Forget every cached layout (window/font changes)"""
+        self.layouts.clear()
+    
+    def _wrap(self, text):
+        font = self.fonts[self.FONT]
+        space = font.size(" ")[0]
+        lines = []
+        for paragraph in text.split("\n"):
+            line, line_width = [], 0
+            for word in paragraph.split():
+                word_width = font.size(word)[0]
+                # one word wider than the whole bubble gets chopped up
+                while word_width > self.text_width:
+                    cut = len(word) - 1
+                    while cut > 1 and font.size(word[:cut])[0] > self.text_width:
+                        cut -= 1
+                    if line:
+                        lines.append(" ".join(line))
+                        line, line_width = [], 0
+                    lines.append(word[:cut])
+                    word = word[cut:]
+                    word_width = font.size(word)[0]
+                if line and line_width + space + word_width > self.text_width:
+                    lines.append(" ".join(line))
+                    line, line_width = [], 0
+                line_width += word_width + (space if line else 0)
+                line.append(word)
+            lines.append(" ".join(line))
+        return lines
+    
+    def lines(self, text):
+        """Wrapped lines for a message, measured once and then cached"""
+        key = (text, self.FONT, self.text_width)
+        lines = self.layouts.get(key)
+        if lines is not None:
+            self.layouts.move_to_end(key)
+            self.stats['hits'] += 1
+            return lines
+        self.stats['misses'] += 1
+        lines = self._wrap(text)
+        self.layouts[key] = lines
+        while len(self.layouts) > Config.CHAT_LAYOUT_CACHE:
+            self.layouts.popitem(last=False)
+        return lines
+    
+    def height(self, message):
+        return self.TEXT_Y + len(self.lines(message['text'])) * self.line_height + self.PADDING
+    
+    def scroll_to_bottom(self):
+        self.anchor = None
+        self.offset = 0
+    
+    def signature(self):
+        return (self.anchor, self.offset, self.text_width)
+    
+    @staticmethod
+    def _backwards(conversation, index, chunk=16):
+        """Messages from index down to 0, fetched a few at a time (cheap for the paged store)"""
+        while index >= 0:
+            start = max(0, index - chunk + 1)
+            for message in reversed(conversation[start:index + 1]):
+                yield index, message
+                index -= 1
+    
+    def scroll_by(self, conversation, dy):
+        """Positive dy scrolls up (towards older messages)"""
+        count = len(conversation)
+        if not count:
+            return
+        anchor = count - 1 if self.anchor is None else min(self.anchor, count - 1)
+        offset = self.offset + dy
+        
+        # walk the anchor up while its bubble is scrolled fully out the bottom
+        while offset > 0 and anchor > 0:
+            step = self.height(conversation[anchor]) + self.GAP
+            if offset < step:
+                break
+            offset -= step
+            anchor -= 1
+        # and back down when scrolling towards the newest
+        while offset < 0 and anchor < count - 1:
+            anchor += 1
+            offset += self.height(conversation[anchor]) + self.GAP
+        
+        # don't scroll past the top of the first message
+        above = 0
+        for index, message in self._backwards(conversation, anchor):
+            above += self.height(message) + (self.GAP if index else 0)
+            if above - offset >= self.viewport_height:
+                break
+        else:
+            # pin message 0 to the top and find whichever message is at the bottom then
+            below = 0
+            for anchor in range(count):
+                below += self.height(conversation[anchor]) + (self.GAP if anchor else 0)
+                if below >= self.viewport_height:
+                    break
+            offset = below - self.viewport_height
+        
+        if anchor >= count - 1 and offset <= 0:
+            self.scroll_to_bottom()
+            return
+        self.anchor = anchor
+        self.offset = max(0, offset)
+    
+    def visible(self, conversation):
+        """(message, y, lines) for just the bubbles that intersect the viewport, y from its top"""
+        count = len(conversation)
+        if not count:
+            return []
+        anchor = count - 1 if self.anchor is None else min(self.anchor, count - 1)
+        
+        items = []
+        bottom = self.viewport_height + self.offset
+        for index, message in self._backwards(conversation, anchor):
+            lines = self.lines(message['text'])
+            top = bottom - (self.TEXT_Y + len(lines) * self.line_height + self.PADDING)
+            items.append((message, top, lines))
+            bottom = top - self.GAP
+            if bottom <= 0:
+                items.reverse()
+                return items
+        
+        # ran out of messages with room to spare, so line them up at the top like it always was
+        items.reverse()
+        shift = max(0, items[0][1])
+        return [(message, top - shift, lines) for message, top, lines in items]
@@ -0,0 +1,86 @@
+import pygame
+from config.settings import Config
+
+
+class Compositor:
+    """
+    Draws the window in layers so we stop repainting stuff that didn't change.
+    The title bar and chat panel live on cached surfaces that only get re-rendered when
+    hover/conversation/status changes, and only the rects that actually changed get pushed
+    to the display (the visualizer region changes every frame, the rest usually doesn't).
+    """
+    
+    def __init__(self, ui):
+        self.ui = ui
+        
+        # title bar variants keyed by (width, hover state), tiny so we keep them all
+        self.title_layers = {}
+        self.title_key = None
+        
+        # chat panel is the same size no matter the window width, so it survives toggle_chat()
+        self.chat_layer = pygame.Surface((Config.CHAT_WIDTH, Config.HEIGHT - Config.TITLE_BAR_HEIGHT))
+        self.chat_key = None
+        
+        self.full_redraw = True
+    
+    def invalidate(self):
+        """Window got recreated (or something weird happened), push everything next frame"""
+        self.full_redraw = True
+    
+    def _chat_signature(self, conversation, view, status):
+        """Cheap fingerprint of everything the chat panel shows"""
+        # streaming replies grow the last message in place, so its length counts too
+        last_len = len(conversation[-1]['text']) if conversation else 0
+        return (len(conversation), last_len, view.signature(), self.ui.status_style(status)[1])
+    
+    def _title_layer(self, mouse_pos, width):
+        key = (width, self.ui.hover_state(mouse_pos))
+        layer = self.title_layers.get(key)
+        if layer is None:
+            layer = pygame.Surface((width, Config.TITLE_BAR_HEIGHT))
+            self.ui.draw_title_bar(mouse_pos, surface=layer)
+            self.title_layers[key] = layer
+        changed = key != self.title_key
+        self.title_key = key
+        return layer, changed
+    
+    def _chat_layer(self, conversation, view, status):
+        key = self._chat_signature(conversation, view, status)
+        if key == self.chat_key:
+            return self.chat_layer, False
+        self.ui.draw_chat_panel(conversation, view, status, surface=self.chat_layer, origin=(0, 0))
+        self.chat_key = key
+        return self.chat_layer, True
+    
+    def render(self, screen, visualizer, mouse_pos, conversation, view, status, chat_visible):
+        """Draws one frame and pushes only what changed. Returns the rects it pushed."""
+        width = screen.get_width()
+        
+        # the visualizer gets clipped to its own panel, the bars used to spill under the
+        # title bar and chat panel anyway and those get drawn on top
+        vis_rect = pygame.Rect(0, Config.TITLE_BAR_HEIGHT, min(width, Config.VISUALIZER_WIDTH),
+                               Config.HEIGHT - Config.TITLE_BAR_HEIGHT)
+        screen.set_clip(vis_rect)
+        screen.fill(Config.BG_COLOR)
+        visualizer.draw()
+        screen.set_clip(None)
+        dirty = [vis_rect]
+        
+        title, changed = self._title_layer(mouse_pos, width)
+        if changed or self.full_redraw:
+            screen.blit(title, (0, 0))
+            dirty.append(pygame.Rect(0, 0, width, Config.TITLE_BAR_HEIGHT))
+        
+        if chat_visible:
+            chat, changed = self._chat_layer(conversation, view, status)
+            if changed or self.full_redraw:
+                chat_rect = screen.blit(chat, (Config.VISUALIZER_WIDTH, Config.TITLE_BAR_HEIGHT))
+                dirty.append(chat_rect)
+        
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+            return [screen.get_rect()]
+        
+        pygame.display.update(dirty)
+        return dirty
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+from config.settings import Config
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces, since font.render() (glyph rasterizing) is the
+    priciest thing the UI does. Keyed by (font, text, color, antialias) and capped by
+    both entry count and pixel memory.
+    """
+    
+    def __init__(self, max_items=None, max_bytes=None):
+        self.max_items = max_items or Config.TEXT_CACHE_MAX_ITEMS
+        self.max_bytes = max_bytes or Config.TEXT_CACHE_MAX_MB * 1024 * 1024
+        self.entries = OrderedDict()  # key -> (surface, size in bytes, font)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+    
+    def render(self, font, text, antialias, color):
+        """Drop-in for font.render() that reuses surfaces we've already made"""
+        key = (id(font), text, tuple(color), antialias)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        
+        surface = font.render(text, antialias, color)
+        size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+        
+        with self.lock:
+            # another thread may have rendered the same key meanwhile, its size comes off first
+            old = self.entries.pop(key, None)
+            # holding the font too so its id can't get recycled by another font while we're cached
+            self.entries[key] = (surface, size, font)
+            self.total_bytes += size - (old[1] if old else 0)
+            while self.entries and (len(self.entries) > self.max_items or self.total_bytes > self.max_bytes):
+                _, (_, old_size, _) = self.entries.popitem(last=False)
+                self.total_bytes -= old_size
+                self.evictions += 1
+        return surface
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+    
+    def stats(self):
+        """Hit rate and memory use"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'items': len(self.entries),
+                'bytes': self.total_bytes,
+            }
+
+
+# one cache for every font, lives at module level so it outlasts any UIComponents instance
+shared_text_cache = TextCache()
@@ -2,6 +2,18 @@ import pygame
 import math
 import random
 import colorsys
+from config.settings import Config
+
+# numpy is optional, without it we just run the old per-bar python loops
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# cap sprites are looked up by the bar color rounded down to a multiple of this (32 shades per
+# channel), so a fade between modes reuses a handful of them instead of making one every frame for
+# every bar. only the caps, the lines keep the exact color so fades don't band
+CAP_COLOR_STEP = 8
 
 class CircularSpectrum:
     """
@@ -9,19 +21,50 @@ class CircularSpectrum:
     Basically tries to copy that swooshy Siri/Alexa look.
     """
     
-    def __init__(self, screen, center_x, center_y):
+    def __init__(self, screen, center_x, center_y, num_bars=None, use_numpy=None):
         self.screen = screen
         self.cx = center_x
         self.cy = center_y
         
         # how big the circle is
         self.radius = 150
-        self.num_bars = 90  # how many bars we want around it
+        self.num_bars = num_bars or Config.VISUALIZER_BARS  # how many bars we want around it
+        
+        # bar sizing
+        self.bar_width = 7  # Even beefier
+        self.min_height = 10
+        self.max_height = 160 # Maximum length
+        
+        # cached geometry + sprite caps instead of line + two circles per bar
+        self.batched_draw = Config.VISUALIZER_BATCHED_DRAW
+        self._geometry = None
+        self._geometry_key = None
+        self._cap_sprites = {}
+        
+        # whole-array physics if numpy is around, otherwise the plain python path
+        if use_numpy is None:
+            use_numpy = Config.VISUALIZER_NUMPY
+        self.use_numpy = bool(use_numpy) and np is not None
         
         # pretending we have audio levels since we can't actually read system audio easily
-        self.levels = [0.0] * self.num_bars
-        self.target_levels = [0.0] * self.num_bars
-        self.velocities = [0.0] * self.num_bars
+        if self.use_numpy:
+            self.levels = np.zeros(self.num_bars)
+            self.target_levels = np.zeros(self.num_bars)
+            self.velocities = np.zeros(self.num_bars)
+            self._rng = np.random.default_rng()
+            self._build_shape_tables()
+        else:
+            self.levels = [0.0] * self.num_bars
+            self.target_levels = [0.0] * self.num_bars
+            self.velocities = [0.0] * self.num_bars
+        
+        # real audio: (band table, fps, playback position fn) handed over by Voice while it talks
+        # bass sits at the left side focus, higher bands fan out both ways round the circle
+        self.num_bands = self.num_bars // 2 + 1
+        self._band_index = [min(self._dist_from_left(i), self.num_bands - 1) for i in range(self.num_bars)]
+        if self.use_numpy:
+            self._band_index = np.array(self._band_index)
+        self._spectrum = None
         
         # animation state
         self.time = 0
@@ -35,9 +78,58 @@ class CircularSpectrum:
             'speaking': self._create_tech_gradient(),     # Use same fancy gradient for speaking
             'thinking': self._create_gradient(0.7, 0.8),  # Purple for thinking
         }
-        self.colors = self.color_schemes['idle']
-        self.target_colors = self.colors
+        if self.use_numpy:
+            self.color_schemes = {k: np.array(v, dtype=np.int64) for k, v in self.color_schemes.items()}
+        # copy so the lerp doesn't paint over the idle scheme itself
+        self.colors = self.color_schemes['idle'].copy()
+        self.target_colors = self.color_schemes['idle']
+    
+    def _dist_from_left(self, i):
+        """How many bars away from the "Left" center we are, going whichever way is shorter"""
+        dist = abs(i - int(self.num_bars * 0.75))
+        if dist > self.num_bars / 2:
+            dist = self.num_bars - dist
+        return dist
+    
+    def set_spectrum(self, frames, fps, position_fn):
+        """
+        Hands over a precomputed (frames, num_bands) table of 0..1 levels.
+        position_fn gives the playback position in seconds (negative if not playing yet).
+        """
+        self._spectrum = (frames, fps, position_fn)
+    
+    def clear_spectrum(self):
+        """Back to the fake beats"""
+        self._spectrum = None
+    
+    def _spectrum_row(self):
+        """Band levels for right now, or None if there's no real audio to show"""
+        spectrum = self._spectrum
+        if spectrum is None or self.mode != "speaking":
+            return None
+        frames, fps, position_fn = spectrum
+        pos = position_fn()
+        if pos < 0:
+            return None
+        idx = int(pos * fps)
+        if idx >= len(frames):
+            return None
+        return frames[idx]
+    
+    def _build_shape_tables(self):
+        """Precomputes the per-bar stuff that never changes between frames"""
+        n = self.num_bars
+        self._idx = np.arange(n, dtype=np.float64)
+        
+        # same "distance from the left side" shaping as the python loops
+        left_center_idx = int(n * 0.75)
+        dist = np.abs(self._idx - left_center_idx)
+        dist = np.where(dist > n / 2, n - dist, dist)
+        self._idle_shape = np.maximum(0.1, 1.0 - (dist / (n * 0.35)))
+        self._speak_shape = np.maximum(0.15, 1.0 - (dist / (n * 0.45)))
         
+        self._angles = (self._idx / n) * math.pi * 2
+
     def _create_tech_gradient(self):
         """
         Manually builds that sweet Cyan -> Blue -> Purple -> Magenta gradient
@@ -97,7 +189,48 @@ class CircularSpectrum:
             self.target_colors = self.color_schemes[mode]
         
     def _generate_audio_levels(self):
-        """Fakes the audio visualization because hooking into Wasapi is a pain"""
+        """
+        Picks new target heights. Uses the real spectrum when Voice hands one over,
+        otherwise fakes it because hooking into Wasapi is a pain.
+        """
+        if self.use_numpy:
+            self._generate_audio_levels_np()
+        else:
+            self._generate_audio_levels_py()
+    
+    def _generate_audio_levels_np(self):
+        """Same four modes as the python version, just done on the whole array at once"""
+        n = self.num_bars
+        
+        if self.mode == "idle":
+            breath = np.sin(self.time * 2 + self._idx * 0.1) * 0.1
+            self.target_levels = (self._idle_shape * 0.5) + breath + self._rng.uniform(0, 0.05, n)
+            
+        elif self.mode == "listening":
+            self.target_levels = 0.3 + np.sin(self.time * 4 + self._idx * 0.2) * 0.1
+            
+        elif self.mode == "speaking":
+            row = self._spectrum_row()
+            if row is not None:
+                # just a lookup, the DSP already happened on the voice thread
+                level = 0.2 + row[self._band_index] * 1.1
+                self.target_levels = np.clip(level * self._speak_shape, 0.05, 1.3)
+                return
+            
+            beat = 0
+            if (self.time % 0.5) < 0.1:
+                beat = random.uniform(0.3, 0.6)
+            
+            jitter = self._rng.uniform(0, 0.3, n)
+            wave = np.sin(self.time * 15 + self._idx * 0.5) * 0.2
+            level = 0.2 + ((beat + wave + jitter) * 0.8)
+            self.target_levels = np.clip(level * self._speak_shape, 0.05, 1.3)
+            
+        elif self.mode == "thinking":
+            self.target_levels = 0.4 + np.sin(self._angles * 3 + self.time * 8) * 0.4
+    
+    def _generate_audio_levels_py(self):
+        """Per-bar version, used when numpy isn't available"""
         # Center of the "Left" side is roughly 3/4 around the circle if 0 is top
         left_center_idx = int(self.num_bars * 0.75) 
         
@@ -122,6 +255,15 @@ class CircularSpectrum:
                 self.target_levels[i] = base
                 
         elif self.mode == "speaking":
+            row = self._spectrum_row()
+            if row is not None:
+                row = list(row)
+                for i in range(self.num_bars):
+                    shape_bias = max(0.15, 1.0 - (self._dist_from_left(i) / (self.num_bars * 0.45)))
+                    level = 0.2 + row[self._band_index[i]] * 1.1
+                    self.target_levels[i] = max(0.05, min(1.3, level * shape_bias))
+                return
+            
             # IMPROVED PHYSICS: NCS / Audio Spectrum Style
             # This simulates "beats" and "frequency jitter"
             
@@ -173,6 +315,36 @@ class CircularSpectrum:
         self.time += dt
         self.rotation += dt * 0.1  # slow rotation
         
+        # SUPER SNAPPY physics for NCS style
+        # Very high speed, very low damping to let it jitter
+        if self.mode == "speaking":
+            speed = 40  # Snap to target instantly
+            damping = 0.5 # Low damping = lots of vibration/overshoot
+        else:
+            speed = 10
+            damping = 0.85
+        
+        if self.use_numpy:
+            self._update_np(dt, speed, damping)
+        else:
+            self._update_py(dt, speed, damping)
+    
+    def _update_np(self, dt, speed, damping):
+        """Color lerp + spring physics on the whole array"""
+        # floor matches the int() truncation in the python path since colors are never negative
+        self.colors = np.floor(self.colors + (self.target_colors - self.colors) * 0.1).astype(np.int64)
+        
+        refresh_rate = 1.0 if self.mode == "speaking" else 0.3
+        if random.random() < refresh_rate:
+            self._generate_audio_levels()
+        
+        self.velocities += (self.target_levels - self.levels) * speed * dt
+        self.velocities *= damping
+        self.levels += self.velocities * dt
+        np.clip(self.levels, 0.05, 1.3, out=self.levels)
+    
+    def _update_py(self, dt, speed, damping):
+        """Per-bar version of the update"""
         # interpolate colors so they don't snap instantly
         for i in range(self.num_bars):
             current = self.colors[i]
@@ -191,16 +363,6 @@ class CircularSpectrum:
         # Physics tuning
         for i in range(self.num_bars):
             diff = self.target_levels[i] - self.levels[i]
-            
-            # SUPER SNAPPY physics for NCS style
-            # Very high speed, very low damping to let it jitter
-            if self.mode == "speaking":
-                speed = 40  # Snap to target instantly
-                damping = 0.5 # Low damping = lots of vibration/overshoot
-            else:
-                speed = 10
-                damping = 0.85
-            
             self.velocities[i] += diff * speed * dt
             self.velocities[i] *= damping
             self.levels[i] += self.velocities[i] * dt
@@ -208,20 +370,114 @@ class CircularSpectrum:
     
     def draw(self):
         """Actually puts the stuff on screen"""
-        self._draw_bars()
+        if self.batched_draw:
+            self._draw_bars()
+        else:
+            self._draw_bars_legacy()
+    
+    def _frame_arrays(self):
+        """pygame wants plain lists/tuples, so unpack the arrays once per frame"""
+        if self.use_numpy:
+            return self.levels.tolist(), [tuple(c) for c in self.colors.tolist()]
+        return self.levels, self.colors
+    
+    def _get_geometry(self):
+        """
+        Unit direction per bar, cached until num_bars/radius change.
+        Rotation isn't baked in, it gets applied as one offset each frame.
+        """
+        key = (self.num_bars, self.radius)
+        if self._geometry_key == key:
+            return self._geometry
+        
+        base = [(i / self.num_bars) * math.pi * 2 - math.pi / 2 for i in range(self.num_bars)]
+        geometry = {
+            'ux': [math.cos(a) for a in base],
+            'uy': [math.sin(a) for a in base],
+        }
+        if self.use_numpy:
+            geometry['ux'] = np.array(geometry['ux'])
+            geometry['uy'] = np.array(geometry['uy'])
+        
+        self._geometry = geometry
+        self._geometry_key = key
+        return geometry
+    
+    def _bar_endpoints(self):
+        """Inner and outer point of every bar with the current rotation applied"""
+        geo = self._get_geometry()
+        cos_r = math.cos(self.rotation)
+        sin_r = math.sin(self.rotation)
+        
+        if self.use_numpy:
+            # rotate every unit vector in one go
+            ux = geo['ux'] * cos_r - geo['uy'] * sin_r
+            uy = geo['ux'] * sin_r + geo['uy'] * cos_r
+            outer = self.radius + self.min_height + self.levels * self.max_height
+            return np.stack((
+                self.cx + ux * self.radius, self.cy + uy * self.radius,
+                self.cx + ux * outer, self.cy + uy * outer,
+            ), axis=1).tolist()
+        
+        endpoints = []
+        for i in range(self.num_bars):
+            bx = geo['ux'][i]
+            by = geo['uy'][i]
+            ux = bx * cos_r - by * sin_r
+            uy = bx * sin_r + by * cos_r
+            outer = self.radius + self.min_height + self.levels[i] * self.max_height
+            endpoints.append((self.cx + ux * self.radius, self.cy + uy * self.radius,
+                              self.cx + ux * outer, self.cy + uy * outer))
+        return endpoints
+    
+    def _cap_sprite(self, color):
+        """Rounded end cap tinted to (about) a color, rendered once and reused"""
+        step = CAP_COLOR_STEP
+        color = (int(color[0]) // step * step, int(color[1]) // step * step, int(color[2]) // step * step)
+        sprite = self._cap_sprites.get(color)
+        if sprite is None:
+            # quantized it stays small, this is just a backstop
+            if len(self._cap_sprites) > 4096:
+                self._cap_sprites.clear()
+            r = self.bar_width // 2
+            sprite = pygame.Surface((r * 2 + 1, r * 2 + 1))
+            sprite.fill(Config.BLACK)
+            pygame.draw.circle(sprite, color, (r, r), r)
+            sprite.set_colorkey(Config.BLACK)
+            self._cap_sprites[color] = sprite
+        return sprite
     
     def _draw_bars(self):
-        """Calculates where each bar goes"""
-        bar_width = 7  # Even beefier
-        min_height = 10
-        max_height = 160 # Maximum length
+        """One line per bar from the cached geometry, then every rounded cap in a single blits() batch"""
+        _, colors = self._frame_arrays()
+        draw_line = pygame.draw.line
+        screen = self.screen
+        bar_width = self.bar_width
+        r = bar_width // 2
+        
+        caps = []
+        for (ix, iy, ox, oy), color in zip(self._bar_endpoints(), colors):
+            draw_line(screen, color, (ix, iy), (ox, oy), bar_width)
+            sprite = self._cap_sprite(color)
+            caps.append((sprite, (int(ox) - r, int(oy) - r)))
+            caps.append((sprite, (int(ix) - r, int(iy) - r)))
+        
+        screen.blits(caps, doreturn=False)
+    
+    def _draw_bars_legacy(self):
+        """Calculates where each bar goes (old line + two circles version, kept for comparison)"""
+        bar_width = self.bar_width
+        min_height = self.min_height
+        max_height = self.max_height
+        
+        levels, colors = self._frame_arrays()
         
         for i in range(self.num_bars):
             # Circular positioning
             angle = (i / self.num_bars) * math.pi * 2 - math.pi / 2 + self.rotation
             
             # Smooth out the height
-            height = min_height + self.levels[i] * max_height
+            height = min_height + levels[i] * max_height
             
             # Start point (on the radius)
             inner_x = self.cx + math.cos(angle) * self.radius
@@ -231,7 +487,7 @@ class CircularSpectrum:
             outer_x = self.cx + math.cos(angle) * (self.radius + height)
             outer_y = self.cy + math.sin(angle) * (self.radius + height)
             
-            color = self.colors[i]
+            color = colors[i]
             
             # Draw the main bar line with rounded ends simulation
             pygame.draw.line(self.screen, color, (inner_x, inner_y), (outer_x, outer_y), bar_width)
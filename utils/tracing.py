@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import threading
+import itertools
+from collections import defaultdict, deque
+from config.settings import Config
+
+
+def percentiles(values):
+    """count, p50/p95/p99 (nearest rank) of a list of durations"""
+    ordered = sorted(values)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+    return {'count': len(ordered), 'p50': pick(50), 'p95': pick(95), 'p99': pick(99)}
+
+
+def print_percentiles(summary):
+    print(f"{'stage':<22} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name in sorted(summary):
+        row = summary[name]
+        print(f"{name:<22} {row['count']:>5} {row['p50']:>9.1f} {row['p95']:>9.1f} {row['p99']:>9.1f}")
+
+
+class Span:
+    """One timed stage of a turn. Use it as a context manager, or begin()/end() by hand."""
+    __slots__ = ('tracer', 'name', 'turn', 'start', 'args')
+    
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.turn = tracer.current_turn
+        self.start = time.perf_counter_ns()
+        self.args = args
+    
+    def end(self, **args):
+        if args:
+            self.args.update(args)
+        if self.turn is None:
+            # started before the turn did (waiting for speech), it's still part of it
+            self.turn = self.tracer.current_turn
+        self.tracer._record(self, time.perf_counter_ns())
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.end()
+        return False
+
+
+class _NullSpan:
+    """What you get when tracing is off, does nothing as cheaply as possible"""
+    __slots__ = ()
+    
+    def end(self, **args):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Times each stage of a voice turn (listen -> route -> think -> speak) and tags it with
+    a turn id. Spans pile up in memory and get written out when the turn ends, both as
+    JSONL and as a Chrome trace (open it in chrome://tracing or ui.perfetto.dev).
+    The turn is per thread: the ear thread starts it when speech begins and hands it over
+    with the text, the worker carries it on and ends it.
+    """
+    
+    def __init__(self, directory=None, enabled=None):
+        self.enabled = Config.TRACING if enabled is None else enabled
+        self.directory = directory or Config.TRACE_DIR
+        self._local = threading.local()
+        self._turn_starts = {}  # turn id -> when it started, ns
+        self._turn_ids = itertools.count(1)
+        self._pending = deque()  # finished spans waiting to be written
+        self._durations = defaultdict(lambda: deque(maxlen=Config.TRACE_SUMMARY_SAMPLES))
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._origin_wall_us = time.time() * 1e6
+        self._jsonl_path = None
+        self._chrome_path = None
+    
+    @property
+    def current_turn(self):
+        return getattr(self._local, 'turn', None)
+    
+    def start_turn(self, turn=None):
+        """
+        Everything this thread traces from now on gets tagged with the turn: a new one, or
+        one another thread started and handed over
+        """
+        if not self.enabled:
+            return None
+        if turn is None:
+            turn = next(self._turn_ids)
+            self._turn_starts[turn] = time.perf_counter_ns()
+        self._local.turn = turn
+        return turn
+    
+    def hand_off(self):
+        """This thread is done with its turn but someone else carries it on, so it stays open"""
+        self._local.turn = None
+    
+    def end_turn(self, keep=True):
+        """
+        Ends this thread's turn and writes its spans out (off the render thread, the worker
+        calls this). keep=False drops them instead, e.g. a listen where nobody said anything.
+        """
+        if not self.enabled:
+            return
+        turn = self.current_turn
+        self._local.turn = None
+        self._turn_starts.pop(turn, None)
+        if keep:
+            self.flush()
+            return
+        thread = threading.get_ident()
+        with self._lock:
+            # just this turn's, other threads keep recording while we sort through them
+            for _ in range(len(self._pending)):
+                span = self._pending.popleft()
+                if span[1] != turn or (turn is None and span[4] != thread):
+                    self._pending.append(span)
+    
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, args)
+    
+    begin = span
+    
+    def mark(self, name, **args):
+        """Instant event, e.g. first audio out of the speakers"""
+        if not self.enabled:
+            return
+        span = Span(self, name, args)
+        self._record(span, span.start, instant=True)
+    
+    def _record(self, span, end_ns, instant=False):
+        self._pending.append((span.name, span.turn, span.start, end_ns, threading.get_ident(), span.args, instant))
+        if not instant:
+            self._durations[span.name].append((end_ns - span.start) / 1e6)
+        elif span.turn in self._turn_starts:
+            # instants get summarised as "how long into the turn", e.g. voice.first_audio@turn
+            self._durations[span.name + "@turn"].append((span.start - self._turn_starts[span.turn]) / 1e6)
+    
+    def _open_files(self):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        self._jsonl_path = os.path.join(self.directory, f"nero-{stamp}-{os.getpid()}.jsonl")
+        self._chrome_path = os.path.join(self.directory, f"nero-{stamp}-{os.getpid()}.trace.json")
+        # chrome's JSON array format is fine without the closing bracket, so we can just append
+        with open(self._chrome_path, 'w') as f:
+            f.write("[\n")
+    
+    def flush(self):
+        """Writes everything pending to the JSONL log and the chrome trace"""
+        with self._lock:
+            if not self._pending:
+                return
+            if self._jsonl_path is None:
+                try:
+                    self._open_files()
+                except OSError as e:
+                    print(f"[Trace] Error: {e}")
+                    self.enabled = False
+                    return
+            
+            log_lines = []
+            trace_lines = []
+            while self._pending:
+                name, turn, start_ns, end_ns, tid, args, instant = self._pending.popleft()
+                ts = self._origin_wall_us + (start_ns - self._origin_ns) / 1000
+                dur_ms = (end_ns - start_ns) / 1e6
+                log_lines.append(json.dumps({'turn': turn, 'name': name, 'ts': ts / 1e6,
+                                             'dur_ms': dur_ms, 'thread': tid, 'args': args}))
+                event = {'name': name, 'cat': name.split('.')[0], 'ph': 'i' if instant else 'X',
+                         'ts': ts, 'pid': os.getpid(), 'tid': tid, 'args': dict(args, turn=turn)}
+                if instant:
+                    event['s'] = 'p'
+                else:
+                    event['dur'] = dur_ms * 1000
+                trace_lines.append(json.dumps(event))
+            
+            try:
+                with open(self._jsonl_path, 'a') as f:
+                    f.write("\n".join(log_lines) + "\n")
+                with open(self._chrome_path, 'a') as f:
+                    f.write(",\n".join(trace_lines) + ",\n")
+            except OSError as e:
+                print(f"[Trace] Error: {e}")
+    
+    def summary(self):
+        """p50/p95/p99 in ms per stage over the recent turns"""
+        return {name: percentiles(values) for name, values in list(self._durations.items()) if values}
+    
+    def print_summary(self):
+        summary = self.summary()
+        if summary:
+            print_percentiles(summary)
+
+
+# one tracer for the whole app
+tracer = Tracer()
+
+
+if __name__ == "__main__":
+    # python -m utils.tracing ~/.nero/traces/nero-....jsonl  -> per-stage percentiles of a log
+    import sys
+    durations = defaultdict(list)
+    for path in sys.argv[1:]:
+        with open(path) as f:
+            for line in f:
+                span = json.loads(line)
+                if span['dur_ms'] > 0:
+                    durations[span['name']].append(span['dur_ms'])
+    print_percentiles({name: percentiles(values) for name, values in durations.items()})